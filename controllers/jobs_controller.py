@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+import os
+from pathlib import Path
+
+from controllers.timezone_controller import annotate_rows
+from utils.jobs import DONE, JobStore
+from utils.tabular import read_chunks
+
+# SQLite job store; point it at a persistent volume so jobs survive restarts
+JOBS_DB_PATH = os.environ.get(
+    "JOBS_DB_PATH", str(Path(__file__).parent.parent / "data" / "jobs" / "jobs.db")
+)
+# Rows per chunk, the unit of work (and of progress kept across restarts)
+JOBS_CHUNK_SIZE = int(os.environ.get("JOBS_CHUNK_SIZE", "1000"))
+# Uploaded file formats by Content-Type
+UPLOAD_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/vnd.apache.parquet": "parquet",
+}
+RESULT_FORMATS = ("jsonl", "csv")
+
+job_store = JobStore(JOBS_DB_PATH)
+
+def _chunked(rows, chunk_size):
+    for start in range(0, len(rows), chunk_size):
+        yield rows[start:start + chunk_size]
+
+def _job_options(latitude_column, longitude_column):
+    if not isinstance(latitude_column, str) or not isinstance(longitude_column, str):
+        raise TypeError("Coordinate column names must be strings.")
+    return {"latitude_column": latitude_column, "longitude_column": longitude_column}
+
+def submit_rows(rows, latitude_column="latitude", longitude_column="longitude"):
+    """
+    Create an annotation job from a list of row objects.
+
+    Args:
+        rows (list): Objects with the coordinate columns; other keys are
+            kept in the output.
+        latitude_column (str): Name of the latitude column.
+        longitude_column (str): Name of the longitude column.
+
+    Returns:
+        dict: The queued job, see `get_job`.
+
+    Raises:
+        TypeError: If rows is not a non-empty list of objects.
+    """
+    if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+        raise TypeError("Points must be a non-empty list of objects.")
+    options = _job_options(latitude_column, longitude_column)
+    job_id = job_store.create(options)
+    return job_store.add_chunks(job_id, _chunked(rows, JOBS_CHUNK_SIZE))
+
+def submit_file(path, file_format, latitude_column="latitude", longitude_column="longitude"):
+    """
+    Create an annotation job from an uploaded CSV, JSONL or Parquet file,
+    read in chunks of JOBS_CHUNK_SIZE rows.
+
+    Returns:
+        dict: The queued job, see `get_job`.
+
+    Raises:
+        ValueError: If the file cannot be parsed.
+        RuntimeError: If Parquet support (pyarrow) is not installed.
+    """
+    options = _job_options(latitude_column, longitude_column)
+    job_id = job_store.create(options)
+    try:
+        return job_store.add_chunks(job_id, read_chunks(path, file_format, JOBS_CHUNK_SIZE))
+    except (csv.Error, RuntimeError, ValueError) as exc:
+        job_store.fail(job_id, str(exc))
+        if isinstance(exc, csv.Error):
+            raise ValueError(f"Invalid CSV file: {exc}") from exc
+        raise
+
+def process_chunk(rows, options):
+    """
+    Annotate one job chunk (the JobWorkerPool process function).
+    """
+    return annotate_rows(rows, options["latitude_column"], options["longitude_column"])
+
+def get_job(job_id):
+    """
+    Returns the status of a job: id, status (loading, queued, running, done
+    or failed), chunks, chunks_done, rows, error, created_at and updated_at.
+
+    Raises:
+        KeyError: If the job does not exist.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        raise KeyError("Job not found.")
+    return job
+
+def job_results(job_id, result_format="jsonl"):
+    """
+    Stream the annotated rows of a finished job, in input order.
+
+    Returns:
+        generator: Encoded JSON lines, or CSV lines after a header row.
+
+    Raises:
+        KeyError: If the job does not exist.
+        ValueError: If the format is unknown.
+        RuntimeError: If the job is not done.
+    """
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"Format must be one of: {', '.join(RESULT_FORMATS)}.")
+    job = get_job(job_id)
+    if job["status"] != DONE:
+        raise RuntimeError(f"Job is not done (status: {job['status']}).")
+    chunks = job_store.results(job_id)
+    if result_format == "jsonl":
+        return (
+            "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+            for rows in chunks
+        )
+    return _csv_lines(chunks)
+
+def _csv_lines(chunks):
+    buffer = io.StringIO()
+    writer = None
+    for rows in chunks:
+        if writer is None and rows:
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()), extrasaction="ignore")
+            writer.writeheader()
+        if writer is not None:
+            writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
@@ -1,16 +1,25 @@
 import time
 
+from utils.monitor import runtime_monitor
+from utils.startup import get_startup_metrics
+
 start_time = time.time()
 
 def get_status():
     """
-    Returns the API status, name, version, and uptime in seconds.
+    Returns the API status, name, version, uptime in seconds, startup
+    timings in milliseconds, runtime health samples (event-loop lag,
+    threadpool usage, GC pauses) and the load shedding state of each route
+    class.
     """
-    from main import app  # Import here to avoid circular import
+    from main import app, load_shedding_classes  # Import here to avoid circular import
     uptime = int(time.time() - start_time)
     return {
         "msg": "API status 🚀",
         "name": "timestamp-api",
         "version": app.version,
         "uptime": uptime,
+        "startup": get_startup_metrics(),
+        "runtime": runtime_monitor.snapshot(),
+        "load_shedding": {c.name: c.snapshot() for c in load_shedding_classes},
     }
@@ -1,11 +1,130 @@
+import os
+from math import ceil
+
 from utils.timezones import (
     load_all_timezones,
+    dataset_version as compute_dataset_version,
     TZ_LOCATIONS,
 )
-from utils.geo import haversine
+from utils.geo import (
+    haversine,
+    chord_squared_from_km,
+    distance_rows,
+    great_circle_points,
+    point_in_polygon,
+    polygon_bbox,
+)
+from utils.export import (
+    EXPORT_FORMATS,
+    EXPORT_TABLES,
+    cities_table,
+    get_pyarrow,
+    regions_table,
+    serialize,
+)
+from utils.geonames import load_cities_file
+from utils.indexes import get_city_index
+from utils.planner import CityQuery
+from utils.startup import startup_phase
+from utils.tracing import traced
+
+
+# Size limits for distance matrices: points per side, and cells returned in
+# a single (non-streamed) response
+MAX_MATRIX_POINTS = 10000
+MAX_MATRIX_CELLS = 250000
+
+# Points per cities_nearest_batch request; larger sets go through /jobs
+MAX_BATCH_POINTS = 1000
+
+# Route sampling: the first pass uses about ROUTE_SAMPLES points, spaced
+# between ROUTE_MIN_STEP_KM and ROUTE_MAX_STEP_KM apart; every change of
+# timezone (see route_timezone_key) is then bisected until located within
+# ROUTE_TOLERANCE_KM
+ROUTE_SAMPLES = 200
+ROUTE_MIN_STEP_KM = 5.0
+ROUTE_MAX_STEP_KM = 50.0
+ROUTE_TOLERANCE_KM = 1.0
+
+# Optional GeoNames dump or CSV file replacing the bundled YAML cities
+CITIES_FILE = os.environ.get("CITIES_FILE")
+
+with startup_phase("load_dataset"):
+    ALL_TIMEZONES = load_cities_file(CITIES_FILE) if CITIES_FILE else load_all_timezones()
+
+_DATASET_VERSION = {"timezones": None, "locations": None, "version": None}
+
+def dataset_version():
+    """
+    Content hash of the loaded cities and region bounds, recomputed only
+    when either object is replaced.
 
+    Returns:
+        str: 16 character hex digest.
+    """
+    if (
+        _DATASET_VERSION["timezones"] is not ALL_TIMEZONES
+        or _DATASET_VERSION["locations"] is not TZ_LOCATIONS
+    ):
+        _DATASET_VERSION["version"] = compute_dataset_version(ALL_TIMEZONES, TZ_LOCATIONS)
+        _DATASET_VERSION["timezones"] = ALL_TIMEZONES
+        _DATASET_VERSION["locations"] = TZ_LOCATIONS
+    return _DATASET_VERSION["version"]
+
+# Serialized exports of the current dataset version, by (table, format)
+_EXPORTS = {"version": None, "buffers": {}}
+
+def validate_export(table, file_format):
+    """
+    Check that a dataset export table and format are supported.
 
-ALL_TIMEZONES = load_all_timezones()
+    Raises:
+        ValueError: If the table or format is unknown.
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Table must be one of: {', '.join(EXPORT_TABLES)}.")
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Format must be one of: {', '.join(EXPORT_FORMATS)}.")
+
+@traced("timezone_controller.dataset_export")
+def dataset_export(table="cities", file_format="arrow"):
+    """
+    Export the cities or the region bounds as an Arrow IPC stream or a
+    Parquet file. Each export is built once per dataset version and served
+    from the same in-memory buffer afterwards.
+
+    Args:
+        table (str): "cities" or "regions".
+        file_format (str): "arrow" or "parquet".
+
+    Returns:
+        dict: version (dataset hash), media_type and body (a memoryview of
+            the serialized buffer).
+
+    Raises:
+        ValueError: If the table or format is unknown.
+        RuntimeError: If pyarrow is not installed.
+    """
+    validate_export(table, file_format)
+    version = dataset_version()
+    if _EXPORTS["version"] != version:
+        _EXPORTS["version"] = version
+        _EXPORTS["buffers"] = {}
+    key = (table, file_format)
+    if key not in _EXPORTS["buffers"]:
+        pyarrow = get_pyarrow()
+        data = (
+            cities_table(pyarrow, ALL_TIMEZONES) if table == "cities"
+            else regions_table(pyarrow, TZ_LOCATIONS)
+        )
+        _EXPORTS["buffers"][key] = serialize(
+            pyarrow, data, file_format, metadata={"dataset_version": version}
+        )
+    return {
+        "version": version,
+        "media_type": EXPORT_FORMATS[file_format],
+        "body": memoryview(_EXPORTS["buffers"][key]),
+    }
 
 def validate_lat_lon(latitude, longitude):
     """
@@ -42,7 +161,32 @@ def validate_offset(offset):
     if not (-12 <= offset <= 14):
         raise ValueError("UTC offset must be between -12 and 14.")
 
+BBOX_KEYS = ("min_latitude", "max_latitude", "min_longitude", "max_longitude")
 
+def validate_bbox(bbox):
+    """
+    Validate a bounding box given as min/max latitude and longitude. The
+    box crosses the antimeridian when min_longitude > max_longitude.
+
+    Args:
+        bbox (dict): Dictionary with "min_latitude", "max_latitude",
+            "min_longitude" and "max_longitude".
+
+    Raises:
+        TypeError: If a bound is not numeric.
+        ValueError: If a bound is out of range or the latitudes are inverted.
+    """
+    if not isinstance(bbox, dict) or not all(
+        isinstance(bbox.get(key), (int, float)) for key in BBOX_KEYS
+    ):
+        raise TypeError("Bounding box must have numeric min/max latitude and longitude.")
+    validate_lat_lon(bbox["min_latitude"], bbox["min_longitude"])
+    validate_lat_lon(bbox["max_latitude"], bbox["max_longitude"])
+    if bbox["min_latitude"] > bbox["max_latitude"]:
+        raise ValueError("min_latitude must not be greater than max_latitude.")
+
+
+@traced("timezone_controller.tz_region")
 def tz_region(latitude: float, longitude: float):
     """
     Find all timezone regions that contain the given latitude and longitude.
@@ -65,6 +209,7 @@ def tz_region(latitude: float, longitude: float):
     )
     return {"regions": regions}
 
+@traced("timezone_controller.tz_regions")
 def tz_regions():
     """
     Get a list of all timezone regions with their bounding coordinates.
@@ -77,6 +222,7 @@ def tz_regions():
         for name, bounds in TZ_LOCATIONS.items()
     ]
 
+@traced("timezone_controller.tz_region_nearest")
 def tz_region_nearest(latitude: float, longitude: float):
     """
     Find the nearest timezone region to the given latitude and longitude.
@@ -103,6 +249,7 @@ def tz_region_nearest(latitude: float, longitude: float):
         "distance_km": round(min_dist, 2) if min_dist is not None else None
     }
 
+@traced("timezone_controller.tz_region_cities")
 def tz_region_cities(region: str):
     """
     Get all cities within the bounding box of a given timezone region.
@@ -118,15 +265,11 @@ def tz_region_cities(region: str):
     if region not in TZ_LOCATIONS:
         return {"error": "Region not found"}
     bounds = TZ_LOCATIONS[region]
-    cities = [
-        tz for tz in ALL_TIMEZONES
-        if (
-            bounds["min_latitude"] <= tz["latitude"] <= bounds["max_latitude"]
-            and bounds["min_longitude"] <= tz["longitude"] <= bounds["max_longitude"]
-        )
-    ]
+    index = get_city_index(ALL_TIMEZONES)
+    cities = [ALL_TIMEZONES[i] for i in index.grid.query(bounds)]
     return {"region": region, "cities": cities}
 
+@traced("timezone_controller.cities_nearest")
 def cities_nearest(latitude: float, longitude: float):
     """
     Find the four nearest timezone cities to the given latitude and longitude.
@@ -140,11 +283,11 @@ def cities_nearest(latitude: float, longitude: float):
             nearest cities.
     """
     validate_lat_lon(latitude, longitude)
-    distances = []
-    for tz in ALL_TIMEZONES:
-        dist = haversine(latitude, longitude, tz["latitude"], tz["longitude"])
-        distances.append((dist, tz))
-    distances.sort(key=lambda x: x[0])
+    index = get_city_index(ALL_TIMEZONES)
+    distances = [
+        (dist, ALL_TIMEZONES[i])
+        for dist, i in index.nearest(latitude, longitude, 4)
+    ]
     nearest = [
         {
             "name": tz["name"],
@@ -155,7 +298,7 @@ def cities_nearest(latitude: float, longitude: float):
             "dst": tz["dst"],
             "region": tz["region"],
         }
-        for dist, tz in distances[:4]
+        for dist, tz in distances
     ]
     tz_location = nearest[0]["name"] if nearest else None
     return {
@@ -163,6 +306,121 @@ def cities_nearest(latitude: float, longitude: float):
         "nearest_cities": nearest,
     }
 
+@traced("timezone_controller.city_nearest")
+def city_nearest(latitude: float, longitude: float):
+    """
+    Find the single nearest timezone city to the given latitude and longitude.
+
+    Args:
+        latitude (float): Latitude value.
+        longitude (float): Longitude value.
+
+    Returns:
+        dict: Dictionary with the nearest city name, its distance in
+            kilometers, UTC offset, DST flag and region.
+    """
+    validate_lat_lon(latitude, longitude)
+    return _city_result(get_city_index(ALL_TIMEZONES).nearest(latitude, longitude, 1))
+
+@traced("timezone_controller.city_nearest_many")
+def city_nearest_many(points):
+    """
+    `city_nearest` for many points, resolved in one batched index pass.
+
+    Args:
+        points (list): (latitude, longitude) tuples, already validated with
+            validate_lat_lon.
+
+    Returns:
+        list: One city_nearest result per point, in order.
+    """
+    if not points:
+        return []
+    index = get_city_index(ALL_TIMEZONES)
+    return [_city_result(nearest) for nearest in index.nearest_many(points, 1)]
+
+def _city_result(nearest):
+    if not nearest:
+        return {"tz_location": None}
+    dist, i = nearest[0]
+    tz = ALL_TIMEZONES[i]
+    return {
+        "tz_location": tz["name"],
+        "distance_km": round(dist, 2),
+        "utc_offset": tz["utc_offset"],
+        "dst": tz["dst"],
+        "region": tz["region"],
+    }
+
+# Columns added to each row by `annotate_rows`
+ANNOTATION_FIELDS = ["nearest_city", "distance_km", "utc_offset", "dst", "region"]
+
+def annotate_rows(rows, latitude_column="latitude", longitude_column="longitude"):
+    """
+    Add the nearest city, distance, UTC offset, DST flag and region to each
+    row (used by bulk jobs and the offline annotation command). Rows with
+    missing or invalid coordinates get empty annotations; rows that are not
+    objects (e.g. a JSONL line holding a list) are skipped.
+
+    Args:
+        rows (list): Row dictionaries holding the coordinate columns.
+        latitude_column (str): Name of the latitude column.
+        longitude_column (str): Name of the longitude column.
+
+    Returns:
+        list: Copies of the object rows with the ANNOTATION_FIELDS added.
+    """
+    annotated = []
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        try:
+            result = city_nearest(
+                float(row[latitude_column]), float(row[longitude_column])
+            )
+        except (KeyError, TypeError, ValueError):
+            result = {}
+        annotated.append({
+            **row,
+            "nearest_city": result.get("tz_location"),
+            "distance_km": result.get("distance_km"),
+            "utc_offset": result.get("utc_offset"),
+            "dst": result.get("dst"),
+            "region": result.get("region"),
+        })
+    return annotated
+
+@traced("timezone_controller.cities_nearest_batch")
+def cities_nearest_batch(points):
+    """
+    Find the nearest timezone cities for a batch of points.
+
+    Args:
+        points (list): List of dictionaries with "latitude" and "longitude"
+            keys.
+
+    Returns:
+        dict: Dictionary with one cities_nearest result per point, in the
+            same order as the input.
+
+    Raises:
+        TypeError: If points is not a list of objects, or a coordinate is
+            not numeric.
+        ValueError: If there are more than MAX_BATCH_POINTS points, or a
+            coordinate is out of range.
+    """
+    if not isinstance(points, list) or not all(isinstance(p, dict) for p in points):
+        raise TypeError("Points must be a list of objects.")
+    if len(points) > MAX_BATCH_POINTS:
+        raise ValueError(f"At most {MAX_BATCH_POINTS} points per batch.")
+    return {
+        "results": [
+            cities_nearest(point.get("latitude"), point.get("longitude"))
+            for point in points
+        ]
+    }
+
+@traced("timezone_controller.cities_in_radius")
 def cities_in_radius(latitude: float, longitude: float, radius_km: float):
     """
     Find all timezone cities within a given radius (in kilometers) of a point.
@@ -182,16 +440,310 @@ def cities_in_radius(latitude: float, longitude: float, radius_km: float):
     if not isinstance(radius_km, (int, float)) or radius_km < 0:
         raise ValueError("Radius must be a non-negative number.")
 
+    index = get_city_index(ALL_TIMEZONES)
+    matches = index.within(
+        latitude, longitude, radius_km, chord_squared_from_km(radius_km)
+    )
     result = []
-    for city in ALL_TIMEZONES:
-        dist = haversine(latitude, longitude, city["latitude"], city["longitude"])
-        if dist <= radius_km:
-            city_copy = city.copy()
-            city_copy["distance_km"] = round(dist, 2)
-            result.append(city_copy)
+    for dist, i in matches:
+        city_copy = ALL_TIMEZONES[i].copy()
+        city_copy["distance_km"] = round(dist, 2)
+        result.append(city_copy)
     result.sort(key=lambda c: c["distance_km"])
     return {"cities": result}
 
+@traced("timezone_controller.cities_in_bbox")
+def cities_in_bbox(bbox: dict):
+    """
+    Find all timezone cities inside a bounding box.
+
+    Args:
+        bbox (dict): Bounding box, see validate_bbox. It crosses the
+            antimeridian when min_longitude > max_longitude.
+
+    Returns:
+        dict: Dictionary with a list of cities inside the box.
+    """
+    validate_bbox(bbox)
+    index = get_city_index(ALL_TIMEZONES)
+    return {"cities": [ALL_TIMEZONES[i].copy() for i in index.grid.query(bbox)]}
+
+def parse_polygons(geometry):
+    """
+    Validate a GeoJSON Polygon or MultiPolygon (or a Feature holding one)
+    and return its polygons as lists of rings of (longitude, latitude).
+
+    Args:
+        geometry (dict): GeoJSON object.
+
+    Returns:
+        list: One list of rings per polygon, exterior ring first.
+
+    Raises:
+        TypeError: If the object is not a Polygon or MultiPolygon geometry.
+        ValueError: If a ring has fewer than four positions, is not closed, or
+            has coordinates out of range.
+    """
+    if isinstance(geometry, dict) and geometry.get("type") == "Feature":
+        geometry = geometry.get("geometry")
+    if not isinstance(geometry, dict) or geometry.get("type") not in ("Polygon", "MultiPolygon"):
+        raise TypeError("Geometry must be a GeoJSON Polygon or MultiPolygon.")
+    coordinates = geometry.get("coordinates")
+    polygons = [coordinates] if geometry["type"] == "Polygon" else coordinates
+    if not isinstance(polygons, list) or not polygons:
+        raise TypeError("Geometry must be a GeoJSON Polygon or MultiPolygon.")
+    parsed = []
+    for rings in polygons:
+        if not isinstance(rings, list) or not rings:
+            raise TypeError("Geometry must be a GeoJSON Polygon or MultiPolygon.")
+        parsed_rings = []
+        for ring in rings:
+            if not isinstance(ring, list) or not all(
+                isinstance(position, list) and len(position) >= 2 for position in ring
+            ):
+                raise TypeError("Polygon rings must be lists of [longitude, latitude] positions.")
+            positions = [(position[0], position[1]) for position in ring]
+            for longitude, latitude in positions:
+                validate_lat_lon(latitude, longitude)
+            if len(positions) < 4:
+                raise ValueError("Polygon rings must have at least four positions.")
+            if positions[0] != positions[-1]:
+                raise ValueError("Polygon rings must be closed.")
+            parsed_rings.append(positions)
+        parsed.append(parsed_rings)
+    return parsed
+
+@traced("timezone_controller.cities_in_polygon")
+def cities_in_polygon(geometry):
+    """
+    Find all timezone cities inside a GeoJSON Polygon or MultiPolygon.
+
+    Coordinates are treated as planar longitude/latitude, so polygons that
+    cross the antimeridian must be split into a MultiPolygon (RFC 7946).
+
+    Args:
+        geometry (dict): GeoJSON Polygon, MultiPolygon or Feature.
+
+    Returns:
+        dict: Dictionary with a list of cities inside the polygon.
+    """
+    polygons = parse_polygons(geometry)
+    index = get_city_index(ALL_TIMEZONES)
+    found = set()
+    for rings in polygons:
+        found.update(
+            i for i in index.grid.query(polygon_bbox(rings))
+            if point_in_polygon(ALL_TIMEZONES[i]["latitude"], ALL_TIMEZONES[i]["longitude"], rings)
+        )
+    return {"cities": [ALL_TIMEZONES[i].copy() for i in sorted(found)]}
+
+def resolve_matrix_points(points):
+    """
+    Resolve distance matrix points given as city names or coordinates.
+
+    Args:
+        points (list): City names (str, or {"name": ...}) and/or
+            dictionaries with "latitude" and "longitude".
+
+    Returns:
+        list: Dictionaries with "name" (None for coordinates), "latitude"
+            and "longitude".
+
+    Raises:
+        TypeError: If points is not a non-empty list of names or objects.
+        ValueError: If a city name is unknown, a coordinate is out of range,
+            or there are more than MAX_MATRIX_POINTS points.
+    """
+    if not isinstance(points, list) or not points:
+        raise TypeError("Points must be a non-empty list.")
+    if len(points) > MAX_MATRIX_POINTS:
+        raise ValueError(f"At most {MAX_MATRIX_POINTS} points are allowed per side.")
+    names = get_city_index(ALL_TIMEZONES).names
+    resolved = []
+    for point in points:
+        if isinstance(point, dict) and "latitude" not in point and "longitude" not in point:
+            point = point.get("name")
+        if isinstance(point, str):
+            if point.lower() not in names:
+                raise ValueError(f"City not found: {point}")
+            tz = ALL_TIMEZONES[names[point.lower()]]
+            resolved.append({"name": tz["name"], "latitude": tz["latitude"], "longitude": tz["longitude"]})
+        elif isinstance(point, dict):
+            validate_lat_lon(point.get("latitude"), point.get("longitude"))
+            resolved.append({"name": None, "latitude": point["latitude"], "longitude": point["longitude"]})
+        else:
+            raise TypeError("Points must be city names or objects with latitude and longitude.")
+    return resolved
+
+def _coordinates(points):
+    return [(point["latitude"], point["longitude"]) for point in points]
+
+@traced("timezone_controller.distance_matrix")
+def distance_matrix(origins, destinations):
+    """
+    Great-circle distances between every origin and every destination.
+
+    Args:
+        origins (list): Points, see resolve_matrix_points.
+        destinations (list): Points, see resolve_matrix_points.
+
+    Returns:
+        dict: Dictionary with the resolved origins and destinations and the
+            N x M "distances_km" matrix (rows follow the origins).
+
+    Raises:
+        ValueError: If the matrix has more than MAX_MATRIX_CELLS cells; use
+            distance_matrix_stream for those.
+    """
+    origins = resolve_matrix_points(origins)
+    destinations = resolve_matrix_points(destinations)
+    if len(origins) * len(destinations) > MAX_MATRIX_CELLS:
+        raise ValueError(
+            f"Matrix exceeds {MAX_MATRIX_CELLS} cells, request application/x-ndjson to stream it."
+        )
+    matrix = []
+    for rows in distance_rows(_coordinates(origins), _coordinates(destinations)):
+        matrix.extend(rows)
+    return {"origins": origins, "destinations": destinations, "distances_km": matrix}
+
+def distance_matrix_stream(origins, destinations):
+    """
+    Distance matrix computed and returned in chunks of rows.
+
+    Points are resolved (and validated) before anything is produced.
+
+    Args:
+        origins (list): Points, see resolve_matrix_points.
+        destinations (list): Points, see resolve_matrix_points.
+
+    Returns:
+        iterator: A first dictionary with the resolved origins and
+            destinations, then one {"origin": i, "distances_km": [...]}
+            dictionary per origin, in order.
+    """
+    origins = resolve_matrix_points(origins)
+    destinations = resolve_matrix_points(destinations)
+
+    def lines():
+        yield {"origins": origins, "destinations": destinations}
+        row_index = 0
+        for rows in distance_rows(_coordinates(origins), _coordinates(destinations)):
+            for row in rows:
+                yield {"origin": row_index, "distances_km": row}
+                row_index += 1
+
+    return lines()
+
+def route_timezone_key(tz):
+    """
+    Timezone of a city as seen along a route: its region, UTC offset and DST
+    flag. Neighbouring cities sharing all three are in the same timezone.
+    """
+    return tz["region"], tz["utc_offset"], tz["dst"]
+
+@traced("timezone_controller.route_timezones")
+def route_timezones(
+    from_latitude: float,
+    from_longitude: float,
+    to_latitude: float,
+    to_longitude: float,
+):
+    """
+    Find the sequence of timezones crossed along the great-circle path
+    between two points.
+
+    The path is sampled at a step adapted to its length, all samples are
+    resolved to their nearest city in one batched index pass, and each
+    change of timezone (route_timezone_key of the nearest city) is bisected,
+    one batched pass per round, to locate the crossing. Consecutive samples
+    in the same timezone are collapsed, even when their nearest city differs.
+
+    Args:
+        from_latitude (float): Latitude of the origin.
+        from_longitude (float): Longitude of the origin.
+        to_latitude (float): Latitude of the destination.
+        to_longitude (float): Longitude of the destination.
+
+    Returns:
+        dict: Dictionary with the route length, the number of sampled points
+            and the ordered transitions. Each transition has the nearest
+            city where the timezone changes and the approximate position
+            (and distance along the route) of the change; the first is at
+            the origin.
+
+    Raises:
+        ValueError: If the points are antipodal.
+    """
+    validate_lat_lon(from_latitude, from_longitude)
+    validate_lat_lon(to_latitude, to_longitude)
+    total_km = haversine(from_latitude, from_longitude, to_latitude, to_longitude)
+    if not ALL_TIMEZONES:
+        return {"distance_km": round(total_km, 2), "samples": 0, "transitions": []}
+    index = get_city_index(ALL_TIMEZONES)
+    samples = 0
+
+    def resolve(fractions):
+        nonlocal samples
+        samples += len(fractions)
+        points = great_circle_points(
+            from_latitude, from_longitude, to_latitude, to_longitude, fractions
+        )
+        return [nearest[0][1] for nearest in index.nearest_many(points, 1)]
+
+    def zone(i):
+        return route_timezone_key(ALL_TIMEZONES[i])
+
+    step_km = min(max(total_km / ROUTE_SAMPLES, ROUTE_MIN_STEP_KM), ROUTE_MAX_STEP_KM)
+    steps = max(ceil(total_km / step_km), 1)
+    fractions = [k / steps for k in range(steps + 1)]
+    cities = resolve(fractions)
+
+    # (start fraction, city, end fraction, city) intervals holding a change
+    # of timezone
+    pending = [
+        (fractions[k], cities[k], fractions[k + 1], cities[k + 1])
+        for k in range(steps)
+        if zone(cities[k]) != zone(cities[k + 1])
+    ]
+    tolerance = ROUTE_TOLERANCE_KM / total_km if total_km else 1.0
+    crossings = []
+    while pending:
+        crossings.extend(interval for interval in pending if interval[2] - interval[0] <= tolerance)
+        active = [interval for interval in pending if interval[2] - interval[0] > tolerance]
+        middles = [(start + end) / 2 for start, _, end, _ in active]
+        pending = []
+        for (start, start_city, end, end_city), middle, middle_city in zip(
+            active, middles, resolve(middles)
+        ):
+            if zone(middle_city) != zone(start_city):
+                pending.append((start, start_city, middle, middle_city))
+            if zone(middle_city) != zone(end_city):
+                pending.append((middle, middle_city, end, end_city))
+    crossings.sort()
+
+    stops = [(0.0, cities[0])]
+    for start, _, end, city in crossings:
+        if zone(city) != zone(stops[-1][1]):
+            stops.append(((start + end) / 2, city))
+    positions = great_circle_points(
+        from_latitude, from_longitude, to_latitude, to_longitude,
+        [fraction for fraction, _ in stops],
+    )
+    transitions = []
+    for (fraction, i), (lat, lon) in zip(stops, positions):
+        tz = ALL_TIMEZONES[i]
+        transitions.append({
+            "tz_location": tz["name"],
+            "utc_offset": tz["utc_offset"],
+            "dst": tz["dst"],
+            "region": tz["region"],
+            "latitude": round(lat, 4),
+            "longitude": round(lon, 4),
+            "distance_km": round(fraction * total_km, 2),
+        })
+    return {"distance_km": round(total_km, 2), "samples": samples, "transitions": transitions}
+
+@traced("timezone_controller.cities_by_utc_offset")
 def cities_by_utc_offset(offset: float):
     """
     Get all timezone cities with a specific UTC offset.
@@ -203,13 +755,10 @@ def cities_by_utc_offset(offset: float):
         dict: Dictionary with a list of cities matching the offset.
     """
     validate_offset(offset)
-    result = []
-    for city in ALL_TIMEZONES:
-        if float(city.get("utc_offset", 0)) == offset:
-            city_copy = city.copy()
-            result.append(city_copy)
-    return {"cities": result}
+    matches = get_city_index(ALL_TIMEZONES).postings["offset"].get(float(offset), [])
+    return {"cities": [ALL_TIMEZONES[i].copy() for i in matches]}
 
+@traced("timezone_controller.cities_with_dst")
 def cities_with_dst(dst: bool = True, region: str = None):
     """
     Get all timezone cities that observe (or do not observe) daylight saving
@@ -224,15 +773,77 @@ def cities_with_dst(dst: bool = True, region: str = None):
         dict: Dictionary with a list of cities matching the DST and region
             criteria.
     """
-    result = []
-    for city in ALL_TIMEZONES:
-        if bool(city.get("dst", False)) == dst:
-            if region and city["region"] != region:
-                continue
-            city_copy = city.copy()
-            result.append(city_copy)
-    return {"cities": result}
+    matches = get_city_index(ALL_TIMEZONES).postings["dst"].get(bool(dst), [])
+    return {
+        "cities": [
+            ALL_TIMEZONES[i].copy()
+            for i in matches
+            if not region or ALL_TIMEZONES[i]["region"] == region
+        ]
+    }
+
+@traced("timezone_controller.cities_query")
+def cities_query(
+    offset: float = None,
+    dst: bool = None,
+    region: str = None,
+    bbox: dict = None,
+    latitude: float = None,
+    longitude: float = None,
+    radius_km: float = None,
+):
+    """
+    Find the cities matching every given filter.
 
+    The query starts from the most selective index (UTC offset, DST or
+    region posting lists, the spatial grid, or a radius scan) and checks the
+    remaining filters on that candidate set only.
+
+    Args:
+        offset (float, optional): UTC offset value.
+        dst (bool, optional): Whether the city observes DST.
+        region (str, optional): Name of the region.
+        bbox (dict, optional): Bounding box, see validate_bbox.
+        latitude (float, optional): Latitude of the radius center.
+        longitude (float, optional): Longitude of the radius center.
+        radius_km (float, optional): Search radius in kilometers.
+
+    Returns:
+        dict: Dictionary with the chosen plan and the matching cities, sorted
+            by distance when a radius is given (with "distance_km").
+
+    Raises:
+        ValueError: If no filter is given or a radius filter is incomplete.
+    """
+    if all(value is None for value in (offset, dst, region, bbox, latitude, longitude, radius_km)):
+        raise ValueError("At least one filter is required.")
+    if offset is not None:
+        validate_offset(offset)
+    if bbox is not None:
+        validate_bbox(bbox)
+    circle = None
+    if latitude is not None or longitude is not None or radius_km is not None:
+        if latitude is None or longitude is None or radius_km is None:
+            raise ValueError("Radius filter needs latitude, longitude and radius_km.")
+        validate_lat_lon(latitude, longitude)
+        if not isinstance(radius_km, (int, float)) or radius_km < 0:
+            raise ValueError("Radius must be a non-negative number.")
+        circle = (latitude, longitude, radius_km)
+    if region is not None:
+        region = region.lower()
+    query = CityQuery(offset=offset, dst=dst, region=region, bbox=bbox, circle=circle)
+    plan, matches = query.run(get_city_index(ALL_TIMEZONES))
+    cities = []
+    for i, dist in matches:
+        city_copy = ALL_TIMEZONES[i].copy()
+        if dist is not None:
+            city_copy["distance_km"] = round(dist, 2)
+        cities.append(city_copy)
+    if circle is not None:
+        cities.sort(key=lambda c: c["distance_km"])
+    return {"plan": plan, "cities": cities}
+
+@traced("timezone_controller.city_extremes")
 def city_extremes(offset: float):
     """
     Find the northernmost, southernmost, easternmost, and westernmost cities for
@@ -245,11 +856,8 @@ def city_extremes(offset: float):
         dict: Dictionary with the extreme cities, or error if none found.
     """
     validate_offset(offset)
-    cities = [
-        city
-        for city in ALL_TIMEZONES
-        if float(city.get("utc_offset", 0)) == offset
-    ]
+    matches = get_city_index(ALL_TIMEZONES).postings["offset"].get(float(offset), [])
+    cities = [ALL_TIMEZONES[i] for i in matches]
     if not cities:
         return {"error": "No cities found for this UTC offset."}
     north = max(cities, key=lambda c: c["latitude"])
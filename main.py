@@ -1,17 +1,89 @@
-from fastapi import FastAPI, Depends, HTTPException, Header
-from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
-import os
+# Imported first: it sets the reference time of every startup phase
+from utils.startup import FirstResponseMiddleware, startup_phase
 
-from routes import status, timezone
+with startup_phase("import_framework"):
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI, Depends, HTTPException, Header
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.middleware.cors import CORSMiddleware
+    from dotenv import load_dotenv
+    import os
 
-# Load environment variables from .env file
+with startup_phase("import_utils"):
+    from utils.access_log import AccessLogMiddleware, AccessLogWriter
+    from utils.cache import make_shared_backend
+    from utils.compression import CompressionMiddleware
+    from utils.monitor import runtime_monitor
+    from utils.shedding import LoadSheddingMiddleware, RouteClass
+    from utils.tracing import TracingMiddleware, configure_tracing, shutdown_tracing, span
+
+# Load environment variables from .env file, before the routes import loads
+# the dataset (CITIES_FILE)
 load_dotenv()
 
+# Optional OpenTelemetry tracing, exported over OTLP/HTTP to TRACING_ENDPOINT
+# (e.g. http://collector:4318/v1/traces). Configured before the routes
+# import so the dataset load is traced too.
+configure_tracing(
+    os.environ.get("TRACING_ENDPOINT"),
+    sample_rate=float(os.environ.get("TRACING_SAMPLE_RATE", "1.0")),
+)
+
+with startup_phase("import_routes"):
+    from routes import export, jobs, status, stream, timezone
+
+def _threshold(name, default):
+    """
+    Read a monitor warning threshold; an empty value disables the warning.
+    """
+    value = os.environ.get(name, default)
+    return float(value) if value else None
+
+runtime_monitor.interval = float(os.environ.get("MONITOR_INTERVAL", "0.5"))
+runtime_monitor.lag_warning_ms = _threshold("MONITOR_LAG_WARNING_MS", "100")
+runtime_monitor.queue_warning = _threshold("MONITOR_QUEUE_WARNING", "40")
+runtime_monitor.gc_warning_ms = _threshold("MONITOR_GC_WARNING_MS", "50")
+runtime_monitor.warning_interval = float(os.environ.get("MONITOR_WARNING_INTERVAL", "60"))
+
+# Structured access log, written in batches off the request path. Disabled
+# unless ACCESS_LOG_PATH is set (e.g. requests.jsonl).
+ACCESS_LOG_PATH = os.environ.get("ACCESS_LOG_PATH")
+access_log_writer = (
+    AccessLogWriter(
+        ACCESS_LOG_PATH,
+        max_bytes=int(os.environ.get("ACCESS_LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+        backup_count=int(os.environ.get("ACCESS_LOG_BACKUPS", "5")),
+    )
+    if ACCESS_LOG_PATH else None
+)
+
+# Background bulk jobs (see routes/jobs.py). Finished jobs are deleted
+# JOBS_TTL seconds after their last update, checked on startup and then every
+# JOBS_PURGE_INTERVAL seconds.
+jobs.job_workers.workers = int(os.environ.get("JOBS_WORKERS", "1"))
+JOBS_TTL = float(os.environ.get("JOBS_TTL", str(7 * 24 * 3600)))
+jobs.job_workers.max_age = JOBS_TTL
+jobs.job_workers.purge_interval = float(os.environ.get("JOBS_PURGE_INTERVAL", "3600"))
+
+@asynccontextmanager
+async def lifespan(app):
+    for route_class in load_shedding_classes:
+        route_class.start()
+    runtime_monitor.start()
+    jobs.job_workers.start()
+    yield
+    jobs.job_workers.stop()
+    await runtime_monitor.stop()
+    shutdown_tracing()
+    if access_log_writer is not None:
+        # Joining the writer thread blocks, so it runs off the event loop
+        await run_in_threadpool(access_log_writer.close)
+
 app = FastAPI(
     title="Timestamp Utility API",
     version="1.0.0",
-    description="API for status and timestamp conversion"
+    description="API for status and timestamp conversion",
+    lifespan=lifespan,
 )
 
 # Allow CORS for all origins (optional, for testing)
@@ -23,24 +95,93 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses larger than COMPRESSION_MIN_SIZE bytes (gzip or brotli)
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+timezone.precompressed.minimum_size = COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# Limit in-flight work per route class and shed with 503 + Retry-After when
+# the estimated queueing delay exceeds the class budget. Cheap point lookups
+# and job polling get their own larger pool so bulk/list endpoints cannot
+# starve them. Uploads and downloads, whose duration depends on the client's
+# bandwidth, get a separate pool, and the status/docs routes are never
+# limited. The semaphores are created in the lifespan.
+LOOKUP_ROUTES = {"/tz_region", "/tz_region_nearest", "/cities_nearest", "/jobs/{job_id}"}
+TRANSFER_ROUTES = {"/dataset_export", "/jobs", "/jobs/{job_id}/results"}
+load_shedding_classes = [
+    RouteClass(
+        "lookup",
+        limit=int(os.environ.get("LOOKUP_CONCURRENCY", "32")),
+        budget_ms=float(os.environ.get("LOOKUP_BUDGET_MS", "1000")),
+    ),
+    RouteClass(
+        "transfer",
+        limit=int(os.environ.get("TRANSFER_CONCURRENCY", "8")),
+        budget_ms=float(os.environ.get("TRANSFER_BUDGET_MS", "2000")),
+    ),
+    RouteClass(
+        "bulk",
+        limit=int(os.environ.get("BULK_CONCURRENCY", "4")),
+        budget_ms=float(os.environ.get("BULK_BUDGET_MS", "500")),
+    ),
+]
+app.add_middleware(
+    LoadSheddingMiddleware,
+    classes=load_shedding_classes,
+    route_classes={
+        **{path: "lookup" for path in LOOKUP_ROUTES},
+        **{path: "transfer" for path in TRANSFER_ROUTES},
+    },
+    default_class="bulk",
+    exempt={"/", "/status", "/docs", "/redoc", "/openapi.json"},
+)
+if access_log_writer is not None:
+    app.add_middleware(
+        AccessLogMiddleware,
+        writer=access_log_writer,
+        sample_rate=float(os.environ.get("ACCESS_LOG_SAMPLE_RATE", "1.0")),
+        max_body_bytes=int(os.environ.get("ACCESS_LOG_MAX_BODY_BYTES", str(64 * 1024))),
+    )
+app.add_middleware(FirstResponseMiddleware)
+# Outermost, so the request span covers every other middleware
+app.add_middleware(TracingMiddleware)
+
+# Optional shared result cache across instances, e.g. redis://host:6379/0 or
+# file:///var/cache/timestamp-api
+timezone.result_cache.shared = make_shared_backend(
+    os.environ.get("CACHE_URL"),
+    ttl=int(os.environ.get("CACHE_TTL", "86400")),
+)
+
 API_KEY = os.environ.get("API_KEY")
 def require_api_key(x_api_key: str = Header(..., alias="X-API-KEY")):
     """
     Dependency to require API_KEY in the X-API-KEY header.
     """
-    if x_api_key != API_KEY:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid or missing API Key."
-        )
+    with span("require_api_key"):
+        if x_api_key != API_KEY:
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid or missing API Key."
+            )
 
 # Include routers
 @app.get("/")
 def root():
     return {"message": "Timestamp API is running!"}
 
-app.include_router(status.router)
-app.include_router(
-    timezone.router,
-    dependencies=[Depends(require_api_key)]
-)
+with startup_phase("include_routers"):
+    app.include_router(status.router)
+    app.include_router(stream.router)
+    app.include_router(
+        timezone.router,
+        dependencies=[Depends(require_api_key)]
+    )
+    app.include_router(
+        jobs.router,
+        dependencies=[Depends(require_api_key)]
+    )
+    app.include_router(
+        export.router,
+        dependencies=[Depends(require_api_key)]
+    )
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from controllers import timezone_controller
+
+# Plain router: export responses carry their own ETag and must never be
+# shared between requests by the negotiated routes' coalescing
+router = APIRouter()
+
+FILE_EXTENSIONS = {"arrow": "arrows", "parquet": "parquet"}
+
+def etag_matches(if_none_match, etag):
+    """
+    Check an If-None-Match header value against an entity tag (weak
+    comparison, `*` matches anything).
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+@router.get("/dataset_export")
+def dataset_export(request: Request, table: str = "cities", format: str = "arrow"):
+    # Validate first, so a conditional request for an unknown table or
+    # format gets a 400 rather than a 304 (e.g. with If-None-Match: *)
+    try:
+        timezone_controller.validate_export(table, format)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    version = timezone_controller.dataset_version()
+    etag = f'"{version}-{table}-{format}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Dataset-Version": version}
+    # Clients that already hold this dataset version skip the download
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    try:
+        export = timezone_controller.dataset_export(table, format)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=501, detail=str(exc)) from exc
+    filename = f"{table}-{version}.{FILE_EXTENSIONS[format]}"
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return Response(content=export["body"], media_type=export["media_type"], headers=headers)
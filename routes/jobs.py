@@ -0,0 +1,79 @@
+import os
+import tempfile
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from controllers import jobs_controller
+from utils.jobs import JobWorkerPool
+from utils.responses import NegotiatedResponse, NegotiatedRoute, read_body
+
+router = APIRouter(
+    route_class=NegotiatedRoute,
+    default_response_class=NegotiatedResponse,
+)
+RESULT_MEDIA_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+
+# Background workers processing job chunks, started from the app lifespan
+# in main.py
+job_workers = JobWorkerPool(jobs_controller.job_store, jobs_controller.process_chunk)
+
+async def _save_upload(request: Request):
+    """
+    Stream the request body into a temporary file next to the job store.
+    """
+    directory = jobs_controller.job_store.path.parent
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".upload")
+    with os.fdopen(fd, "wb") as f:
+        async for chunk in request.stream():
+            f.write(chunk)
+    return path
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: Request, latitude_column: str = "latitude", longitude_column: str = "longitude"):
+    content_type = (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    file_format = jobs_controller.UPLOAD_FORMATS.get(content_type)
+    try:
+        if file_format is None:
+            body = await read_body(request)
+            points = body.get("points") if isinstance(body, dict) else body
+            job = await run_in_threadpool(
+                jobs_controller.submit_rows, points, latitude_column, longitude_column
+            )
+        else:
+            path = await _save_upload(request)
+            try:
+                job = await run_in_threadpool(
+                    jobs_controller.submit_file, path, file_format, latitude_column, longitude_column
+                )
+            finally:
+                os.remove(path)
+    except (TypeError, ValueError, RuntimeError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    job_workers.notify()
+    return job
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    try:
+        return jobs_controller.get_job(job_id)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0]) from exc
+
+@router.get("/jobs/{job_id}/results")
+def job_results(job_id: str, format: str = "jsonl"):
+    try:
+        lines = jobs_controller.job_results(job_id, format)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0]) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return StreamingResponse(
+        lines,
+        media_type=RESULT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.{format}"'},
+    )
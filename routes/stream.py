@@ -0,0 +1,145 @@
+import asyncio
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+
+from controllers import timezone_controller
+from utils.responses import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, decode, encode
+
+router = APIRouter()
+
+# Points waiting to be resolved per connection. When the queue is full the
+# receiver stops reading from the socket, pushing backpressure to the client.
+QUEUE_SIZE = 1024
+# Maximum number of points resolved together in one threadpool call.
+BATCH_SIZE = 256
+
+# Seconds a client without an X-API-KEY header has to send its
+# {"api_key": ...} message
+AUTH_TIMEOUT = 10.0
+
+_DONE = object()
+
+def resolve_points(points):
+    """
+    Resolve a micro-batch of (id, latitude, longitude) messages to their
+    nearest city, valid points in one batched index pass. Invalid points
+    get an error reply instead of ending the stream.
+    """
+    replies = []
+    valid = []
+    for point in points:
+        if not isinstance(point, dict):
+            replies.append({"id": None, "error": "Point must be an object."})
+            continue
+        latitude, longitude = point.get("latitude"), point.get("longitude")
+        try:
+            timezone_controller.validate_lat_lon(latitude, longitude)
+        except (TypeError, ValueError) as exc:
+            replies.append({"id": point.get("id"), "error": str(exc)})
+            continue
+        replies.append({"id": point.get("id")})
+        valid.append((len(replies) - 1, (latitude, longitude)))
+    results = timezone_controller.city_nearest_many([coordinates for _, coordinates in valid])
+    for (position, _), result in zip(valid, results):
+        replies[position].update(result)
+    return replies
+
+async def _receive_points(websocket: WebSocket, queue: asyncio.Queue):
+    """
+    Read frames (a point or a list of points, as JSON text or MessagePack
+    binary) and enqueue them together with the encoding to reply in.
+    """
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                media_type = MSGPACK_MEDIA_TYPE
+                payload = message["bytes"]
+            else:
+                media_type = JSON_MEDIA_TYPE
+                payload = message.get("text") or ""
+            try:
+                points = decode(payload, media_type)
+            except Exception:
+                points = [None]
+            for point in points if isinstance(points, list) else [points]:
+                await queue.put((media_type, point))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await queue.put(_DONE)
+
+async def _resolve_and_reply(websocket: WebSocket, queue: asyncio.Queue):
+    """
+    Drain the queue in micro-batches and send one reply frame per point.
+    """
+    done = False
+    while not done:
+        batch = [await queue.get()]
+        while len(batch) < BATCH_SIZE and not queue.empty():
+            batch.append(queue.get_nowait())
+        if batch[-1] is _DONE:
+            batch.pop()
+            done = True
+        if not batch:
+            continue
+        replies = await run_in_threadpool(resolve_points, [point for _, point in batch])
+        for (media_type, _), reply in zip(batch, replies):
+            if media_type == JSON_MEDIA_TYPE:
+                await websocket.send_text(encode(reply, media_type).decode("utf-8"))
+            else:
+                await websocket.send_bytes(encode(reply, media_type))
+
+async def _authenticate(websocket: WebSocket, api_key):
+    """
+    Accept the connection if it carries the API key: in the X-API-KEY header
+    or, for clients that cannot set headers (browsers), in a first
+    {"api_key": ...} message (JSON text or MessagePack binary). The key is
+    never read from the URL, which ends up in proxy and access logs.
+
+    Returns:
+        bool: Whether the client is authenticated; the socket is closed
+            with code 1008 otherwise.
+    """
+    header = websocket.headers.get("x-api-key")
+    if header is not None:
+        if not header or header != api_key:
+            await websocket.close(code=1008, reason="Invalid or missing API Key.")
+            return False
+        await websocket.accept()
+        return True
+    await websocket.accept()
+    try:
+        message = await asyncio.wait_for(websocket.receive(), AUTH_TIMEOUT)
+    except asyncio.TimeoutError:
+        message = {}
+    if message.get("type") == "websocket.disconnect":
+        return False
+    try:
+        if message.get("bytes") is not None:
+            hello = decode(message["bytes"], MSGPACK_MEDIA_TYPE)
+        else:
+            hello = decode(message.get("text") or "", JSON_MEDIA_TYPE)
+    except Exception:
+        hello = None
+    if not isinstance(hello, dict) or not hello.get("api_key") or hello["api_key"] != api_key:
+        await websocket.close(code=1008, reason="Invalid or missing API Key.")
+        return False
+    return True
+
+@router.websocket("/ws/cities_nearest")
+async def cities_nearest_stream(websocket: WebSocket):
+    from main import API_KEY  # Import here to avoid circular import
+    if not await _authenticate(websocket, API_KEY):
+        return
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    receiver = asyncio.create_task(_receive_points(websocket, queue))
+    try:
+        await _resolve_and_reply(websocket, queue)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
@@ -1,40 +1,148 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from controllers import timezone_controller
+from utils.cache import TieredCache
+from utils.responses import (
+    DATASET_STATIC,
+    JSON_MEDIA_TYPE,
+    NegotiatedResponse,
+    NegotiatedRoute,
+    encode,
+    precompressed,
+    read_body,
+)
 
-router = APIRouter()
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+router = APIRouter(
+    route_class=NegotiatedRoute,
+    default_response_class=NegotiatedResponse,
+)
+precompressed.version = timezone_controller.dataset_version
+# L1 in-process cache of controller results, with an optional shared tier
+# configured in main.py. Only the DATASET_STATIC lists read the shared tier
+# (call_shared): for the other routes a round trip costs more than computing.
+result_cache = TieredCache(version=timezone_controller.dataset_version)
 
 @router.get("/tz_region")
 def tz_region(latitude: float, longitude: float):
-    return timezone_controller.tz_region(latitude, longitude)
+    return result_cache.call(timezone_controller.tz_region, latitude, longitude)
 
-@router.get("/tz_regions")
+@router.get("/tz_regions", openapi_extra=DATASET_STATIC)
 def tz_regions():
-    return timezone_controller.tz_regions()
+    return result_cache.call_shared(timezone_controller.tz_regions)
 
 @router.get("/tz_region_nearest")
 def tz_region_nearest(latitude: float, longitude: float):
-    return timezone_controller.tz_region_nearest(latitude, longitude)
+    return result_cache.call(timezone_controller.tz_region_nearest, latitude, longitude)
 
-@router.get("/tz_region_cities")
+@router.get("/tz_region_cities", openapi_extra=DATASET_STATIC)
 def tz_region_cities(region: str):
-    return timezone_controller.tz_region_cities(region)
+    return result_cache.call_shared(timezone_controller.tz_region_cities, region)
 
 @router.get("/cities_nearest")
 def cities_nearest(latitude: float, longitude: float):
-    return timezone_controller.cities_nearest(latitude, longitude)
+    return result_cache.call(timezone_controller.cities_nearest, latitude, longitude)
+
+@router.post("/cities_nearest_batch")
+async def cities_nearest_batch(request: Request):
+    points = await read_body(request)
+    try:
+        return await run_in_threadpool(timezone_controller.cities_nearest_batch, points)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 @router.get("/cities_in_radius")
 def cities_in_radius(latitude: float, longitude: float, radius_km: float):
-    return timezone_controller.cities_in_radius(latitude, longitude, radius_km)
+    return result_cache.call(timezone_controller.cities_in_radius, latitude, longitude, radius_km)
+
+@router.get("/cities_in_bbox")
+def cities_in_bbox(min_latitude: float, max_latitude: float, min_longitude: float, max_longitude: float):
+    bbox = dict(zip(
+        timezone_controller.BBOX_KEYS,
+        (min_latitude, max_latitude, min_longitude, max_longitude),
+    ))
+    try:
+        return result_cache.call(timezone_controller.cities_in_bbox, bbox)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+@router.post("/cities_in_polygon")
+async def cities_in_polygon(request: Request):
+    geometry = await read_body(request)
+    try:
+        return await run_in_threadpool(timezone_controller.cities_in_polygon, geometry)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-@router.get("/cities_by_utc_offset")
+@router.post("/distance_matrix")
+async def distance_matrix(request: Request):
+    body = await read_body(request)
+    stream = NDJSON_MEDIA_TYPE in (request.headers.get("accept") or "")
+    try:
+        if not isinstance(body, dict):
+            raise TypeError("Body must be an object with origins and destinations.")
+        origins, destinations = body.get("origins"), body.get("destinations")
+        if not stream:
+            return await run_in_threadpool(timezone_controller.distance_matrix, origins, destinations)
+        lines = await run_in_threadpool(timezone_controller.distance_matrix_stream, origins, destinations)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    # Rows are computed chunk by chunk (in the threadpool) as they are sent
+    return StreamingResponse(
+        (encode(line, JSON_MEDIA_TYPE) + b"\n" for line in lines),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+@router.get("/route_timezones")
+def route_timezones(
+    from_latitude: float,
+    from_longitude: float,
+    to_latitude: float,
+    to_longitude: float,
+):
+    try:
+        return result_cache.call(
+            timezone_controller.route_timezones,
+            from_latitude, from_longitude, to_latitude, to_longitude,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+@router.get("/cities_by_utc_offset", openapi_extra=DATASET_STATIC)
 def cities_by_utc_offset(offset: float):
-    return timezone_controller.cities_by_utc_offset(offset)
+    return result_cache.call_shared(timezone_controller.cities_by_utc_offset, offset)
 
-@router.get("/cities_with_dst")
+@router.get("/cities_with_dst", openapi_extra=DATASET_STATIC)
 def cities_with_dst(dst: bool = True, region: str = None):
-    return timezone_controller.cities_with_dst(dst, region)
+    return result_cache.call_shared(timezone_controller.cities_with_dst, dst, region)
+
+@router.get("/cities_query")
+def cities_query(
+    offset: float = None,
+    dst: bool = None,
+    region: str = None,
+    min_latitude: float = None,
+    max_latitude: float = None,
+    min_longitude: float = None,
+    max_longitude: float = None,
+    latitude: float = None,
+    longitude: float = None,
+    radius_km: float = None,
+):
+    bounds = (min_latitude, max_latitude, min_longitude, max_longitude)
+    bbox = None
+    if any(bound is not None for bound in bounds):
+        bbox = dict(zip(timezone_controller.BBOX_KEYS, bounds))
+    try:
+        return result_cache.call(
+            timezone_controller.cities_query,
+            offset, dst, region, bbox, latitude, longitude, radius_km,
+        )
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-@router.get("/city_extremes")
+@router.get("/city_extremes", openapi_extra=DATASET_STATIC)
 def city_extremes(offset: float):
-    return timezone_controller.city_extremes(offset)
+    return result_cache.call_shared(timezone_controller.city_extremes, offset)
@@ -0,0 +1,197 @@
+"""
+Offline bulk annotation of coordinate files with their nearest timezone city.
+
+Streams CSV, JSONL or Parquet files in chunks and resolves every row through
+the same controller lookup used by the API, fanning the chunks out across a
+process pool. Output rows keep the input order.
+
+Usage:
+    python -m scripts.annotate points.csv annotated.csv --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from controllers import timezone_controller
+from controllers.timezone_controller import ANNOTATION_FIELDS, annotate_rows
+from utils.indexes import get_city_index
+from utils.tabular import FORMATS, import_parquet, read_chunks
+
+ANNOTATION_TYPES = {
+    "nearest_city": "string",
+    "distance_km": "float64",
+    "utc_offset": "float64",
+    "dst": "bool_",
+    "region": "string",
+}
+
+def detect_format(path):
+    """
+    Guess the file format from its extension.
+    """
+    suffix = Path(path).suffix.lower().lstrip(".")
+    if suffix in ("json", "ndjson"):
+        return "jsonl"
+    if suffix in FORMATS:
+        return suffix
+    raise ValueError(f"Cannot detect file format of {path}, use --input-format/--output-format.")
+
+def csv_fieldnames(rows):
+    """
+    CSV header for annotated rows: every input column seen in `rows`, in
+    order of first appearance, followed by the annotation columns.
+    """
+    columns = {}
+    for row in rows:
+        columns.update(dict.fromkeys(k for k in row if k not in ANNOTATION_FIELDS))
+    return [*columns, *ANNOTATION_FIELDS]
+
+class ChunkWriter:
+    """
+    Write annotated chunks to CSV, JSONL or Parquet.
+
+    The CSV header is built from the first chunk. Rows of later chunks
+    missing one of its columns get an empty value, and columns that first
+    appear after it (e.g. JSONL rows with varying keys) are left out
+    instead of failing the run.
+    """
+
+    def __init__(self, path, file_format):
+        self.path = path
+        self.file_format = file_format
+        self._file = None
+        self._writer = None
+
+    def write(self, rows):
+        if not rows:
+            return
+        if self.file_format == "parquet":
+            pyarrow, parquet = import_parquet()
+            table = pyarrow.Table.from_pylist(rows)
+            if self._writer is None:
+                # Pin the annotation column types: a chunk may hold only
+                # integer offsets or only nulls, which would infer the wrong type
+                schema = table.schema
+                for name, type_name in ANNOTATION_TYPES.items():
+                    schema = schema.set(
+                        schema.get_field_index(name),
+                        pyarrow.field(name, getattr(pyarrow, type_name)()),
+                    )
+                self._writer = parquet.ParquetWriter(self.path, schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+            return
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8", newline="")
+            if self.file_format == "csv":
+                self._writer = csv.DictWriter(
+                    self._file, fieldnames=csv_fieldnames(rows), restval="", extrasaction="ignore"
+                )
+                self._writer.writeheader()
+        if self.file_format == "csv":
+            self._writer.writerows(rows)
+        else:
+            self._file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+    def close(self):
+        if self.file_format == "parquet" and self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+def _warm_up():
+    """
+    Build the lookup index once per process. With the fork start method the
+    workers inherit the parent's dataset and index read-only, so this is a
+    no-op there.
+    """
+    get_city_index(timezone_controller.ALL_TIMEZONES)
+
+def annotate_file(
+    input_path,
+    output_path,
+    input_format=None,
+    output_format=None,
+    latitude_column="latitude",
+    longitude_column="longitude",
+    workers=None,
+    chunk_size=10000,
+):
+    """
+    Annotate a whole file, streaming it chunk by chunk.
+
+    At most two chunks per worker are in flight at a time, so memory stays
+    bounded regardless of the file size, and chunks are written back in the
+    order they were read.
+
+    Returns:
+        tuple: (rows written, rows skipped because they are not objects).
+    """
+    input_format = input_format or detect_format(input_path)
+    output_format = output_format or detect_format(output_path)
+    workers = workers or os.cpu_count() or 1
+    chunks = read_chunks(input_path, input_format, chunk_size)
+    writer = ChunkWriter(output_path, output_format)
+    total = read = 0
+    _warm_up()
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                read += len(chunk)
+                annotated = annotate_rows(chunk, latitude_column, longitude_column)
+                writer.write(annotated)
+                total += len(annotated)
+            return total, read - total
+        with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up) as executor:
+            pending = deque()
+            for chunk in chunks:
+                read += len(chunk)
+                pending.append(executor.submit(
+                    annotate_rows, chunk, latitude_column, longitude_column
+                ))
+                if len(pending) >= workers * 2:
+                    annotated = pending.popleft().result()
+                    writer.write(annotated)
+                    total += len(annotated)
+            while pending:
+                annotated = pending.popleft().result()
+                writer.write(annotated)
+                total += len(annotated)
+        return total, read - total
+    finally:
+        writer.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Annotate coordinate files with their nearest timezone city."
+    )
+    parser.add_argument("input", help="Input CSV, JSONL or Parquet file.")
+    parser.add_argument("output", help="Output CSV, JSONL or Parquet file.")
+    parser.add_argument("--input-format", choices=FORMATS)
+    parser.add_argument("--output-format", choices=FORMATS)
+    parser.add_argument("--latitude-column", default="latitude")
+    parser.add_argument("--longitude-column", default="longitude")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: number of CPUs).")
+    parser.add_argument("--chunk-size", type=int, default=10000,
+                        help="Rows per chunk sent to a worker.")
+    args = parser.parse_args(argv)
+    total, skipped = annotate_file(
+        args.input,
+        args.output,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        latitude_column=args.latitude_column,
+        longitude_column=args.longitude_column,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+    print(f"Annotated {total} rows into {args.output}")
+    if skipped:
+        print(f"Skipped {skipped} rows that are not objects")
+
+if __name__ == "__main__":
+    main()
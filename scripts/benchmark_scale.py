@@ -0,0 +1,195 @@
+"""
+Benchmark every timezone endpoint's controller at increasing dataset sizes.
+
+For each size a GeoNames-format dump is generated (or sampled from a real
+one with --source), loaded through the streaming loader, indexed, and every
+controller function is timed on random queries. Memory is measured with
+tracemalloc for the load and the index build.
+
+Usage:
+    python -m scripts.benchmark_scale --sizes 1000 25000 150000
+    python -m scripts.benchmark_scale --source cities1000.txt --sizes 25000 150000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+import zoneinfo
+from pathlib import Path
+
+from controllers import timezone_controller
+from utils.geonames import load_cities_file
+from utils.indexes import get_city_index
+from utils.timezones import load_all_timezones
+
+def _zone_for(city, zones, rng):
+    # Bundled city names mostly match their IANA zone ("New_York")
+    candidate = f"{city['region'].title()}/{city['name']}"
+    if candidate in zones:
+        return candidate
+    prefix = city["region"].title() + "/"
+    matching = [zone for zone in zones if zone.startswith(prefix)]
+    return rng.choice(matching or ["Etc/UTC"])
+
+def generate_dump(path, count, seed=0, source=None):
+    """
+    Write `count` GeoNames-format rows: sampled from `source` when given,
+    otherwise clustered around the bundled cities (one zone per cluster).
+    """
+    rng = random.Random(seed)
+    if source is not None:
+        with open(source, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        with open(path, "w", encoding="utf-8") as out:
+            out.writelines(rng.sample(lines, min(count, len(lines))))
+        return
+    zones = sorted(zoneinfo.available_timezones())
+    centers = [(city, _zone_for(city, zones, rng)) for city in load_all_timezones()]
+    with open(path, "w", encoding="utf-8") as out:
+        for i in range(count):
+            city, zone = rng.choice(centers)
+            latitude = min(max(city["latitude"] + rng.gauss(0, 1.5), -90.0), 90.0)
+            longitude = (city["longitude"] + rng.gauss(0, 1.5) + 180) % 360 - 180
+            fields = [""] * 19
+            fields[0] = str(i)
+            fields[1] = f"{city['name']}-{i}"
+            fields[4] = f"{latitude:.5f}"
+            fields[5] = f"{longitude:.5f}"
+            fields[17] = zone
+            out.write("\t".join(fields) + "\n")
+
+def endpoint_calls(rng, cities):
+    """
+    Controller call per endpoint, each drawing fresh random arguments.
+    """
+    def point():
+        return rng.uniform(-60, 70), rng.uniform(-180, 180)
+
+    def city_name():
+        return rng.choice(cities)["name"]
+
+    def offset():
+        return rng.choice(cities)["utc_offset"]
+
+    def corner():
+        return rng.uniform(-60, 60), rng.uniform(-180, 170)
+
+    def bbox():
+        lat, lon = corner()
+        return {"min_latitude": lat, "max_latitude": lat + 5, "min_longitude": lon, "max_longitude": lon + 8}
+
+    def polygon():
+        lat, lon = corner()
+        ring = [[lon, lat], [lon + 8, lat], [lon + 4, lat + 5], [lon, lat]]
+        return {"type": "Polygon", "coordinates": [ring]}
+
+    c = timezone_controller
+    return {
+        "tz_region": lambda: c.tz_region(*point()),
+        "tz_regions": lambda: c.tz_regions(),
+        "tz_region_nearest": lambda: c.tz_region_nearest(*point()),
+        "tz_region_cities": lambda: c.tz_region_cities(rng.choice(list(c.TZ_LOCATIONS))),
+        "cities_nearest": lambda: c.cities_nearest(*point()),
+        "cities_nearest_batch": lambda: c.cities_nearest_batch(
+            [dict(zip(("latitude", "longitude"), point())) for _ in range(100)]
+        ),
+        "cities_in_radius": lambda: c.cities_in_radius(*point(), 250),
+        "cities_by_utc_offset": lambda: c.cities_by_utc_offset(offset()),
+        "cities_with_dst": lambda: c.cities_with_dst(rng.random() < 0.5),
+        "city_extremes": lambda: c.city_extremes(offset()),
+        "cities_query": lambda: c.cities_query(
+            offset=offset(), dst=True, latitude=point()[0], longitude=point()[1], radius_km=1000
+        ),
+        "cities_in_bbox": lambda: c.cities_in_bbox(bbox()),
+        "cities_in_polygon": lambda: c.cities_in_polygon(polygon()),
+        "distance_matrix": lambda: c.distance_matrix(
+            [city_name() for _ in range(50)], [city_name() for _ in range(50)]
+        ),
+        "route_timezones": lambda: c.route_timezones(*point(), *point()),
+    }
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def benchmark_size(count, repeat, seed=0, source=None):
+    """
+    Load, index and time every endpoint for one dataset size.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "cities.txt"
+        generate_dump(path, count, seed=seed, source=source)
+
+        started = time.perf_counter()
+        cities = load_cities_file(path)
+        load_s = time.perf_counter() - started
+        started = time.perf_counter()
+        get_city_index(cities)
+        index_s = time.perf_counter() - started
+
+        # Separate pass for memory, tracemalloc slows allocations down a lot
+        tracemalloc.start()
+        measured = load_cities_file(path)
+        dataset_mb, load_peak_mb = (value / 2**20 for value in tracemalloc.get_traced_memory())
+        get_city_index(measured)
+        total_mb = tracemalloc.get_traced_memory()[0] / 2**20
+        tracemalloc.stop()
+        del measured
+
+    timezone_controller.ALL_TIMEZONES = cities
+    get_city_index(cities)
+    rng = random.Random(seed)
+    endpoints = {}
+    for name, call in endpoint_calls(rng, cities).items():
+        call()  # warm up caches such as the dataset version
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        endpoints[name] = {
+            "p50_ms": round(percentile(timings, 0.50), 3),
+            "p95_ms": round(percentile(timings, 0.95), 3),
+        }
+    return {
+        "cities": len(cities),
+        "load_s": round(load_s, 2),
+        "load_peak_mb": round(load_peak_mb, 1),
+        "index_s": round(index_s, 2),
+        "dataset_mb": round(dataset_mb, 1),
+        "index_mb": round(total_mb - dataset_mb, 1),
+        "endpoints": endpoints,
+    }
+
+def format_report(results):
+    lines = [
+        "| | " + " | ".join(f"{r['cities']} cities" for r in results) + " |",
+        "|---|" + "---|" * len(results),
+    ]
+    for key, label in (
+        ("load_s", "load (s)"), ("load_peak_mb", "load peak (MB)"), ("dataset_mb", "dataset (MB)"),
+        ("index_s", "index build (s)"), ("index_mb", "index (MB)"),
+    ):
+        lines.append(f"| {label} | " + " | ".join(str(r[key]) for r in results) + " |")
+    for name in results[0]["endpoints"]:
+        lines.append(f"| `{name}` p50 / p95 (ms) | " + " | ".join(
+            f"{r['endpoints'][name]['p50_ms']} / {r['endpoints'][name]['p95_ms']}" for r in results
+        ) + " |")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark endpoints at several dataset sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 25000, 150000])
+    parser.add_argument("--repeat", type=int, default=30, help="Timed calls per endpoint.")
+    parser.add_argument("--source", help="GeoNames dump to sample rows from.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args(argv)
+
+    results = [benchmark_size(size, args.repeat, seed=args.seed, source=args.source) for size in args.sizes]
+    print(json.dumps(results, indent=2) if args.json else format_report(results))
+
+if __name__ == "__main__":
+    main()
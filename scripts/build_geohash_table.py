@@ -0,0 +1,49 @@
+"""
+Precompute the geohash nearest-city lookup table for the bundled dataset.
+
+Usage:
+    python -m scripts.build_geohash_table --precision 3 --count 4
+"""
+import argparse
+import time
+
+from utils.geohash import (
+    DEFAULT_TABLE_PATH,
+    MAX_CANDIDATES,
+    MAX_PRECISION,
+    MIN_PRECISION,
+    build_table,
+    write_table,
+)
+from utils.indexes import CityIndex
+from utils.timezones import dataset_version, load_all_timezones
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the geohash nearest-city table.")
+    parser.add_argument("--precision", type=int, default=3,
+                        choices=range(MIN_PRECISION, MAX_PRECISION + 1),
+                        help="Geohash characters per cell (32 ** precision cells).")
+    parser.add_argument("--count", type=int, default=4,
+                        help="Nearest cities each cell must answer exactly.")
+    parser.add_argument("--max-candidates", type=int, default=MAX_CANDIDATES,
+                        help="Cells with more candidates fall back to the full search.")
+    parser.add_argument("--output", default=str(DEFAULT_TABLE_PATH))
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    timezones = load_all_timezones()
+    data = build_table(
+        CityIndex(timezones),
+        dataset_version(timezones),
+        precision=args.precision,
+        count=args.count,
+        max_candidates=args.max_candidates,
+    )
+    write_table(args.output, data)
+    print(
+        f"Wrote {args.output} ({len(data)} bytes, {32 ** args.precision} cells) "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Replay a captured access log (see ACCESS_LOG_PATH) against the API.
+
+Requests run in-process against the ASGI app or against a running server,
+with a bounded pool of workers and an optional speed-up factor that preserves
+the original inter-arrival times. Logged request bodies are replayed with
+their Content-Type; requests whose body was too large to log are skipped and
+counted. Reports throughput, latency percentiles per route template and error
+rates.
+
+Usage:
+    python -m scripts.replay requests.jsonl --app main:app --concurrency 16
+    python -m scripts.replay requests.jsonl --url http://127.0.0.1:8000 --speedup 10
+"""
+import argparse
+import asyncio
+import base64
+import importlib
+import json
+import math
+import os
+import time
+from contextlib import nullcontext
+
+import httpx
+from starlette.routing import compile_path
+
+def read_log(path, limit=None):
+    """
+    Yield replayable records (method, path, params, ts, body, content_type)
+    from a JSONL log, skipping blank or malformed lines. The log is read
+    lazily, so it is never held in memory as a whole.
+
+    `body` is the logged request body as bytes, or None if there was none.
+    Records whose body was not logged (too large) keep `body_omitted` so the
+    replay can skip and count them instead of sending them without a body.
+    """
+    count = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(record, dict) or "path" not in record:
+                continue
+            parsed = {
+                "method": record.get("method", "GET"),
+                "path": record["path"],
+                "params": record.get("params") or {},
+                "ts": record.get("ts"),
+                "body": _body(record),
+                "content_type": record.get("content_type"),
+            }
+            if record.get("body_omitted"):
+                parsed["body_omitted"] = True
+            yield parsed
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+def _body(record):
+    if record.get("body") is not None:
+        return record["body"].encode("utf-8")
+    if record.get("body_b64") is not None:
+        return base64.b64decode(record["body_b64"])
+    return None
+
+def route_templates(app):
+    """
+    (compiled path regex, template) pairs of the app's routes, e.g.
+    "/jobs/{job_id}", used to group replayed paths.
+
+    Routes of included routers come from the OpenAPI schema, which lists
+    them with their prefixes; routes outside it (e.g. /docs) from the app's
+    own route list.
+    """
+    paths = [
+        route.path
+        for route in getattr(app, "routes", [])
+        if getattr(route, "path_regex", None) is not None
+    ]
+    if hasattr(app, "openapi"):
+        paths.extend(app.openapi().get("paths", {}))
+    return [(compile_path(path)[0], path) for path in dict.fromkeys(paths)]
+
+def route_of(path, templates):
+    """
+    Route template matching `path`. Without templates the raw path is used;
+    paths matching no route are grouped as "(unmatched)".
+    """
+    if not templates:
+        return path
+    for regex, template in templates:
+        if regex.match(path):
+            return template
+    return "(unmatched)"
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def _query_params(params):
+    # Logged floats like 1.0 are sent back as "1.0", which FastAPI parses the
+    # same way; redacted values are dropped
+    return {k: v for k, v in params.items() if v != "***"}
+
+def summarize(results, duration, skipped=0):
+    """
+    Aggregate (route, status, latency_ms) results into a report. `skipped`
+    counts records that could not be replayed.
+    """
+    routes = {}
+    for route, status, latency_ms in results:
+        stats = routes.setdefault(route, {"latencies": [], "errors": 0})
+        stats["latencies"].append(latency_ms)
+        if status is None or status >= 400:
+            stats["errors"] += 1
+    total_errors = sum(s["errors"] for s in routes.values())
+    return {
+        "requests": len(results),
+        "skipped": skipped,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(results) / duration, 2) if duration > 0 else None,
+        "error_rate": round(total_errors / len(results), 4) if results else 0.0,
+        "routes": {
+            route: {
+                "count": len(stats["latencies"]),
+                "p50_ms": round(percentile(stats["latencies"], 0.50), 3),
+                "p95_ms": round(percentile(stats["latencies"], 0.95), 3),
+                "p99_ms": round(percentile(stats["latencies"], 0.99), 3),
+                "max_ms": round(max(stats["latencies"]), 3),
+                "error_rate": round(stats["errors"] / len(stats["latencies"]), 4),
+            }
+            for route, stats in sorted(routes.items())
+        },
+    }
+
+async def replay(
+    records, app=None, base_url=None, concurrency=8, speedup=0.0, headers=None, templates=None
+):
+    """
+    Replay records and return the summary report.
+
+    A producer pulls records (any iterable, e.g. read_log) in log order into
+    a queue bounded by `concurrency`, and `concurrency` workers send them, so
+    the log is never held in memory; only one latency sample per request is
+    kept for the report. Original timing is measured from the first record
+    with a timestamp.
+
+    An in-process app runs inside its lifespan, so startup work (job
+    workers, load shedding semaphores, the runtime monitor) happens as it
+    does under a server.
+
+    Args:
+        records (iterable): Records as yielded by read_log.
+        app: ASGI app to call in-process (takes precedence over base_url).
+        base_url (str): URL of a running server.
+        concurrency (int): Number of workers, i.e. maximum requests in flight.
+        speedup (float): Replay the original timing this many times faster;
+            0 sends requests as fast as the workers allow.
+        templates (list): Route templates to group results by (see
+            route_templates). Defaults to those of `app`.
+    """
+    if app is not None:
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://replay"
+        if templates is None:
+            templates = route_templates(app)
+    else:
+        transport = None
+    results = []
+    skipped = 0
+    first_ts = None
+    queue = asyncio.Queue(maxsize=concurrency)
+    lifespan = getattr(getattr(app, "router", None), "lifespan_context", None)
+
+    async with (lifespan(app) if lifespan is not None else nullcontext()), httpx.AsyncClient(
+        transport=transport, base_url=base_url, headers=headers or {}, timeout=60
+    ) as client:
+        started = time.perf_counter()
+
+        async def send(record):
+            if speedup > 0 and first_ts is not None and record["ts"] is not None:
+                delay = (record["ts"] - first_ts) / speedup - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            request_headers = (
+                {"content-type": record["content_type"]} if record.get("content_type") else None
+            )
+            request_started = time.perf_counter()
+            try:
+                response = await client.request(
+                    record["method"],
+                    record["path"],
+                    params=_query_params(record["params"]),
+                    content=record.get("body"),
+                    headers=request_headers,
+                )
+                status = response.status_code
+            except httpx.HTTPError:
+                status = None
+            results.append((
+                route_of(record["path"], templates),
+                status,
+                (time.perf_counter() - request_started) * 1000,
+            ))
+
+        async def worker():
+            while True:
+                record = await queue.get()
+                if record is None:
+                    return
+                await send(record)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        try:
+            for record in records:
+                if record.get("body_omitted"):
+                    skipped += 1
+                    continue
+                if first_ts is None and record["ts"] is not None:
+                    first_ts = record["ts"]
+                await queue.put(record)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+        duration = time.perf_counter() - started
+    return summarize(results, duration, skipped)
+
+def load_app(target):
+    """
+    Import an ASGI app from a "module:attribute" string.
+    """
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute or "app")
+
+def format_report(report):
+    lines = [
+        f"{report['requests']} requests in {report['duration_s']}s "
+        f"({report['throughput_rps']} req/s), error rate {report['error_rate']:.2%}"
+        + (f", {report['skipped']} skipped (body not logged)" if report["skipped"] else ""),
+        f"{'route':<28}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'errors':>9}",
+    ]
+    for route, stats in report["routes"].items():
+        lines.append(
+            f"{route:<28}{stats['count']:>8}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+            f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}{stats['error_rate']:>9.2%}"
+        )
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a captured request log.")
+    parser.add_argument("log", help="JSONL access log, e.g. requests.jsonl")
+    parser.add_argument("--app", default="main:app",
+                        help="ASGI app to replay in-process; with --url, only its routes are "
+                             "used to group results.")
+    parser.add_argument("--url", help="Base URL of a running server (e.g. local uvicorn).")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--speedup", type=float, default=0.0,
+                        help="Replay original timing N times faster (0: as fast as possible).")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N records.")
+    parser.add_argument("--api-key", default=os.environ.get("API_KEY"))
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+
+    records = read_log(args.log, limit=args.limit)
+    headers = {"X-API-KEY": args.api_key} if args.api_key else {}
+    app = load_app(args.app)
+    report = asyncio.run(replay(
+        records,
+        app=None if args.url else app,
+        base_url=args.url,
+        concurrency=args.concurrency,
+        speedup=args.speedup,
+        headers=headers,
+        templates=route_templates(app),
+    ))
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+if __name__ == "__main__":
+    main()
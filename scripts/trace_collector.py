@@ -0,0 +1,120 @@
+"""
+Local stand-in for an OpenTelemetry collector.
+
+Accepts OTLP/HTTP protobuf trace exports on /v1/traces and keeps (or prints)
+the received spans, for tests and for checking tracing locally without a
+real collector.
+
+Usage:
+    python -m scripts.trace_collector --port 4318
+    TRACING_ENDPOINT=http://127.0.0.1:4318/v1/traces uvicorn main:app
+"""
+import argparse
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRACES_PATH = "/v1/traces"
+
+def _attribute_value(value):
+    kind = value.WhichOneof("value")
+    return getattr(value, kind) if kind in ("string_value", "bool_value", "int_value", "double_value") else str(value)
+
+def decode_spans(body):
+    """
+    Decode an OTLP ExportTraceServiceRequest into a list of span dicts.
+    """
+    from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+
+    request = ExportTraceServiceRequest()
+    request.ParseFromString(body)
+    spans = []
+    for resource_spans in request.resource_spans:
+        resource = {a.key: _attribute_value(a.value) for a in resource_spans.resource.attributes}
+        for scope_spans in resource_spans.scope_spans:
+            for span in scope_spans.spans:
+                spans.append({
+                    "name": span.name,
+                    "trace_id": span.trace_id.hex(),
+                    "span_id": span.span_id.hex(),
+                    "parent_span_id": span.parent_span_id.hex() or None,
+                    "duration_ms": round((span.end_time_unix_nano - span.start_time_unix_nano) / 1e6, 3),
+                    "attributes": {a.key: _attribute_value(a.value) for a in span.attributes},
+                    "service": resource.get("service.name"),
+                })
+    return spans
+
+class StandInCollector:
+    """
+    OTLP/HTTP trace receiver running in a background thread. Received spans
+    are appended to `spans`, and passed to `on_span` when given.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, on_span=None):
+        self.spans = []
+        self.on_span = on_span
+        self._lock = threading.Lock()
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                if self.path != TRACES_PATH:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                collector._receive(decode_spans(body))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-protobuf")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{TRACES_PATH}"
+
+    def _receive(self, spans):
+        with self._lock:
+            self.spans.extend(spans)
+        if self.on_span is not None:
+            for span in spans:
+                self.on_span(span)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print spans received over OTLP/HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    args = parser.parse_args(argv)
+    collector = StandInCollector(
+        args.host, args.port,
+        on_span=lambda span: print(json.dumps(span, ensure_ascii=False), flush=True),
+    )
+    print(f"Listening on {collector.endpoint}", flush=True)
+    try:
+        collector._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector._server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -42,6 +42,7 @@ def test_get_status_happy_and_edge_cases(
     assert result["name"] == expected_name, f"Failed: {description} (name)"
     assert result["version"] == mock_version, f"Failed: {description} (version)"
     assert result["uptime"] == expected_uptime, f"Failed: {description} (uptime)"
+    assert set(result["load_shedding"]) == {"lookup", "transfer", "bulk"}, f"Failed: {description} (load_shedding)"
 
 
 @pytest.mark.parametrize(
@@ -83,3 +84,18 @@ def test_get_status_error_cases(patch_app, patch_start_time, patch_time, error_t
     # Act & Assert
     with pytest.raises(error_type):
         status_controller.get_status()
+
+
+def test_get_status_includes_startup_and_runtime(monkeypatch):
+    # Arrange
+    class MockApp:
+        version = "1.0.0"
+
+    monkeypatch.setattr("main.app", MockApp)
+
+    # Act
+    result = status_controller.get_status()
+
+    # Assert
+    assert set(result["startup"]) == {"phases_ms", "first_response_ms"}
+    assert set(result["runtime"]) == {"running", "event_loop_lag_ms", "threadpool", "gc"}
@@ -295,3 +295,308 @@ def test_city_extremes_invalid(offset, error_type, error_msg, description):
     # Act & Assert
     with pytest.raises(error_type, match=error_msg):
         timezone_controller.city_extremes(offset)
+
+def test_cities_nearest_batch():
+    # Arrange
+    points = [
+        {"latitude": 51.5074, "longitude": -0.1278},
+        {"latitude": 35.6895, "longitude": 139.6917},
+    ]
+
+    # Act
+    result = timezone_controller.cities_nearest_batch(points)
+
+    # Assert
+    assert [r["tz_location"] for r in result["results"]] == ["London", "Tokyo"]
+    assert result["results"][0] == timezone_controller.cities_nearest(51.5074, -0.1278)
+
+@pytest.mark.parametrize(
+    "points, error_type, error_msg, description",
+    [
+        ({"latitude": 0, "longitude": 0}, TypeError, "Points must be a list of objects.", "not a list"),
+        ([[0, 0]], TypeError, "Points must be a list of objects.", "list of lists"),
+        ([{"latitude": 100, "longitude": 0}], ValueError, "Latitude must be between -90 and 90.", "latitude > 90"),
+        ([{"latitude": 0}], TypeError, "Latitude and longitude must be numeric.", "missing longitude"),
+        ([{"latitude": 0, "longitude": 0}] * 3, ValueError, "At most 2 points per batch.", "too many points"),
+    ],
+    ids=["not-a-list", "list-of-lists", "lat-over-90", "missing-longitude", "too-many"]
+)
+def test_cities_nearest_batch_invalid(monkeypatch, points, error_type, error_msg, description):
+    # Arrange
+    monkeypatch.setattr(timezone_controller, "MAX_BATCH_POINTS", 2)
+
+    # Act & Assert
+    with pytest.raises(error_type, match=error_msg):
+        timezone_controller.cities_nearest_batch(points)
+
+@pytest.mark.parametrize(
+    "latitude, longitude, expected_name, expected_region, description",
+    [
+        (51.5074, -0.1278, "London", "europe", "London nearest"),
+        (35.0, 140.0, "Tokyo", "asia", "Tokyo nearest"),
+    ],
+    ids=["london-nearest", "tokyo-nearest"]
+)
+def test_city_nearest(latitude, longitude, expected_name, expected_region, description):
+    # Act
+    result = timezone_controller.city_nearest(latitude, longitude)
+
+    # Assert
+    assert result["tz_location"] == expected_name, f"Failed: {description}"
+    assert result["region"] == expected_region, f"Failed: {description}"
+    assert isinstance(result["distance_km"], float)
+
+def test_city_nearest_many_matches_city_nearest():
+    # Arrange
+    points = [(51.5074, -0.1278), (35.6895, 139.6917), (-33.9249, 18.4241)]
+
+    # Act
+    results = timezone_controller.city_nearest_many(points)
+
+    # Assert
+    assert results == [timezone_controller.city_nearest(lat, lon) for lat, lon in points]
+    assert timezone_controller.city_nearest_many([]) == []
+
+def test_dataset_version_tracks_dataset(monkeypatch):
+    # Arrange
+    first = timezone_controller.dataset_version()
+    moved = [dict(tz) for tz in timezone_controller.ALL_TIMEZONES]
+    moved[0]["latitude"] += 1
+
+    # Act
+    same = timezone_controller.dataset_version()
+    monkeypatch.setattr(timezone_controller, "ALL_TIMEZONES", moved)
+    changed = timezone_controller.dataset_version()
+
+    # Assert
+    assert first == same
+    assert changed != first
+
+@pytest.mark.parametrize(
+    "filters, expected_names, expected_source, description",
+    [
+        ({"offset": 1, "dst": True}, ["Paris"], "offset", "offset and dst"),
+        ({"dst": True, "region": "Europe"}, ["London", "Paris"], "dst", "region is case insensitive"),
+        ({"dst": True, "latitude": 51.5074, "longitude": -0.1278, "radius_km": 500}, ["London", "Paris"], "radius", "radius sorted by distance"),
+        ({"bbox": {"min_latitude": 30, "max_latitude": 40, "min_longitude": 130, "max_longitude": -170}}, ["Tokyo"], "bbox", "antimeridian bbox"),
+        ({"offset": 2, "region": "asia"}, [], "offset", "no match"),
+    ],
+    ids=["offset-dst", "dst-region", "dst-radius", "bbox-wrap", "no-match"]
+)
+def test_cities_query(filters, expected_names, expected_source, description):
+    # Act
+    result = timezone_controller.cities_query(**filters)
+
+    # Assert
+    assert [c["name"] for c in result["cities"]] == expected_names, f"Failed: {description}"
+    assert result["plan"]["source"] == expected_source, f"Failed: {description}"
+    assert all(("distance_km" in c) == ("radius_km" in filters) for c in result["cities"])
+
+@pytest.mark.parametrize(
+    "filters, error_type, error_msg, description",
+    [
+        ({}, ValueError, "At least one filter is required.", "no filters"),
+        ({"offset": 15}, ValueError, "UTC offset must be between -12 and 14.", "offset > 14"),
+        ({"latitude": 0, "longitude": 0}, ValueError, "Radius filter needs latitude, longitude and radius_km.", "missing radius"),
+        ({"latitude": 0, "longitude": 0, "radius_km": -1}, ValueError, "Radius must be a non-negative number.", "negative radius"),
+        ({"bbox": {"min_latitude": 0, "max_latitude": 10, "min_longitude": 0}}, TypeError, "Bounding box must have numeric", "partial bbox"),
+        ({"bbox": {"min_latitude": 10, "max_latitude": 0, "min_longitude": 0, "max_longitude": 10}}, ValueError, "min_latitude must not be greater", "inverted bbox"),
+    ],
+    ids=["no-filters", "offset-over-14", "missing-radius", "negative-radius", "partial-bbox", "inverted-bbox"]
+)
+def test_cities_query_invalid(filters, error_type, error_msg, description):
+    # Act & Assert
+    with pytest.raises(error_type, match=error_msg):
+        timezone_controller.cities_query(**filters)
+
+@pytest.mark.parametrize(
+    "bbox, expected_names, description",
+    [
+        ({"min_latitude": 40, "max_latitude": 60, "min_longitude": -10, "max_longitude": 10}, ["London", "Paris"], "western europe"),
+        ({"min_latitude": 30, "max_latitude": 40, "min_longitude": 130, "max_longitude": -170}, ["Tokyo"], "crosses the antimeridian"),
+        ({"min_latitude": -10, "max_latitude": 10, "min_longitude": -10, "max_longitude": 10}, [], "empty box"),
+    ],
+    ids=["europe", "antimeridian", "empty"]
+)
+def test_cities_in_bbox(bbox, expected_names, description):
+    # Act
+    result = timezone_controller.cities_in_bbox(bbox)
+
+    # Assert
+    assert [c["name"] for c in result["cities"]] == expected_names, f"Failed: {description}"
+
+EUROPE_POLYGON = {
+    "type": "Polygon",
+    "coordinates": [[[-10, 40], [10, 40], [10, 60], [-10, 60], [-10, 40]]],
+}
+
+@pytest.mark.parametrize(
+    "geometry, expected_names, description",
+    [
+        (EUROPE_POLYGON, ["London", "Paris"], "polygon"),
+        ({"type": "Feature", "properties": {}, "geometry": EUROPE_POLYGON}, ["London", "Paris"], "feature"),
+        (
+            {
+                "type": "Polygon",
+                "coordinates": [
+                    [[-10, 40], [10, 40], [10, 60], [-10, 60], [-10, 40]],
+                    [[-1, 50], [1, 50], [1, 53], [-1, 53], [-1, 50]],
+                ],
+            },
+            ["Paris"],
+            "hole around London",
+        ),
+        (
+            {
+                "type": "MultiPolygon",
+                "coordinates": [
+                    [[[130, 30], [180, 30], [180, 40], [130, 40], [130, 30]]],
+                    [[[-180, 30], [-170, 30], [-170, 40], [-180, 40], [-180, 30]]],
+                ],
+            },
+            ["Tokyo"],
+            "split at the antimeridian",
+        ),
+    ],
+    ids=["polygon", "feature", "hole", "multipolygon"]
+)
+def test_cities_in_polygon(geometry, expected_names, description):
+    # Act
+    result = timezone_controller.cities_in_polygon(geometry)
+
+    # Assert
+    assert [c["name"] for c in result["cities"]] == expected_names, f"Failed: {description}"
+
+@pytest.mark.parametrize(
+    "geometry, error_type, error_msg, description",
+    [
+        ({"type": "Point", "coordinates": [0, 0]}, TypeError, "Geometry must be a GeoJSON Polygon or MultiPolygon.", "point"),
+        ({"type": "Polygon", "coordinates": [[0, 0]]}, TypeError, "Polygon rings must be lists", "bad ring"),
+        ({"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [0, 0]]]}, ValueError, "at least four positions", "short ring"),
+        ({"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1]]]}, ValueError, "Polygon rings must be closed.", "open ring"),
+        ({"type": "Polygon", "coordinates": [[[0, 0], [1, 95], [1, 1], [0, 0]]]}, ValueError, "Latitude must be between -90 and 90.", "latitude > 90"),
+    ],
+    ids=["point", "bad-ring", "short-ring", "open-ring", "lat-over-90"]
+)
+def test_cities_in_polygon_invalid(geometry, error_type, error_msg, description):
+    # Act & Assert
+    with pytest.raises(error_type, match=error_msg):
+        timezone_controller.cities_in_polygon(geometry)
+
+def test_distance_matrix():
+    # Act
+    result = timezone_controller.distance_matrix(
+        ["london", {"latitude": 0, "longitude": 0}],
+        [{"name": "Tokyo"}, "Paris"],
+    )
+
+    # Assert
+    assert [o["name"] for o in result["origins"]] == ["London", None]
+    assert [d["name"] for d in result["destinations"]] == ["Tokyo", "Paris"]
+    assert result["distances_km"][0] == [
+        round(timezone_controller.haversine(51.5074, -0.1278, 35.6895, 139.6917), 2),
+        round(timezone_controller.haversine(51.5074, -0.1278, 48.8566, 2.3522), 2),
+    ]
+
+def test_distance_matrix_stream_matches_matrix():
+    # Arrange
+    origins = ["London", "Paris", "Tokyo"]
+    destinations = ["Cape Town", {"latitude": 10, "longitude": 10}]
+
+    # Act
+    lines = list(timezone_controller.distance_matrix_stream(origins, destinations))
+
+    # Assert
+    matrix = timezone_controller.distance_matrix(origins, destinations)
+    assert lines[0] == {"origins": matrix["origins"], "destinations": matrix["destinations"]}
+    assert [line["distances_km"] for line in lines[1:]] == matrix["distances_km"]
+
+@pytest.mark.parametrize(
+    "origins, error_type, error_msg, description",
+    [
+        ([], TypeError, "Points must be a non-empty list.", "empty"),
+        ("London", TypeError, "Points must be a non-empty list.", "not a list"),
+        (["Atlantis"], ValueError, "City not found: Atlantis", "unknown city"),
+        ([{"latitude": 100, "longitude": 0}], ValueError, "Latitude must be between -90 and 90.", "latitude > 90"),
+        ([42], TypeError, "Points must be city names or objects", "number"),
+    ],
+    ids=["empty", "not-a-list", "unknown-city", "lat-over-90", "number"]
+)
+def test_distance_matrix_invalid(origins, error_type, error_msg, description):
+    # Act & Assert
+    with pytest.raises(error_type, match=error_msg):
+        timezone_controller.distance_matrix(origins, ["London"])
+
+def test_distance_matrix_limits(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(timezone_controller, "MAX_MATRIX_POINTS", 2)
+    monkeypatch.setattr(timezone_controller, "MAX_MATRIX_CELLS", 3)
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="At most 2 points"):
+        timezone_controller.distance_matrix(["London", "Paris", "Tokyo"], ["London"])
+    with pytest.raises(ValueError, match="Matrix exceeds 3 cells"):
+        timezone_controller.distance_matrix(["London", "Paris"], ["London", "Tokyo"])
+    assert len(list(timezone_controller.distance_matrix_stream(["London", "Paris"], ["London", "Tokyo"]))) == 3
+
+def dense_route(from_lat, from_lon, to_lat, to_lon, step_km=0.5):
+    from utils.geo import great_circle_points
+    total = timezone_controller.haversine(from_lat, from_lon, to_lat, to_lon)
+    steps = int(total / step_km) + 1
+    fractions = [k / steps for k in range(steps + 1)]
+    route = []
+    for fraction, (lat, lon) in zip(fractions, great_circle_points(from_lat, from_lon, to_lat, to_lon, fractions)):
+        nearest = timezone_controller.city_nearest(lat, lon)
+        zone = (nearest["region"], nearest["utc_offset"], nearest["dst"])
+        if not route or route[-1][2] != zone:
+            route.append((nearest["tz_location"], fraction * total, zone))
+    return route
+
+@pytest.mark.parametrize(
+    "from_lat, from_lon, to_lat, to_lon, expected_names, description",
+    [
+        (51.5074, -0.1278, 48.8566, 2.3522, ["London", "Paris"], "london to paris"),
+        (51.5074, -0.1278, 35.6895, 139.6917, ["London", "Tokyo"], "london to tokyo (polar route)"),
+        (-33.9249, 18.4241, 51.5074, -0.1278, ["Cape Town", "Paris", "London"], "cape town to london"),
+        (35.6895, 139.6917, 35.6895, 139.6917, ["Tokyo"], "same point"),
+        (48.8566, 2.3522, 52.5200, 13.4050, ["Paris"], "cities in the same timezone collapsed"),
+    ],
+    ids=["london-paris", "london-tokyo", "capetown-london", "same-point", "paris-berlin"]
+)
+def test_route_timezones(from_lat, from_lon, to_lat, to_lon, expected_names, description):
+    # Act
+    result = timezone_controller.route_timezones(from_lat, from_lon, to_lat, to_lon)
+
+    # Assert
+    transitions = result["transitions"]
+    assert [t["tz_location"] for t in transitions] == expected_names, f"Failed: {description}"
+    assert transitions[0]["distance_km"] == 0.0
+    dense = dense_route(from_lat, from_lon, to_lat, to_lon)
+    assert [name for name, _, _ in dense] == expected_names
+    for transition, (_, distance, _) in zip(transitions, dense):
+        assert transition["distance_km"] == pytest.approx(distance, abs=timezone_controller.ROUTE_TOLERANCE_KM + 0.5)
+
+def test_route_timezones_crossing_position():
+    # Act
+    result = timezone_controller.route_timezones(51.5074, -0.1278, 48.8566, 2.3522)
+
+    # Assert
+    crossing = result["transitions"][1]
+    to_london = timezone_controller.haversine(crossing["latitude"], crossing["longitude"], 51.5074, -0.1278)
+    to_paris = timezone_controller.haversine(crossing["latitude"], crossing["longitude"], 48.8566, 2.3522)
+    assert abs(to_london - to_paris) <= 2 * timezone_controller.ROUTE_TOLERANCE_KM
+    assert crossing["distance_km"] == pytest.approx(result["distance_km"] / 2, abs=1)
+
+@pytest.mark.parametrize(
+    "from_lat, from_lon, to_lat, to_lon, error_type, error_msg, description",
+    [
+        (100, 0, 0, 0, ValueError, "Latitude must be between -90 and 90.", "latitude > 90"),
+        (0, 0, "a", 0, TypeError, "Latitude and longitude must be numeric.", "not numeric"),
+        (0, 0, 0, 180, ValueError, "antipodal", "antipodal"),
+    ],
+    ids=["lat-over-90", "not-numeric", "antipodal"]
+)
+def test_route_timezones_invalid(from_lat, from_lon, to_lat, to_lon, error_type, error_msg, description):
+    # Act & Assert
+    with pytest.raises(error_type, match=error_msg):
+        timezone_controller.route_timezones(from_lat, from_lon, to_lat, to_lon)
@@ -0,0 +1,118 @@
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from controllers import timezone_controller
+from routes.export import etag_matches
+
+pyarrow = pytest.importorskip("pyarrow")
+parquet = pytest.importorskip("pyarrow.parquet")
+
+@pytest.fixture
+def client(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(main, "API_KEY", "test-key")
+    return TestClient(main.app, headers={"X-API-KEY": "test-key"})
+
+@pytest.mark.parametrize(
+    "if_none_match, expected, description",
+    [
+        (None, False, "no header"),
+        ('"v1-cities-arrow"', True, "exact"),
+        ('"v0-cities-arrow", W/"v1-cities-arrow"', True, "weak tag in list"),
+        ("*", True, "wildcard"),
+        ('"v0-cities-arrow"', False, "other version"),
+    ],
+    ids=["none", "exact", "weak-list", "wildcard", "stale"]
+)
+def test_etag_matches(if_none_match, expected, description):
+    # Act & Assert
+    assert etag_matches(if_none_match, '"v1-cities-arrow"') is expected, f"Failed: {description}"
+
+@pytest.mark.parametrize(
+    "table, file_format, expected_media_type, expected_rows, description",
+    [
+        ("cities", "arrow", "application/vnd.apache.arrow.stream", len(timezone_controller.ALL_TIMEZONES), "cities arrow"),
+        ("cities", "parquet", "application/vnd.apache.parquet", len(timezone_controller.ALL_TIMEZONES), "cities parquet"),
+        ("regions", "arrow", "application/vnd.apache.arrow.stream", len(timezone_controller.TZ_LOCATIONS), "regions arrow"),
+    ],
+    ids=["cities-arrow", "cities-parquet", "regions-arrow"]
+)
+def test_dataset_export(client, table, file_format, expected_media_type, expected_rows, description):
+    # Act
+    response = client.get("/dataset_export", params={"table": table, "format": file_format})
+
+    # Assert
+    assert response.status_code == 200, f"Failed: {description}"
+    assert response.headers["content-type"] == expected_media_type, f"Failed: {description}"
+    version = timezone_controller.dataset_version()
+    assert response.headers["etag"] == f'"{version}-{table}-{file_format}"', f"Failed: {description}"
+    if file_format == "parquet":
+        result = parquet.read_table(io.BytesIO(response.content))
+    else:
+        result = pyarrow.ipc.open_stream(response.content).read_all()
+    assert result.num_rows == expected_rows, f"Failed: {description}"
+    assert result.schema.metadata[b"dataset_version"] == version.encode(), f"Failed: {description}"
+
+def test_dataset_export_not_modified(client):
+    # Arrange
+    etag = client.get("/dataset_export").headers["etag"]
+
+    # Act
+    response = client.get("/dataset_export", headers={"If-None-Match": etag})
+
+    # Assert
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+def test_dataset_export_new_version(client, monkeypatch):
+    # Arrange
+    etag = client.get("/dataset_export").headers["etag"]
+    monkeypatch.setattr(timezone_controller, "ALL_TIMEZONES", timezone_controller.ALL_TIMEZONES[:10])
+
+    # Act
+    response = client.get("/dataset_export", headers={"If-None-Match": etag})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert pyarrow.ipc.open_stream(response.content).read_all().num_rows == 10
+
+@pytest.mark.parametrize(
+    "params, expected_status, expected_detail",
+    [
+        ({"table": "countries"}, 400, "Table must be one of: cities, regions."),
+        ({"format": "csv"}, 400, "Format must be one of: arrow, parquet."),
+    ],
+    ids=["unknown-table", "unknown-format"]
+)
+@pytest.mark.parametrize(
+    "if_none_match",
+    [None, "*"],
+    ids=["unconditional", "wildcard-if-none-match"]
+)
+def test_dataset_export_invalid(client, params, expected_status, expected_detail, if_none_match):
+    # Act
+    headers = {"If-None-Match": if_none_match} if if_none_match else {}
+    response = client.get("/dataset_export", params=params, headers=headers)
+
+    # Assert
+    assert response.status_code == expected_status
+    assert response.json()["detail"] == expected_detail
+
+def test_dataset_export_without_pyarrow(client, monkeypatch):
+    # Arrange
+    def missing():
+        raise RuntimeError("Dataset export requires the optional 'pyarrow' package.")
+    monkeypatch.setattr(timezone_controller, "get_pyarrow", missing)
+    monkeypatch.setattr(timezone_controller, "_EXPORTS", {"version": None, "buffers": {}})
+
+    # Act
+    response = client.get("/dataset_export")
+
+    # Assert
+    assert response.status_code == 501
+    assert response.json()["detail"] == "Dataset export requires the optional 'pyarrow' package."
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from controllers import jobs_controller
+from routes import jobs
+from utils.jobs import JobStore
+
+POINTS = [
+    {"id": "london", "latitude": 51.5074, "longitude": -0.1278},
+    {"id": "tokyo", "latitude": 35.6762, "longitude": 139.6503},
+    {"id": "bad", "latitude": "north", "longitude": 0},
+]
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    # Arrange
+    store = JobStore(tmp_path / "jobs.db")
+    monkeypatch.setattr(main, "API_KEY", "test-key")
+    monkeypatch.setattr(jobs_controller, "job_store", store)
+    monkeypatch.setattr(jobs_controller, "JOBS_CHUNK_SIZE", 2)
+    monkeypatch.setattr(jobs.job_workers, "store", store)
+    monkeypatch.setattr(jobs.job_workers, "poll_interval", 0.01)
+    jobs.job_workers.start()
+    yield TestClient(main.app, headers={"X-API-KEY": "test-key"})
+    jobs.job_workers.stop()
+
+def wait_until_done(client, job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+def to_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+@pytest.mark.parametrize(
+    "content, headers, description",
+    [
+        (json.dumps({"points": POINTS}), {"Content-Type": "application/json"}, "json points object"),
+        (json.dumps(POINTS), {"Content-Type": "application/json"}, "json list"),
+        ("".join(json.dumps(p) + "\n" for p in POINTS), {"Content-Type": "application/x-ndjson"}, "ndjson upload"),
+        (to_csv(POINTS), {"Content-Type": "text/csv"}, "csv upload"),
+    ],
+    ids=["json-object", "json-list", "ndjson", "csv"]
+)
+def test_job_lifecycle(client, content, headers, description):
+    # Act
+    submitted = client.post("/jobs", content=content, headers=headers)
+    job = wait_until_done(client, submitted.json()["id"])
+    results = client.get(f"/jobs/{job['id']}/results")
+
+    # Assert
+    assert submitted.status_code == 202, f"Failed: {description}"
+    assert (job["status"], job["chunks"], job["rows"]) == ("done", 2, 3), f"Failed: {description}"
+    assert results.headers["content-type"].startswith("application/x-ndjson"), f"Failed: {description}"
+    rows = [json.loads(line) for line in results.text.splitlines()]
+    assert [row["id"] for row in rows] == ["london", "tokyo", "bad"], f"Failed: {description}"
+    assert rows[0]["nearest_city"] == "London", f"Failed: {description}"
+    assert rows[2]["nearest_city"] is None, f"Failed: {description}"
+
+def test_job_results_as_csv(client):
+    # Arrange
+    job_id = client.post("/jobs", json=POINTS[:2]).json()["id"]
+    wait_until_done(client, job_id)
+
+    # Act
+    response = client.get(f"/jobs/{job_id}/results", params={"format": "csv"})
+
+    # Assert
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["nearest_city"] for row in rows] == ["London", "Tokyo"]
+
+def test_custom_coordinate_columns(client):
+    # Arrange
+    points = [{"lat": 51.5074, "lng": -0.1278}]
+
+    # Act
+    job_id = client.post(
+        "/jobs", json=points, params={"latitude_column": "lat", "longitude_column": "lng"}
+    ).json()["id"]
+    wait_until_done(client, job_id)
+    rows = [json.loads(line) for line in client.get(f"/jobs/{job_id}/results").text.splitlines()]
+
+    # Assert
+    assert rows[0]["nearest_city"] == "London"
+
+@pytest.mark.parametrize(
+    "method, path, kwargs, expected_status, expected_detail",
+    [
+        ("post", "/jobs", {"json": []}, 400, "Points must be a non-empty list of objects."),
+        ("post", "/jobs", {"json": {"points": [1, 2]}}, 400, "Points must be a non-empty list of objects."),
+        ("get", "/jobs/missing", {}, 404, "Job not found."),
+        ("get", "/jobs/missing/results", {}, 404, "Job not found."),
+    ],
+    ids=["empty-list", "not-objects", "unknown-job", "unknown-job-results"]
+)
+def test_job_errors(client, method, path, kwargs, expected_status, expected_detail):
+    # Act
+    response = getattr(client, method)(path, **kwargs)
+
+    # Assert
+    assert response.status_code == expected_status
+    assert response.json()["detail"] == expected_detail
+
+def test_results_of_unfinished_job_conflict(client):
+    # Arrange
+    jobs.job_workers.stop()
+    job_id = client.post("/jobs", json=POINTS).json()["id"]
+
+    # Act
+    response = client.get(f"/jobs/{job_id}/results")
+
+    # Assert
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Job is not done (status: queued)."
@@ -0,0 +1,134 @@
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+from routes import stream
+
+@pytest.fixture
+def client(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(main, "API_KEY", "test-key")
+    return TestClient(main.app)
+
+@pytest.mark.parametrize(
+    "points, expected, description",
+    [
+        (
+            [{"id": 1, "latitude": 51.5074, "longitude": -0.1278}],
+            [{"id": 1, "tz_location": "London"}],
+            "single valid point",
+        ),
+        (
+            [{"id": "a", "latitude": 100, "longitude": 0}],
+            [{"id": "a", "error": "Latitude must be between -90 and 90."}],
+            "invalid latitude",
+        ),
+        (
+            ["not-a-point"],
+            [{"id": None, "error": "Point must be an object."}],
+            "not an object",
+        ),
+        (
+            [
+                {"id": 1, "latitude": 35.6895, "longitude": 139.6917},
+                {"id": 2, "latitude": "north", "longitude": 0},
+                {"id": 3, "latitude": 51.5074, "longitude": -0.1278},
+            ],
+            [
+                {"id": 1, "tz_location": "Tokyo"},
+                {"id": 2, "error": "Latitude and longitude must be numeric."},
+                {"id": 3, "tz_location": "London"},
+            ],
+            "valid points around an invalid one keep their order",
+        ),
+    ],
+    ids=["valid", "invalid-latitude", "not-an-object", "mixed"]
+)
+def test_resolve_points(points, expected, description):
+    # Act
+    result = stream.resolve_points(points)
+
+    # Assert
+    assert len(result) == len(expected), f"Failed: {description}"
+    for reply, expected_reply in zip(result, expected):
+        for key, value in expected_reply.items():
+            assert reply[key] == value, f"Failed: {description}"
+
+@pytest.mark.parametrize(
+    "headers, path, hello, description",
+    [
+        ({"x-api-key": "wrong"}, "/ws/cities_nearest", None, "wrong header key"),
+        ({}, "/ws/cities_nearest?api_key=test-key", {"id": 1, "latitude": 0, "longitude": 0}, "query key ignored"),
+        ({}, "/ws/cities_nearest", {"api_key": "wrong"}, "wrong first message key"),
+        ({}, "/ws/cities_nearest", "not json", "malformed first message"),
+    ],
+    ids=["wrong-header-key", "query-key", "wrong-message-key", "malformed-message"]
+)
+def test_stream_rejects_invalid_api_key(client, headers, path, hello, description):
+    # Act & Assert
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect(path, headers=headers) as websocket:
+            if isinstance(hello, dict):
+                websocket.send_json(hello)
+            elif hello is not None:
+                websocket.send_text(hello)
+            websocket.receive_json()
+    assert exc_info.value.code == 1008, f"Failed: {description}"
+
+def test_stream_rejects_missing_api_key_after_timeout(client, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(stream, "AUTH_TIMEOUT", 0.05)
+
+    # Act & Assert
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect("/ws/cities_nearest") as websocket:
+            websocket.receive_json()
+    assert exc_info.value.code == 1008
+
+def test_stream_replies_in_order_for_json_frames(client):
+    # Arrange
+    points = [
+        {"id": 1, "latitude": 51.5074, "longitude": -0.1278},
+        {"id": 2, "latitude": 35.6895, "longitude": 139.6917},
+        {"id": 3, "latitude": 100, "longitude": 0},
+    ]
+
+    # Act
+    with client.websocket_connect("/ws/cities_nearest") as websocket:
+        websocket.send_json({"api_key": "test-key"})
+        websocket.send_json(points[0])
+        websocket.send_json(points[1:])
+        replies = [websocket.receive_json() for _ in points]
+
+    # Assert
+    assert [r["id"] for r in replies] == [1, 2, 3]
+    assert replies[0]["tz_location"] == "London"
+    assert replies[1]["region"] == "asia"
+    assert "error" in replies[2]
+
+def test_stream_backpressure_with_many_points(client, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(stream, "QUEUE_SIZE", 4)
+    monkeypatch.setattr(stream, "BATCH_SIZE", 3)
+    points = [{"id": i, "latitude": 0.0, "longitude": i % 180} for i in range(50)]
+
+    # Act
+    with client.websocket_connect("/ws/cities_nearest", headers={"x-api-key": "test-key"}) as websocket:
+        websocket.send_json(points)
+        replies = [websocket.receive_json() for _ in points]
+
+    # Assert
+    assert [r["id"] for r in replies] == list(range(50))
+
+def test_stream_msgpack_frames(client):
+    # Act
+    with client.websocket_connect("/ws/cities_nearest") as websocket:
+        websocket.send_bytes(msgpack.packb({"api_key": "test-key"}))
+        websocket.send_bytes(msgpack.packb({"id": 7, "latitude": 51.5074, "longitude": -0.1278}))
+        reply = msgpack.unpackb(websocket.receive_bytes())
+
+    # Assert
+    assert reply["id"] == 7
+    assert reply["tz_location"] == "London"
@@ -0,0 +1,112 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from controllers import timezone_controller
+
+@pytest.fixture
+def client(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(main, "API_KEY", "test-key")
+    return TestClient(main.app, headers={"X-API-KEY": "test-key"})
+
+MATRIX_BODY = {
+    "origins": ["London", {"latitude": 48.8566, "longitude": 2.3522}],
+    "destinations": ["London", "Tokyo", {"name": "Paris"}],
+}
+
+def test_openapi_schema(client):
+    # Act
+    response = client.get("/openapi.json")
+
+    # Assert
+    assert response.status_code == 200
+    assert "/cities_nearest" in response.json()["paths"]
+
+def test_distance_matrix_json(client):
+    # Act
+    response = client.post("/distance_matrix", json=MATRIX_BODY)
+
+    # Assert
+    assert response.status_code == 200
+    body = response.json()
+    assert [o["name"] for o in body["origins"]] == ["London", None]
+    assert len(body["distances_km"]) == 2
+    assert all(len(row) == 3 for row in body["distances_km"])
+    assert body["distances_km"][0][0] == 0.0
+
+def test_distance_matrix_ndjson_stream(client, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(timezone_controller, "MAX_MATRIX_CELLS", 1)
+    expected = timezone_controller.distance_matrix_stream(MATRIX_BODY["origins"], MATRIX_BODY["destinations"])
+
+    # Act
+    response = client.post(
+        "/distance_matrix", json=MATRIX_BODY, headers={"Accept": "application/x-ndjson"}
+    )
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == list(expected)
+    assert [line["origin"] for line in lines[1:]] == [0, 1]
+
+@pytest.mark.parametrize(
+    "path, method, payload, expected_detail",
+    [
+        ("/distance_matrix", "post", {"origins": ["Atlantis"], "destinations": ["London"]}, "City not found: Atlantis"),
+        ("/distance_matrix", "post", [1, 2], "Body must be an object with origins and destinations."),
+        ("/cities_query", "get", {"latitude": 0, "longitude": 0}, "Radius filter needs latitude, longitude and radius_km."),
+        ("/cities_in_bbox", "get", {"min_latitude": 10, "max_latitude": 0, "min_longitude": 0, "max_longitude": 1}, "min_latitude must not be greater than max_latitude."),
+        ("/cities_in_polygon", "post", {"type": "Point", "coordinates": [0, 0]}, "Geometry must be a GeoJSON Polygon or MultiPolygon."),
+        ("/route_timezones", "get", {"from_latitude": 0, "from_longitude": 0, "to_latitude": 0, "to_longitude": 180}, "The great-circle path between antipodal points is undefined."),
+        ("/cities_nearest_batch", "post", {"latitude": 0, "longitude": 0}, "Points must be a list of objects."),
+        ("/cities_nearest_batch", "post", [{"latitude": "north", "longitude": 0}], "Latitude and longitude must be numeric."),
+        ("/cities_nearest_batch", "post", [{"latitude": 0, "longitude": 0}] * 1001, "At most 1000 points per batch."),
+    ],
+    ids=[
+        "unknown-city", "not-an-object", "incomplete-radius", "inverted-bbox", "not-a-polygon", "antipodal-route",
+        "batch-not-a-list", "batch-bad-point", "batch-too-large",
+    ]
+)
+def test_invalid_requests_return_400(client, path, method, payload, expected_detail):
+    # Act
+    if method == "post":
+        response = client.post(path, json=payload)
+    else:
+        response = client.get(path, params=payload)
+
+    # Assert
+    assert response.status_code == 400
+    assert response.json()["detail"] == expected_detail
+
+def test_distance_matrix_too_large_for_json(client, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(timezone_controller, "MAX_MATRIX_CELLS", 5)
+
+    # Act
+    response = client.post("/distance_matrix", json=MATRIX_BODY)
+
+    # Assert
+    assert response.status_code == 400
+    assert "application/x-ndjson" in response.json()["detail"]
+
+def test_route_timezones(client):
+    # Act
+    response = client.get("/route_timezones", params={
+        "from_latitude": 51.5074, "from_longitude": -0.1278,
+        "to_latitude": 40.7128, "to_longitude": -74.0060,
+    })
+
+    # Assert
+    assert response.status_code == 200
+    body = response.json()
+    zones = [(t["region"], t["utc_offset"], t["dst"]) for t in body["transitions"]]
+    assert body["transitions"][0]["tz_location"] == "London"
+    assert zones[-1] == ("america", -5, True)
+    assert all(a != b for a, b in zip(zones, zones[1:]))
+    distances = [t["distance_km"] for t in body["transitions"]]
+    assert distances == sorted(distances) and distances[-1] <= body["distance_km"]
@@ -0,0 +1,187 @@
+import csv
+import json
+import random
+
+import pytest
+
+from scripts import annotate
+
+@pytest.fixture
+def points():
+    rng = random.Random(29)
+    rows = [
+        {"id": str(i), "latitude": str(round(rng.uniform(-90, 90), 4)), "longitude": str(round(rng.uniform(-180, 180), 4))}
+        for i in range(120)
+    ]
+    rows.append({"id": "bad", "latitude": "not-a-number", "longitude": "0"})
+    return rows
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+def read_csv(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+@pytest.mark.parametrize(
+    "path, expected, description",
+    [
+        ("points.csv", "csv", "csv"),
+        ("points.JSONL", "jsonl", "jsonl upper case"),
+        ("points.ndjson", "jsonl", "ndjson alias"),
+        ("points.parquet", "parquet", "parquet"),
+    ],
+    ids=["csv", "jsonl", "ndjson", "parquet"]
+)
+def test_detect_format(path, expected, description):
+    # Act & Assert
+    assert annotate.detect_format(path) == expected, f"Failed: {description}"
+
+def test_detect_format_unknown():
+    # Act & Assert
+    with pytest.raises(ValueError, match="Cannot detect file format"):
+        annotate.detect_format("points.txt")
+
+def test_annotate_rows():
+    # Arrange
+    rows = [
+        {"latitude": "51.5074", "longitude": "-0.1278"},
+        {"latitude": "100", "longitude": "0"},
+        {"longitude": "0"},
+        [51.5074, -0.1278],
+        None,
+    ]
+
+    # Act
+    result = annotate.annotate_rows(rows)
+
+    # Assert
+    assert len(result) == 3
+    assert result[0]["nearest_city"] == "London"
+    assert result[0]["region"] == "europe"
+    assert result[1]["nearest_city"] is None
+    assert result[2]["nearest_city"] is None
+
+@pytest.mark.parametrize(
+    "workers, chunk_size",
+    [(1, 7), (2, 7), (3, 50)],
+    ids=["single-process", "two-workers", "three-workers-large-chunks"]
+)
+def test_annotate_file_csv_is_deterministic(points, tmp_path, workers, chunk_size):
+    # Arrange
+    source = tmp_path / "points.csv"
+    output = tmp_path / "annotated.csv"
+    write_csv(source, points)
+    expected = annotate.annotate_rows(points)
+
+    # Act
+    total, skipped = annotate.annotate_file(source, output, workers=workers, chunk_size=chunk_size)
+
+    # Assert
+    result = read_csv(output)
+    assert (total, skipped) == (len(points), 0)
+    assert [r["id"] for r in result] == [p["id"] for p in points]
+    assert [r["nearest_city"] for r in result] == [e["nearest_city"] or "" for e in expected]
+
+def test_annotate_file_jsonl_custom_columns(tmp_path):
+    # Arrange
+    source = tmp_path / "points.jsonl"
+    output = tmp_path / "annotated.jsonl"
+    source.write_text(
+        json.dumps({"lat": 35.6895, "lon": 139.6917}) + "\n\n"
+        + json.dumps({"lat": -33.9249, "lon": 18.4241}) + "\n",
+        encoding="utf-8",
+    )
+
+    # Act
+    total, skipped = annotate.annotate_file(
+        source, output, latitude_column="lat", longitude_column="lon", workers=1
+    )
+
+    # Assert
+    result = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert (total, skipped) == (2, 0)
+    assert [r["region"] for r in result] == ["asia", "africa"]
+    assert set(annotate.ANNOTATION_FIELDS) <= set(result[0])
+
+@pytest.mark.parametrize("workers", [1, 2], ids=["single-process", "two-workers"])
+def test_annotate_file_jsonl_skips_non_object_rows(tmp_path, capsys, workers):
+    # Arrange
+    source = tmp_path / "points.jsonl"
+    output = tmp_path / "annotated.jsonl"
+    source.write_text(
+        "\n".join([
+            json.dumps({"latitude": 35.6895, "longitude": 139.6917}),
+            json.dumps([51.5074, -0.1278]),
+            "42",
+            json.dumps({"latitude": -33.9249, "longitude": 18.4241}),
+        ]) + "\n",
+        encoding="utf-8",
+    )
+
+    # Act
+    annotate.main([str(source), str(output), "--workers", str(workers), "--chunk-size", "2"])
+
+    # Assert
+    result = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [r["region"] for r in result] == ["asia", "africa"]
+    out = capsys.readouterr().out
+    assert "Annotated 2 rows" in out
+    assert "Skipped 2 rows that are not objects" in out
+
+def test_annotate_file_jsonl_to_csv_with_varying_keys(tmp_path):
+    # Arrange
+    source = tmp_path / "points.jsonl"
+    output = tmp_path / "annotated.csv"
+    source.write_text(
+        "\n".join([
+            json.dumps({"id": 1, "latitude": 35.6895, "longitude": 139.6917}),
+            json.dumps({"latitude": 51.5074, "longitude": -0.1278, "label": "x"}),
+            json.dumps({"id": 3, "latitude": "bad", "longitude": 0, "note": "late"}),
+        ]) + "\n",
+        encoding="utf-8",
+    )
+
+    # Act
+    total, skipped = annotate.annotate_file(source, output, workers=1, chunk_size=2)
+
+    # Assert
+    result = read_csv(output)
+    assert (total, skipped) == (3, 0)
+    assert list(result[0]) == ["id", "latitude", "longitude", "label", *annotate.ANNOTATION_FIELDS]
+    assert [r["id"] for r in result] == ["1", "", "3"]
+    assert [r["nearest_city"] for r in result] == ["Tokyo", "London", ""]
+    assert "note" not in result[2]
+
+def test_annotate_file_parquet(points, tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    parquet = pytest.importorskip("pyarrow.parquet")
+
+    # Arrange
+    source = tmp_path / "points.parquet"
+    output = tmp_path / "annotated.parquet"
+    parquet.write_table(pyarrow.Table.from_pylist(points), source)
+
+    # Act
+    total, skipped = annotate.annotate_file(source, output, workers=2, chunk_size=25)
+
+    # Assert
+    result = parquet.read_table(output).to_pylist()
+    assert (total, skipped) == (len(points), 0)
+    assert [r["id"] for r in result] == [p["id"] for p in points]
+
+def test_main(points, tmp_path, capsys):
+    # Arrange
+    source = tmp_path / "points.csv"
+    output = tmp_path / "annotated.jsonl"
+    write_csv(source, points)
+
+    # Act
+    annotate.main([str(source), str(output), "--workers", "1", "--chunk-size", "10"])
+
+    # Assert
+    assert f"Annotated {len(points)} rows" in capsys.readouterr().out
+    assert len(output.read_text(encoding="utf-8").splitlines()) == len(points)
@@ -0,0 +1,254 @@
+import asyncio
+import base64
+import json
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import APIRouter, FastAPI, Header, HTTPException, Request
+
+from scripts import replay
+
+@pytest.fixture
+def app():
+    # Arrange
+    app = FastAPI()
+    app.state.seen = []
+
+    @app.get("/cities_by_utc_offset")
+    def cities_by_utc_offset(offset: float, x_api_key: str = Header(None)):
+        if x_api_key != "test-key":
+            raise HTTPException(status_code=401)
+        app.state.seen.append(offset)
+        return {"cities": []}
+
+    @app.get("/tz_region_cities")
+    def tz_region_cities(region: str):
+        if region == "missing":
+            raise HTTPException(status_code=404)
+        return {"region": region}
+
+    @app.get("/jobs/{job_id}")
+    def job(job_id: str):
+        return {"id": job_id}
+
+    @app.post("/cities_nearest_batch")
+    async def cities_nearest_batch(request: Request):
+        app.state.bodies.append((request.headers.get("content-type"), await request.body()))
+        return {"results": []}
+
+    app.state.bodies = []
+    return app
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    records = [
+        {"ts": 100.0, "method": "GET", "path": "/cities_by_utc_offset", "params": {"offset": 1.0}, "status": 200},
+        {"ts": 100.1, "method": "GET", "path": "/cities_by_utc_offset", "params": {"offset": -5.0, "api_key": "***"}},
+        {"ts": 100.2, "method": "GET", "path": "/tz_region_cities", "params": {"region": "america"}},
+        {"ts": 100.3, "method": "GET", "path": "/tz_region_cities", "params": {"region": "missing"}},
+        {"ts": 100.4, "method": "GET", "path": "/jobs/a1", "params": {}},
+        {"ts": 100.5, "method": "GET", "path": "/jobs/b2", "params": {}},
+        {"ts": 100.6, "method": "POST", "path": "/cities_nearest_batch", "params": {},
+         "content_type": "application/json", "body": '{"points":[]}'},
+        {"ts": 100.7, "method": "POST", "path": "/cities_nearest_batch", "params": {},
+         "content_type": "application/msgpack", "body_b64": base64.b64encode(b"\x81").decode("ascii")},
+        {"ts": 100.8, "method": "POST", "path": "/cities_nearest_batch", "params": {},
+         "content_type": "application/json", "body_omitted": True},
+    ]
+    path.write_text(
+        "\n".join(json.dumps(r) for r in records) + "\n\nnot json\n" + json.dumps({"no": "path"}) + "\n",
+        encoding="utf-8",
+    )
+    return path
+
+@pytest.mark.parametrize(
+    "values, fraction, expected",
+    [([], 0.5, None), ([5], 0.99, 5), ([1, 2, 3, 4], 0.5, 2), (list(range(1, 101)), 0.95, 95)],
+    ids=["empty", "single", "median", "p95"]
+)
+def test_percentile(values, fraction, expected):
+    # Act & Assert
+    assert replay.percentile(values, fraction) == expected
+
+@pytest.mark.parametrize(
+    "limit, expected_count",
+    [(None, 9), (2, 2)],
+    ids=["all", "limited"]
+)
+def test_read_log_skips_invalid_lines(log_path, limit, expected_count):
+    # Act
+    records = list(replay.read_log(log_path, limit=limit))
+
+    # Assert
+    assert len(records) == expected_count
+    assert records[0] == {
+        "method": "GET", "path": "/cities_by_utc_offset", "params": {"offset": 1.0}, "ts": 100.0,
+        "body": None, "content_type": None,
+    }
+
+def test_read_log_decodes_bodies(log_path):
+    # Act
+    records = list(replay.read_log(log_path))
+
+    # Assert
+    assert records[6]["body"] == b'{"points":[]}'
+    assert records[7]["body"] == b"\x81"
+    assert records[8]["body"] is None and records[8]["body_omitted"]
+
+@pytest.mark.parametrize(
+    "path, expected, description",
+    [
+        ("/jobs/a1", "/jobs/{job_id}", "templated path"),
+        ("/tz_region_cities", "/tz_region_cities", "static path"),
+        ("/nope", "(unmatched)", "unknown path"),
+    ],
+    ids=["template", "static", "unmatched"]
+)
+def test_route_of(app, path, expected, description):
+    # Act & Assert
+    assert replay.route_of(path, replay.route_templates(app)) == expected, f"Failed: {description}"
+
+def test_route_templates_include_router_prefixes():
+    # Arrange
+    router = APIRouter()
+
+    @router.get("/{job_id}/results")
+    def results(job_id: str):
+        return {}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/jobs")
+
+    # Act
+    templates = replay.route_templates(app)
+
+    # Assert
+    assert replay.route_of("/jobs/a1/results", templates) == "/jobs/{job_id}/results"
+
+def test_replay_in_process_report(app, log_path):
+    # Arrange
+    records = replay.read_log(log_path)
+
+    # Act
+    report = asyncio.run(replay.replay(records, app=app, concurrency=2, headers={"X-API-KEY": "test-key"}))
+
+    # Assert
+    assert report["requests"] == 8
+    assert report["skipped"] == 1
+    assert report["error_rate"] == 0.125
+    assert report["routes"]["/cities_by_utc_offset"]["count"] == 2
+    assert report["routes"]["/cities_by_utc_offset"]["error_rate"] == 0.0
+    assert report["routes"]["/tz_region_cities"]["error_rate"] == 0.5
+    assert report["routes"]["/jobs/{job_id}"]["count"] == 2
+    assert sorted(app.state.seen) == [-5.0, 1.0]
+    assert sorted(app.state.bodies) == [
+        ("application/json", b'{"points":[]}'), ("application/msgpack", b"\x81"),
+    ]
+    assert report["throughput_rps"] > 0
+
+def test_replay_streams_the_log(log_path, monkeypatch):
+    # Arrange
+    records = replay.read_log(log_path)
+    pulled = []
+    app = FastAPI()
+
+    @app.get("/{path:path}")
+    def anything(path: str):
+        return {}
+
+    def tracked():
+        for record in records:
+            pulled.append(record)
+            yield record
+
+    # Act
+    report = asyncio.run(replay.replay(tracked(), app=app, concurrency=1))
+
+    # Assert
+    assert not isinstance(records, list)
+    assert report["requests"] == len(pulled) - report["skipped"] == 8
+
+def test_replay_runs_app_lifespan():
+    # Arrange
+    events = []
+
+    @asynccontextmanager
+    async def lifespan(app):
+        events.append("startup")
+        yield
+        events.append("shutdown")
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/status")
+    def status():
+        assert events == ["startup"]
+        return {}
+
+    records = [{"method": "GET", "path": "/status", "params": {}, "ts": None}]
+
+    # Act
+    report = asyncio.run(replay.replay(records, app=app))
+
+    # Assert
+    assert report["error_rate"] == 0.0
+    assert events == ["startup", "shutdown"]
+
+def test_replay_bounds_requests_in_flight():
+    # Arrange
+    app = FastAPI()
+    app.state.in_flight = 0
+    app.state.peak = 0
+
+    @app.get("/slow")
+    async def slow():
+        app.state.in_flight += 1
+        app.state.peak = max(app.state.peak, app.state.in_flight)
+        await asyncio.sleep(0.005)
+        app.state.in_flight -= 1
+        return {}
+
+    records = [{"method": "GET", "path": "/slow", "params": {}, "ts": None} for _ in range(40)]
+
+    # Act
+    report = asyncio.run(replay.replay(records, app=app, concurrency=3))
+
+    # Assert
+    assert report["requests"] == 40
+    assert app.state.peak == 3
+
+def test_replay_speedup_preserves_timing(app, log_path):
+    # Arrange
+    records = replay.read_log(log_path)
+
+    # Act
+    started = time.perf_counter()
+    asyncio.run(replay.replay(records, app=app, speedup=1.0, headers={"X-API-KEY": "test-key"}))
+    elapsed = time.perf_counter() - started
+
+    # Assert
+    assert elapsed >= 0.7
+
+def test_main_prints_json_report(app, log_path, monkeypatch, capsys):
+    # Arrange
+    monkeypatch.setattr(replay, "load_app", lambda target: app)
+
+    # Act
+    replay.main([str(log_path), "--api-key", "test-key", "--json"])
+
+    # Assert
+    report = json.loads(capsys.readouterr().out)
+    assert report["requests"] == 8
+
+def test_format_report():
+    # Arrange
+    report = replay.summarize([("/status", 200, 1.0), ("/status", 503, 3.0)], 0.5)
+
+    # Act
+    text = replay.format_report(report)
+
+    # Assert
+    assert "2 requests in 0.5s (4.0 req/s), error rate 50.00%" in text
+    assert "/status" in text
@@ -0,0 +1,193 @@
+import json
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from utils.access_log import AccessLogMiddleware, AccessLogWriter, normalize_params
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+@pytest.mark.parametrize(
+    "query_string, expected, description",
+    [
+        ("", {}, "empty"),
+        ("offset=1", {"offset": 1.0}, "integer normalized to float"),
+        ("latitude=40.7128&longitude=-74.0060", {"latitude": 40.7128, "longitude": -74.006}, "coordinates"),
+        ("region=america&dst=true", {"region": "america", "dst": "true"}, "strings kept"),
+        ("api_key=secret&offset=1", {"api_key": "***", "offset": 1.0}, "api key redacted"),
+        ("offset=nan", {"offset": "nan"}, "nan kept as string"),
+    ],
+    ids=["empty", "integer", "coordinates", "strings", "redacted", "nan"]
+)
+def test_normalize_params(query_string, expected, description):
+    # Act & Assert
+    assert normalize_params(query_string) == expected, f"Failed: {description}"
+
+def test_writer_batches_and_flushes_on_close(tmp_path):
+    # Arrange
+    path = tmp_path / "logs" / "requests.jsonl"
+    writer = AccessLogWriter(path, batch_size=10, flush_interval=0.01)
+
+    # Act
+    for i in range(25):
+        writer.submit({"i": i})
+    writer.close()
+
+    # Assert
+    assert [r["i"] for r in read_records(path)] == list(range(25))
+
+def test_writer_rotates_files(tmp_path):
+    # Arrange
+    path = tmp_path / "requests.jsonl"
+    writer = AccessLogWriter(path, max_bytes=200, backup_count=2, batch_size=5, flush_interval=0.01)
+
+    # Act
+    for i in range(60):
+        writer.submit({"i": i, "padding": "x" * 20})
+    writer.close()
+
+    # Assert
+    assert path.exists()
+    assert (tmp_path / "requests.jsonl.1").exists()
+    assert (tmp_path / "requests.jsonl.2").exists()
+    assert not (tmp_path / "requests.jsonl.3").exists()
+
+def test_writer_drops_when_queue_is_full(tmp_path):
+    # Arrange
+    writer = AccessLogWriter(tmp_path / "requests.jsonl", queue_size=1, flush_interval=10)
+    writer._thread = object()  # Pretend the thread runs but never drains
+
+    # Act
+    writer.submit({"i": 1})
+    writer.submit({"i": 2})
+
+    # Assert
+    assert writer.dropped == 1
+
+@pytest.fixture
+def app():
+    # Arrange
+    app = FastAPI()
+
+    @app.get("/cities_by_utc_offset")
+    def cities_by_utc_offset(offset: float):
+        return {"cities": ["London"] * int(offset)}
+
+    return app
+
+@pytest.mark.parametrize(
+    "sample_rate, requests, expected_records",
+    [(1.0, 3, 3), (0.0, 3, 0)],
+    ids=["all-sampled", "none-sampled"]
+)
+def test_middleware_records_requests(app, tmp_path, sample_rate, requests, expected_records):
+    # Arrange
+    path = tmp_path / "requests.jsonl"
+    writer = AccessLogWriter(path, flush_interval=0.01)
+    app.add_middleware(AccessLogMiddleware, writer=writer, sample_rate=sample_rate)
+    client = TestClient(app)
+
+    # Act
+    before = time.time()
+    for _ in range(requests):
+        response = client.get(
+            "/cities_by_utc_offset?offset=2&api_key=secret",
+            headers={"x-api-key": "secret"},
+        )
+    writer.close()
+
+    # Assert
+    records = read_records(path) if path.exists() else []
+    assert len(records) == expected_records
+    if records:
+        record = records[0]
+        assert record["method"] == "GET"
+        assert record["path"] == "/cities_by_utc_offset"
+        assert record["params"] == {"offset": 2.0, "api_key": "***"}
+        assert record["status"] == 200
+        assert record["size"] == len(response.content)
+        assert record["latency_ms"] >= 0
+        assert record["ts"] >= before - 1
+        assert "secret" not in path.read_text(encoding="utf-8")
+
+def test_middleware_records_validation_errors(app, tmp_path):
+    # Arrange
+    path = tmp_path / "requests.jsonl"
+    writer = AccessLogWriter(path, flush_interval=0.01)
+    app.add_middleware(AccessLogMiddleware, writer=writer)
+
+    # Act
+    TestClient(app).get("/cities_by_utc_offset?offset=abc")
+    writer.close()
+
+    # Assert
+    assert read_records(path)[0]["status"] == 422
+
+def test_writer_survives_records_after_close_and_bad_records(tmp_path):
+    # Arrange
+    path = tmp_path / "requests.jsonl"
+    writer = AccessLogWriter(path, flush_interval=0.01)
+    writer.submit({"i": 0})
+    writer.close()
+
+    # Act
+    writer.submit({"i": 1})
+    writer.submit({"bad": object()})
+    writer.submit({"i": 2})
+    writer.close()
+
+    # Assert
+    assert [r["i"] for r in read_records(path)] == [0, 1, 2]
+    assert writer.dropped == 1
+
+def test_writer_close_does_not_block_on_full_queue(tmp_path):
+    # Arrange
+    path = tmp_path / "requests.jsonl"
+    writer = AccessLogWriter(path, queue_size=5, batch_size=2, flush_interval=0.01)
+    writer._start()
+    for i in range(5):
+        writer._queue.put({"i": i})
+
+    # Act
+    started = time.monotonic()
+    writer.close()
+
+    # Assert
+    assert time.monotonic() - started < 2
+    assert [r["i"] for r in read_records(path)] == list(range(5))
+
+@pytest.mark.parametrize(
+    "content, content_type, max_body_bytes, expected_fields, description",
+    [
+        (b'{"points":[]}', "application/json", 1024, {"body": '{"points":[]}'}, "text body"),
+        (b"\x81\xa1a\x01", "application/msgpack", 1024, {"body_b64": "gaFhAQ=="}, "binary body"),
+        (b'{"points":[]}', "application/json", 4, {"body_omitted": True}, "body over the limit"),
+    ],
+    ids=["text", "binary", "omitted"]
+)
+def test_middleware_records_request_bodies(tmp_path, content, content_type, max_body_bytes, expected_fields, description):
+    # Arrange
+    app = FastAPI()
+
+    @app.post("/cities_nearest_batch")
+    async def cities_nearest_batch(request: Request):
+        return {"size": len(await request.body())}
+
+    path = tmp_path / "requests.jsonl"
+    writer = AccessLogWriter(path, flush_interval=0.01)
+    app.add_middleware(AccessLogMiddleware, writer=writer, max_body_bytes=max_body_bytes)
+
+    # Act
+    response = TestClient(app).post(
+        "/cities_nearest_batch", content=content, headers={"Content-Type": content_type}
+    )
+    writer.close()
+
+    # Assert
+    record = read_records(path)[0]
+    assert response.json() == {"size": len(content)}, f"Failed: {description}"
+    assert record["content_type"] == content_type, f"Failed: {description}"
+    assert {key: record[key] for key in expected_fields} == expected_fields, f"Failed: {description}"
@@ -0,0 +1,292 @@
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+from utils.cache import (
+    CacheBackendError,
+    LocalDiskCache,
+    RedisCache,
+    TieredCache,
+    make_shared_backend,
+    normalize_args,
+)
+
+class StandInRedisHandler(socketserver.StreamRequestHandler):
+    """
+    Speaks just enough RESP for GET, SET (with EX), SELECT and PING.
+    """
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        parts = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            parts.append(self.rfile.read(length + 2)[:-2])
+        return parts
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            name = command[0].upper()
+            self.server.commands.append(name)
+            if name == b"GET":
+                value = store.get(command[1])
+                reply = b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+            elif name == b"SET":
+                store[command[1]] = command[2]
+                reply = b"+OK\r\n"
+            elif name in (b"SELECT", b"PING"):
+                reply = b"+OK\r\n"
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+@pytest.fixture
+def redis_server():
+    # Arrange
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StandInRedisHandler)
+    server.daemon_threads = True
+    server.store = {}
+    server.commands = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+@pytest.mark.parametrize(
+    "args, other_args, expected_equal, description",
+    [
+        ((1,), (1.0,), True, "int and float"),
+        ((True, None), (True, None), True, "bool and none"),
+        ((True,), (1,), False, "bool is not a number"),
+        (("europe",), ("Europe",), False, "strings kept as is"),
+    ],
+    ids=["int-float", "bool-none", "bool-vs-int", "case-sensitive"]
+)
+def test_normalize_args(args, other_args, expected_equal, description):
+    # Act & Assert
+    assert (normalize_args(args) == normalize_args(other_args)) is expected_equal, f"Failed: {description}"
+
+@pytest.mark.parametrize(
+    "url, expected_type, description",
+    [
+        (None, type(None), "disabled"),
+        ("", type(None), "empty"),
+        ("redis://localhost:6380/2", RedisCache, "redis"),
+        ("file:///tmp/timestamp-api-cache-test", LocalDiskCache, "disk"),
+    ],
+    ids=["none", "empty", "redis", "disk"]
+)
+def test_make_shared_backend(url, expected_type, description):
+    # Act & Assert
+    assert isinstance(make_shared_backend(url), expected_type), f"Failed: {description}"
+
+def test_make_shared_backend_unsupported():
+    # Act & Assert
+    with pytest.raises(ValueError, match="Unsupported cache backend URL"):
+        make_shared_backend("memcached://localhost")
+
+def test_redis_cache_round_trip(redis_server):
+    # Arrange
+    cache = RedisCache(port=redis_server.server_address[1], db=1, ttl=60, timeout=1)
+
+    # Act
+    cache.set("key", b"value")
+
+    # Assert
+    assert cache.get("key") == b"value"
+    assert cache.get("missing") is None
+    assert redis_server.commands[0] == b"SELECT"
+
+def test_redis_cache_unreachable():
+    # Arrange
+    cache = RedisCache(port=unused_port(), timeout=0.05)
+
+    # Act & Assert
+    with pytest.raises(CacheBackendError):
+        cache.get("key")
+
+@pytest.mark.parametrize(
+    "ttl, sleep, expected, description",
+    [(None, 0, b"value", "no ttl"), (0.01, 0.05, None, "expired")],
+    ids=["no-ttl", "expired"]
+)
+def test_local_disk_cache(tmp_path, ttl, sleep, expected, description):
+    # Arrange
+    cache = LocalDiskCache(tmp_path, ttl=ttl)
+    cache.set("key", b"value")
+    time.sleep(sleep)
+
+    # Act & Assert
+    assert cache.get("key") == expected, f"Failed: {description}"
+    assert cache.get("missing") is None
+
+def test_tiered_cache_l1_hit():
+    # Arrange
+    calls = []
+
+    def tz_region_cities(region):
+        calls.append(region)
+        return {"region": region}
+
+    cache = TieredCache(version=lambda: "v1")
+
+    # Act
+    results = [cache.call(tz_region_cities, "europe") for _ in range(3)]
+
+    # Assert
+    assert results == [{"region": "europe"}] * 3
+    assert calls == ["europe"]
+    assert cache.stats["l1_hits"] == 2
+
+def test_tiered_cache_shared_across_instances(redis_server):
+    # Arrange
+    calls = []
+
+    def cities_by_utc_offset(offset):
+        calls.append(offset)
+        return {"cities": [offset]}
+
+    port = redis_server.server_address[1]
+    first = TieredCache(version=lambda: "v1", shared=RedisCache(port=port, timeout=1))
+    second = TieredCache(version=lambda: "v1", shared=RedisCache(port=port, timeout=1))
+
+    # Act
+    first.call_shared(cities_by_utc_offset, 1)
+    assert wait_for(lambda: len(redis_server.store) == 1)
+    result = second.call_shared(cities_by_utc_offset, 1.0)
+
+    # Assert
+    assert result == {"cities": [1]}
+    assert calls == [1]
+    assert second.stats["l2_hits"] == 1
+
+def test_tiered_cache_version_is_part_of_key(tmp_path):
+    # Arrange
+    version = {"value": "v1"}
+    calls = []
+    cache = TieredCache(version=lambda: version["value"], shared=LocalDiskCache(tmp_path))
+
+    def tz_regions():
+        calls.append(version["value"])
+        return [version["value"]]
+
+    # Act
+    cache.call_shared(tz_regions)
+    version["value"] = "v2"
+    result = cache.call_shared(tz_regions)
+
+    # Assert
+    assert result == ["v2"]
+    assert calls == ["v1", "v2"]
+
+def test_tiered_cache_call_skips_shared_tier():
+    # Arrange
+    class Unreachable:
+        def get(self, key):
+            raise AssertionError("call must not read the shared tier")
+
+        def set(self, key, data):
+            raise AssertionError("call must not write the shared tier")
+
+    cache = TieredCache(version=lambda: "v1", shared=Unreachable())
+
+    # Act
+    results = [cache.call(lambda x: {"x": x}, 1) for _ in range(2)]
+
+    # Assert
+    assert results == [{"x": 1}] * 2
+    assert cache.stats == {"l1_hits": 1, "l2_hits": 0, "misses": 1, "l2_errors": 0}
+    assert cache._writer is None
+
+def test_tiered_cache_degrades_when_shared_tier_fails():
+    # Arrange
+    cache = TieredCache(
+        version=lambda: "v1",
+        shared=RedisCache(port=unused_port(), timeout=0.05),
+        breaker_seconds=60,
+    )
+
+    # Act
+    started = time.monotonic()
+    results = [cache.call_shared(lambda x: {"x": x}, i) for i in range(20)]
+    elapsed = time.monotonic() - started
+
+    # Assert
+    assert results == [{"x": i} for i in range(20)]
+    assert cache.stats["l2_errors"] == 1
+    assert elapsed < 0.5
+
+def test_tiered_cache_does_not_cache_errors():
+    # Arrange
+    cache = TieredCache()
+    calls = []
+
+    def failing(offset):
+        calls.append(offset)
+        raise ValueError("UTC offset must be between -12 and 14.")
+
+    # Act & Assert
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.call(failing, 99)
+    assert calls == [99, 99]
+
+@pytest.mark.parametrize(
+    "stored, description",
+    [
+        (b"{not json", "truncated json"),
+        (b"\xff\xfe\x00", "not utf-8"),
+    ],
+    ids=["truncated", "binary"]
+)
+def test_tiered_cache_corrupt_shared_value_is_a_miss(tmp_path, stored, description):
+    # Arrange
+    shared = LocalDiskCache(tmp_path)
+    cache = TieredCache(version=lambda: "v1", shared=shared)
+
+    def tz_regions():
+        return ["computed"]
+
+    shared.set(cache.key(tz_regions, ()), stored)
+
+    # Act
+    result = cache.call_shared(tz_regions)
+
+    # Assert
+    assert result == ["computed"], f"Failed: {description}"
+    assert cache.stats["misses"] == 1, f"Failed: {description}"
+    assert cache.stats["l2_errors"] == 1, f"Failed: {description}"
+
+def test_local_disk_cache_short_file_is_a_miss(tmp_path):
+    # Arrange
+    cache = LocalDiskCache(tmp_path)
+    path = cache._path("key")
+    path.write_bytes(b"\x00\x01")
+
+    # Act
+    result = cache.get("key")
+
+    # Assert
+    assert result is None
+    assert not path.exists()
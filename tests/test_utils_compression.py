@@ -0,0 +1,162 @@
+import gzip
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from utils import compression
+from utils.compression import (
+    BROTLI,
+    GZIP,
+    CompressionMiddleware,
+    PrecompressedCache,
+    compress,
+    negotiate_encoding,
+)
+
+BODY = b'{"cities":[' + b'{"name":"New_York","utc_offset":-5},' * 100 + b"]}"
+
+@pytest.mark.parametrize(
+    "accept_encoding, brotli_installed, expected, description",
+    [
+        (None, True, None, "no header"),
+        ("identity", True, None, "identity only"),
+        ("gzip", True, GZIP, "gzip only"),
+        ("gzip, deflate, br", True, BROTLI, "brotli preferred on equal quality"),
+        ("gzip;q=1.0, br;q=0.5", True, GZIP, "gzip preferred by q"),
+        ("br;q=0, gzip", True, GZIP, "brotli refused"),
+        ("*", True, BROTLI, "wildcard"),
+        ("br", False, None, "brotli not installed"),
+        ("gzip, br", False, GZIP, "brotli not installed falls back to gzip"),
+    ],
+    ids=[
+        "no-header",
+        "identity",
+        "gzip",
+        "brotli-preferred",
+        "gzip-by-q",
+        "brotli-refused",
+        "wildcard",
+        "brotli-missing",
+        "brotli-missing-gzip",
+    ]
+)
+def test_negotiate_encoding(accept_encoding, brotli_installed, expected, description, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(compression, "_brotli", {} if brotli_installed else {"module": None})
+
+    # Act
+    result = negotiate_encoding(accept_encoding)
+
+    # Assert
+    assert result == expected, f"Failed: {description}"
+
+@pytest.mark.parametrize(
+    "encoding, decompress",
+    [(GZIP, gzip.decompress), (BROTLI, brotli.decompress)],
+    ids=["gzip", "brotli"]
+)
+def test_compress_round_trip(encoding, decompress):
+    # Act
+    result = compress(BODY, encoding)
+
+    # Assert
+    assert len(result) < len(BODY)
+    assert decompress(result) == BODY
+
+def test_precompressed_cache_variants_and_threshold():
+    # Arrange
+    cache = PrecompressedCache(minimum_size=100)
+
+    # Act
+    large = cache.put("large", BODY)
+    small = cache.put("small", b"{}")
+
+    # Assert
+    assert set(large) == {None, GZIP, BROTLI}
+    assert gzip.decompress(large[GZIP]) == BODY
+    assert small == {None: b"{}"}
+    assert cache.get("large") is large
+
+def test_precompressed_cache_invalidated_on_version_change():
+    # Arrange
+    version = {"value": "v1"}
+    cache = PrecompressedCache(version=lambda: version["value"])
+    cache.put("key", BODY)
+
+    # Act
+    version["value"] = "v2"
+
+    # Assert
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+def test_precompressed_cache_evicts_least_recently_used():
+    # Arrange
+    cache = PrecompressedCache(max_entries=2)
+    cache.put("a", b"a")
+    cache.put("b", b"b")
+    cache.get("a")
+
+    # Act
+    cache.put("c", b"c")
+
+    # Assert
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+@pytest.fixture
+def client():
+    # Arrange
+    app = FastAPI()
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(BODY, media_type="application/json")
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse(b"{}", media_type="application/json")
+
+    @app.get("/image")
+    def image():
+        return PlainTextResponse(BODY, media_type="image/png")
+
+    @app.get("/precompressed")
+    def precompressed():
+        return PlainTextResponse(gzip.compress(BODY), media_type="application/json", headers={"content-encoding": "gzip"})
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([BODY, BODY]), media_type="application/json")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    return TestClient(app)
+
+@pytest.mark.parametrize(
+    "path, accept_encoding, expected_encoding, description",
+    [
+        ("/large", "gzip", "gzip", "large json gzip"),
+        ("/large", "br", "br", "large json brotli"),
+        ("/large", "identity", None, "identity requested"),
+        ("/small", "gzip", None, "below threshold"),
+        ("/image", "gzip", None, "not compressible"),
+        ("/precompressed", "gzip, br", "gzip", "already encoded"),
+        ("/stream", "gzip", None, "streamed response"),
+    ],
+    ids=["gzip", "brotli", "identity", "small", "image", "already-encoded", "stream"]
+)
+def test_compression_middleware(client, path, accept_encoding, expected_encoding, description):
+    # Act
+    response = client.get(path, headers={"accept-encoding": accept_encoding})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == expected_encoding, f"Failed: {description}"
+    assert response.content in (BODY, BODY * 2, b"{}")
+    if expected_encoding and path == "/large":
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(BODY)
@@ -0,0 +1,71 @@
+import io
+
+import pytest
+
+from utils import export
+
+pyarrow = pytest.importorskip("pyarrow")
+parquet = pytest.importorskip("pyarrow.parquet")
+
+CITIES = [
+    {"name": "London", "latitude": 51.5074, "longitude": -0.1278, "utc_offset": 0, "dst": True, "region": "europe"},
+    {"name": "Kolkata", "latitude": 22.5726, "longitude": 88.3639, "utc_offset": 5.5, "dst": False, "region": "asia"},
+    {"name": "Paris", "latitude": 48.8566, "longitude": 2.3522, "utc_offset": 1, "region": "europe"},
+]
+LOCATIONS = {
+    "asia": {"min_latitude": -10.0, "max_latitude": 80.0, "min_longitude": 25.0, "max_longitude": 180.0},
+    "europe": {"min_latitude": 35.0, "max_latitude": 72.0, "min_longitude": -25.0, "max_longitude": 45.0},
+}
+
+def read(buffer, file_format):
+    if file_format == "parquet":
+        return parquet.read_table(io.BytesIO(buffer.to_pybytes()))
+    return pyarrow.ipc.open_stream(buffer).read_all()
+
+def test_cities_table_columns():
+    # Act
+    table = export.cities_table(pyarrow, CITIES)
+
+    # Assert
+    assert table.column_names == ["name", "latitude", "longitude", "utc_offset", "dst", "region"]
+    assert table.column("utc_offset").to_pylist() == [0.0, 5.5, 1.0]
+    assert table.column("dst").to_pylist() == [True, False, False]
+    assert pyarrow.types.is_dictionary(table.schema.field("region").type)
+    assert table.column("region").to_pylist() == ["europe", "asia", "europe"]
+
+def test_regions_table_columns():
+    # Act
+    table = export.regions_table(pyarrow, LOCATIONS)
+
+    # Assert
+    assert table.to_pylist() == [{"region": name, **bounds} for name, bounds in LOCATIONS.items()]
+
+@pytest.mark.parametrize(
+    "file_format, description",
+    [
+        ("arrow", "arrow ipc stream"),
+        ("parquet", "parquet file"),
+    ],
+    ids=["arrow", "parquet"]
+)
+def test_serialize_round_trip(file_format, description):
+    # Arrange
+    table = export.cities_table(pyarrow, CITIES)
+
+    # Act
+    buffer = export.serialize(pyarrow, table, file_format, metadata={"dataset_version": "abc"})
+
+    # Assert
+    result = read(buffer, file_format)
+    assert result.to_pylist() == table.to_pylist(), f"Failed: {description}"
+    assert result.schema.metadata[b"dataset_version"] == b"abc", f"Failed: {description}"
+
+def test_get_pyarrow_missing(monkeypatch):
+    # Arrange
+    def fail(name):
+        raise ImportError(name)
+    monkeypatch.setattr(export.importlib, "import_module", fail)
+
+    # Act & Assert
+    with pytest.raises(RuntimeError, match="optional 'pyarrow' package"):
+        export.get_pyarrow()
@@ -1,5 +1,22 @@
+import random
+from math import pi
+
 import pytest
-from utils.geo import haversine
+
+from utils import geo
+from utils.geo import (
+    haversine,
+    unit_vector,
+    chord_squared,
+    chord_squared_from_km,
+    in_bbox,
+    bbox_area_fraction,
+    cap_area_fraction,
+    distance_rows,
+    great_circle_points,
+    point_in_polygon,
+    polygon_bbox,
+)
 
 @pytest.mark.parametrize(
     "lat1, lon1, lat2, lon2, expected, description",
@@ -14,6 +31,8 @@ from utils.geo import haversine
         (51.5074, -0.1278, 48.8566, 2.3522, 343.556, "London to Paris"),
         # Happy path: antipodal points
         (0, 0, 0, 180, 20015.087, "antipodal points"),
+        # Edge case: rounding pushes the haversine term past 1
+        (51.0579, 115.3749, -51.0579, -64.6251, 20015.087, "near-antipodal rounding"),
     ],
     ids=[
         "same-point",
@@ -21,6 +40,7 @@ from utils.geo import haversine
         "pole-to-pole",
         "london-to-paris",
         "antipodal",
+        "antipodal-rounding",
     ]
 )
 def test_haversine_happy_and_edge_cases(lat1, lon1, lat2, lon2, expected, description):
@@ -60,3 +80,219 @@ def test_haversine_error_cases(lat1, lon1, lat2, lon2, error_type, description):
     # Act & Assert
     with pytest.raises(error_type, match=""):
         haversine(lat1, lon1, lat2, lon2)
+
+
+@pytest.mark.parametrize(
+    "lat1, lon1, lat2, lon2, description",
+    [
+        (0, 0, 0, 0, "same point"),
+        (0, 0, 0, 1, "equator, 1 degree longitude"),
+        (51.5074, -0.1278, 48.8566, 2.3522, "London to Paris"),
+        (90, 0, -90, 0, "north pole to south pole"),
+        (-33.9249, 18.4241, 35.6895, 139.6917, "Cape Town to Tokyo"),
+    ],
+    ids=[
+        "same-point",
+        "equator-1deg-lon",
+        "london-to-paris",
+        "pole-to-pole",
+        "capetown-to-tokyo",
+    ]
+)
+def test_chord_squared_matches_haversine(lat1, lon1, lat2, lon2, description):
+    # Act
+    chord = chord_squared(unit_vector(lat1, lon1), unit_vector(lat2, lon2))
+    expected = chord_squared_from_km(haversine(lat1, lon1, lat2, lon2))
+
+    # Assert
+    assert pytest.approx(chord, abs=1e-12) == expected, f"Failed: {description}"
+
+
+@pytest.mark.parametrize(
+    "distance_km, expected, description",
+    [
+        (0, 0.0, "zero distance"),
+        (-5, 0.0, "negative distance is clamped"),
+        (20015.087, 4.0, "half circumference"),
+        (50000, 4.0, "beyond antipode is clamped"),
+    ],
+    ids=["zero", "negative", "half-circumference", "beyond-antipode"]
+)
+def test_chord_squared_from_km(distance_km, expected, description):
+    # Act
+    result = chord_squared_from_km(distance_km)
+
+    # Assert
+    assert pytest.approx(result, abs=1e-6) == expected, f"Failed: {description}"
+
+
+EUROPE = {"min_latitude": 35.0, "max_latitude": 65.0, "min_longitude": -20.0, "max_longitude": 50.0}
+PACIFIC = {"min_latitude": -30.0, "max_latitude": 10.0, "min_longitude": 170.0, "max_longitude": -170.0}
+
+
+@pytest.mark.parametrize(
+    "lat, lon, bbox, expected, description",
+    [
+        (51.5, -0.1, EUROPE, True, "London in europe"),
+        (35.0, 50.0, EUROPE, True, "corner is inclusive"),
+        (20.0, 0.0, EUROPE, False, "south of europe"),
+        (-18.0, 178.0, PACIFIC, True, "west of the antimeridian"),
+        (-14.0, -171.0, PACIFIC, True, "east of the antimeridian"),
+        (0.0, 0.0, PACIFIC, False, "outside a wrapping box"),
+    ],
+    ids=["inside", "corner", "outside", "wrap-west", "wrap-east", "wrap-outside"]
+)
+def test_in_bbox(lat, lon, bbox, expected, description):
+    # Act & Assert
+    assert in_bbox(lat, lon, bbox) is expected, f"Failed: {description}"
+
+
+@pytest.mark.parametrize(
+    "bbox, expected, description",
+    [
+        ({"min_latitude": -90, "max_latitude": 90, "min_longitude": -180, "max_longitude": 180}, 1.0, "whole sphere"),
+        ({"min_latitude": 0, "max_latitude": 90, "min_longitude": -180, "max_longitude": 180}, 0.5, "hemisphere"),
+        ({"min_latitude": 0, "max_latitude": 90, "min_longitude": 170, "max_longitude": -170}, 0.5 * 20 / 360, "wrapping box"),
+    ],
+    ids=["sphere", "hemisphere", "wrapping"]
+)
+def test_bbox_area_fraction(bbox, expected, description):
+    # Act & Assert
+    assert pytest.approx(bbox_area_fraction(bbox)) == expected, f"Failed: {description}"
+
+
+@pytest.mark.parametrize(
+    "radius_km, expected, description",
+    [
+        (0, 0.0, "empty cap"),
+        (10007.543, 0.5, "quarter circumference is a hemisphere"),
+        (50000, 1.0, "clamped to the whole sphere"),
+    ],
+    ids=["zero", "hemisphere", "clamped"]
+)
+def test_cap_area_fraction(radius_km, expected, description):
+    # Act & Assert
+    assert pytest.approx(cap_area_fraction(radius_km), abs=1e-6) == expected, f"Failed: {description}"
+
+
+SQUARE_WITH_HOLE = [
+    [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)],
+    [(4, 4), (6, 4), (6, 6), (4, 6), (4, 4)],
+]
+
+
+@pytest.mark.parametrize(
+    "lat, lon, rings, expected, description",
+    [
+        (2, 2, SQUARE_WITH_HOLE, True, "inside the exterior ring"),
+        (5, 5, SQUARE_WITH_HOLE, False, "inside the hole"),
+        (5, 15, SQUARE_WITH_HOLE, False, "outside"),
+        (1, 5, [[(0, 0), (10, 0), (5, 10), (0, 0)]], True, "inside a triangle"),
+        (9, 1, [[(0, 0), (10, 0), (5, 10), (0, 0)]], False, "beside a triangle"),
+    ],
+    ids=["inside", "hole", "outside", "triangle-inside", "triangle-outside"]
+)
+def test_point_in_polygon(lat, lon, rings, expected, description):
+    # Act & Assert
+    assert point_in_polygon(lat, lon, rings) is expected, f"Failed: {description}"
+
+
+def test_polygon_bbox():
+    # Act
+    bbox = polygon_bbox(SQUARE_WITH_HOLE)
+
+    # Assert
+    assert bbox == {"min_latitude": 0, "max_latitude": 10, "min_longitude": 0, "max_longitude": 10}
+
+
+@pytest.mark.parametrize(
+    "use_numpy",
+    [True, False],
+    ids=["numpy", "pure-python"]
+)
+def test_distance_rows_matches_haversine(monkeypatch, use_numpy):
+    # Arrange
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(geo, "get_numpy", lambda: None)
+    rng = random.Random(5)
+    origins = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(23)]
+    destinations = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(17)] + [origins[0]]
+
+    # Act
+    chunks = list(distance_rows(origins, destinations, chunk_rows=5))
+
+    # Assert
+    assert [len(chunk) for chunk in chunks] == [5, 5, 5, 5, 3]
+    matrix = [row for chunk in chunks for row in chunk]
+    for (lat1, lon1), row in zip(origins, matrix):
+        assert row == pytest.approx(
+            [haversine(lat1, lon1, lat2, lon2) for lat2, lon2 in destinations], abs=0.006
+        )
+    assert matrix[0][-1] == 0.0
+
+
+@pytest.mark.parametrize(
+    "use_numpy",
+    [True, False],
+    ids=["numpy", "pure-python"]
+)
+def test_distance_rows_antipodal(monkeypatch, use_numpy):
+    # Arrange
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(geo, "get_numpy", lambda: None)
+    # Rounding makes the haversine term 1.0000000000000002 for these points
+    origins = [(86.9738, 33.5461), (51.0579, 115.3749)]
+    destinations = [(-86.9738, -146.4539), (-51.0579, -64.6251)]
+
+    # Act
+    matrix = [row for chunk in distance_rows(origins, destinations) for row in chunk]
+
+    # Assert
+    half_circumference = round(pi * geo.EARTH_RADIUS_KM, 2)
+    assert [matrix[0][0], matrix[1][1]] == [half_circumference, half_circumference]
+
+
+@pytest.mark.parametrize(
+    "lat1, lon1, lat2, lon2, description",
+    [
+        (51.5074, -0.1278, 40.7128, -74.0060, "london to new york"),
+        (-18.0, 178.0, -14.0, -171.0, "across the antimeridian"),
+        (0.0, 0.0, 89.0, 90.0, "towards the pole"),
+    ],
+    ids=["atlantic", "antimeridian", "polar"]
+)
+def test_great_circle_points_lie_on_the_path(lat1, lon1, lat2, lon2, description):
+    # Arrange
+    total = haversine(lat1, lon1, lat2, lon2)
+    fractions = [0, 0.1, 0.25, 0.5, 0.9, 1]
+
+    # Act
+    points = great_circle_points(lat1, lon1, lat2, lon2, fractions)
+
+    # Assert
+    assert points[0] == pytest.approx((lat1, lon1), abs=1e-9), f"Failed: {description}"
+    assert points[-1] == pytest.approx((lat2, lon2), abs=1e-9), f"Failed: {description}"
+    for fraction, (lat, lon) in zip(fractions, points):
+        assert haversine(lat1, lon1, lat, lon) == pytest.approx(fraction * total, abs=1e-6)
+        assert haversine(lat, lon, lat2, lon2) == pytest.approx((1 - fraction) * total, abs=1e-6)
+
+
+@pytest.mark.parametrize(
+    "lat1, lon1, lat2, lon2, expected, description",
+    [
+        (10.0, 20.0, 10.0, 20.0, [(10.0, 20.0), (10.0, 20.0)], "same point"),
+        (0.0, 0.0, 0.0, 180.0, ValueError, "antipodal points"),
+    ],
+    ids=["same-point", "antipodal"]
+)
+def test_great_circle_points_degenerate(lat1, lon1, lat2, lon2, expected, description):
+    # Act & Assert
+    if expected is ValueError:
+        with pytest.raises(ValueError, match="antipodal"):
+            great_circle_points(lat1, lon1, lat2, lon2, [0.5])
+    else:
+        assert great_circle_points(lat1, lon1, lat2, lon2, [0, 1]) == expected, f"Failed: {description}"
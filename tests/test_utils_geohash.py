@@ -0,0 +1,203 @@
+import random
+import struct
+import sys
+
+import pytest
+
+from utils import geohash, indexes
+from utils.geo import haversine
+from utils.geohash import (
+    GeohashTable,
+    build_table,
+    cell_bounds,
+    cell_radius_km,
+    geohash_cell,
+    geohash_encode,
+    load_table,
+    write_table,
+)
+from utils.indexes import CityIndex
+from utils.timezones import dataset_version
+
+def random_cities(seed, count):
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"city-{i}",
+            "latitude": rng.uniform(-90, 90),
+            "longitude": rng.uniform(-180, 180),
+            "utc_offset": 0,
+            "dst": False,
+            "region": "test",
+        }
+        for i in range(count)
+    ]
+
+def brute_force_nearest(cities, latitude, longitude, count):
+    distances = [
+        (haversine(latitude, longitude, c["latitude"], c["longitude"]), i)
+        for i, c in enumerate(cities)
+    ]
+    distances.sort(key=lambda x: x[0])
+    return distances[:count]
+
+@pytest.fixture(scope="module")
+def cities():
+    return random_cities(30, 150)
+
+@pytest.fixture(scope="module")
+def table_path(cities, tmp_path_factory):
+    path = tmp_path_factory.mktemp("geohash") / "nearest.bin"
+    write_table(path, build_table(CityIndex(cities), dataset_version(cities), precision=2, count=4))
+    return path
+
+@pytest.mark.parametrize(
+    "lat, lon, precision, expected, description",
+    [
+        (57.64911, 10.40744, 11, "u4pruydqqvj", "reference geohash"),
+        (0.0, 0.0, 1, "s", "origin"),
+        (-90.0, -180.0, 2, "00", "south-west corner"),
+        (90.0, 180.0, 2, "zz", "north-east corner"),
+    ],
+    ids=["reference", "origin", "south-west", "north-east"]
+)
+def test_geohash_encode(lat, lon, precision, expected, description):
+    # Act & Assert
+    assert geohash_encode(lat, lon, precision) == expected, f"Failed: {description}"
+
+@pytest.mark.parametrize(
+    "lat, lon, precision",
+    [(51.5074, -0.1278, 3), (-33.9249, 18.4241, 4), (89.99, 179.99, 2), (-90.0, -180.0, 3)],
+    ids=["london", "cape-town", "near-north-pole", "south-west-corner"]
+)
+def test_cell_bounds_contain_point(lat, lon, precision):
+    # Act
+    min_lat, max_lat, min_lon, max_lon = cell_bounds(geohash_cell(lat, lon, precision), precision)
+
+    # Assert
+    assert min_lat <= lat <= max_lat
+    assert min_lon <= lon <= max_lon
+
+def test_cell_radius_bounds_every_point_of_cell():
+    # Arrange
+    rng = random.Random(31)
+
+    for _ in range(50):
+        bounds = cell_bounds(rng.randrange(1 << 10), 2)
+        min_lat, max_lat, min_lon, max_lon = bounds
+        center = ((min_lat + max_lat) / 2, (min_lon + max_lon) / 2)
+
+        # Act
+        radius = cell_radius_km(bounds)
+
+        # Assert
+        for _ in range(20):
+            point = (rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon))
+            assert haversine(*center, *point) <= radius + 1e-9
+
+def test_table_lookup_matches_brute_force(cities, table_path):
+    # Arrange
+    table = load_table(table_path, dataset_version(cities), len(cities))
+    index = CityIndex(cities, table=table)
+    rng = random.Random(32)
+
+    for _ in range(500):
+        latitude, longitude = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        for count in (1, 4):
+            # Act
+            result = index.nearest(latitude, longitude, count)
+
+            # Assert
+            assert result == brute_force_nearest(cities, latitude, longitude, count)
+
+def test_table_overflow_falls_back_to_full_search(cities, tmp_path):
+    # Arrange
+    path = tmp_path / "overflow.bin"
+    write_table(path, build_table(CityIndex(cities), dataset_version(cities), precision=1, count=4, max_candidates=1))
+    table = GeohashTable.open(path)
+    index = CityIndex(cities, table=table)
+
+    # Act
+    result = index.nearest(10.0, 10.0, 4)
+
+    # Assert
+    assert table.candidates(10.0, 10.0) is None
+    assert result == brute_force_nearest(cities, 10.0, 10.0, 4)
+
+@pytest.mark.parametrize(
+    "precision, description",
+    [(0, "whole globe in one cell"), (7, "cell count overflows uint32")],
+    ids=["too-low", "too-high"]
+)
+def test_build_table_rejects_precision(cities, precision, description):
+    # Act & Assert
+    with pytest.raises(ValueError, match="Precision must be between 1 and 6."):
+        build_table(CityIndex(cities), dataset_version(cities), precision=precision)
+
+def test_build_script_rejects_precision(capsys):
+    # Arrange
+    from scripts import build_geohash_table
+
+    # Act & Assert
+    with pytest.raises(SystemExit):
+        build_geohash_table.main(["--precision", "0"])
+    assert "invalid choice" in capsys.readouterr().err
+
+def test_uint32s_reads_little_endian():
+    # Arrange
+    data = memoryview(struct.pack("<3I", 1, 2, 0x01020304))
+
+    # Act & Assert
+    assert list(geohash._uint32s(data)) == [1, 2, 0x01020304]
+
+def test_uint32s_byte_swaps_on_big_endian_hosts(monkeypatch):
+    # Arrange: bytes as a big-endian host lays them out natively
+    data = memoryview(struct.pack("<2I", 1, 0x01020304))
+    native = list(memoryview(data).cast("I"))
+    monkeypatch.setattr(sys, "byteorder", "big")
+
+    # Act
+    result = list(geohash._uint32s(data))
+
+    # Assert: each value is the byte-swapped native read
+    assert result == [
+        struct.unpack("=I", struct.pack("=I", v)[::-1])[0] for v in native
+    ]
+
+@pytest.mark.parametrize(
+    "version_offset, city_count_offset, description",
+    [(1, 0, "different dataset version"), (0, 1, "different city count")],
+    ids=["stale-version", "stale-city-count"]
+)
+def test_load_table_rejects_stale_table(cities, table_path, version_offset, city_count_offset, description):
+    # Arrange
+    version = dataset_version(cities[version_offset:])
+
+    # Act
+    table = load_table(table_path, version, len(cities) + city_count_offset)
+
+    # Assert
+    assert table is None, f"Failed: {description}"
+
+@pytest.mark.parametrize(
+    "content, description",
+    [(None, "missing file"), (b"", "empty file"), (b"NOPE" + b"\0" * 64, "bad magic")],
+    ids=["missing", "empty", "bad-magic"]
+)
+def test_load_table_invalid_file(tmp_path, content, description):
+    # Arrange
+    path = tmp_path / "table.bin"
+    if content is not None:
+        path.write_bytes(content)
+
+    # Act & Assert
+    assert load_table(path, "0" * 16, 0) is None, f"Failed: {description}"
+
+def test_get_city_index_attaches_matching_table(cities, table_path, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(indexes, "DEFAULT_TABLE_PATH", table_path)
+    other = random_cities(33, 10)
+
+    # Act & Assert
+    assert indexes.get_city_index(list(cities)).table is not None
+    assert indexes.get_city_index(other).table is None
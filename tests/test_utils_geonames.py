@@ -0,0 +1,140 @@
+import gzip
+import zipfile
+
+import pytest
+
+from utils.geonames import load_cities_file, zone_offsets, zone_region
+
+
+def geonames_line(geoname_id, name, latitude, longitude, zone):
+    fields = [""] * 19
+    fields[0] = str(geoname_id)
+    fields[1] = name
+    fields[2] = name
+    fields[3] = "Alt,Names,With \"quotes\""
+    fields[4] = str(latitude)
+    fields[5] = str(longitude)
+    fields[17] = zone
+    return "\t".join(fields) + "\n"
+
+
+GEONAMES_ROWS = [
+    (1, "Paris", 48.85341, 2.3488, "Europe/Paris"),
+    (2, "Kolkata", 22.56263, 88.36304, "Asia/Kolkata"),
+    (3, "paris", 48.85345, 2.34882, "Europe/Paris"),
+    (4, "Sydney", -33.86785, 151.20732, "Australia/Sydney"),
+    (5, "Nowhere", 10.0, 10.0, "Mars/Olympus_Mons"),
+    (6, "Broken", "not-a-number", 10.0, "Europe/Paris"),
+    (7, "Outside", 95.0, 10.0, "Europe/Paris"),
+]
+
+
+@pytest.fixture
+def geonames_text():
+    return "".join(geonames_line(*row) for row in GEONAMES_ROWS) + "short\tline\n"
+
+
+@pytest.mark.parametrize(
+    "zone, expected, description",
+    [
+        ("Europe/Paris", (1, True), "whole offset with dst"),
+        ("Asia/Kolkata", (5.5, False), "half hour offset"),
+        ("Australia/Sydney", (10, True), "southern hemisphere dst"),
+        ("Europe/Dublin", (0, True), "negative dst in tzdata"),
+        ("UTC", (0, False), "utc"),
+    ],
+    ids=["paris", "kolkata", "sydney", "dublin", "utc"]
+)
+def test_zone_offsets(zone, expected, description):
+    # Act & Assert
+    assert zone_offsets(zone) == expected, f"Failed: {description}"
+
+
+@pytest.mark.parametrize(
+    "zone, expected",
+    [("Europe/Paris", "europe"), ("America/Argentina/Salta", "america"), ("UTC", "etc")],
+    ids=["europe", "nested", "no-prefix"]
+)
+def test_zone_region(zone, expected):
+    # Act & Assert
+    assert zone_region(zone) == expected
+
+
+@pytest.mark.parametrize(
+    "filename",
+    ["cities15000.txt", "cities15000.txt.gz", "cities15000.zip"],
+    ids=["plain", "gzip", "zip"]
+)
+def test_load_geonames_dump(tmp_path, geonames_text, filename):
+    # Arrange
+    path = tmp_path / filename
+    if filename.endswith(".gz"):
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(geonames_text)
+    elif filename.endswith(".zip"):
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("cities15000.txt", geonames_text)
+    else:
+        path.write_text(geonames_text, encoding="utf-8")
+
+    # Act
+    cities = load_cities_file(path)
+
+    # Assert
+    assert [c["name"] for c in cities] == ["Paris", "Kolkata", "Sydney"]
+    assert cities[1] == {
+        "name": "Kolkata",
+        "latitude": 22.56263,
+        "longitude": 88.36304,
+        "utc_offset": 5.5,
+        "dst": False,
+        "region": "asia",
+    }
+
+
+def test_load_csv(tmp_path):
+    # Arrange
+    path = tmp_path / "cities.csv"
+    path.write_text(
+        "name,latitude,longitude,timezone,population\n"
+        "Auckland,-36.84853,174.76349,Pacific/Auckland,1000\n"
+        "\"Washington, D.C.\",38.89511,-77.03637,America/New_York,2000\n"
+        "Auckland,-36.84853,174.76349,Pacific/Auckland,1000\n",
+        encoding="utf-8",
+    )
+
+    # Act
+    cities = load_cities_file(path)
+
+    # Assert
+    assert [(c["name"], c["utc_offset"], c["region"]) for c in cities] == [
+        ("Washington, D.C.", -5, "america"),
+        ("Auckland", 12, "pacific"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "first, second, expected_count, description",
+    [
+        (("Paris", 48.85, 2.349999), ("paris", 48.85, 2.350001), 1, "0.2 m apart across a grid cell boundary"),
+        (("Paris", 48.85, 2.35), ("Paris", 48.8504, 2.35), 1, "45 m apart"),
+        (("Paris", 48.85, 2.35), ("Paris", 48.853, 2.35), 2, "330 m apart"),
+        (("Paris", 48.85, 2.35), ("Lutetia", 48.85, 2.35), 2, "different names"),
+        (("Taveuni", -16.8, 179.9997), ("Taveuni", -16.8, -179.9997), 1, "across the antimeridian"),
+        (("Pole", 89.999, 0.0), ("Pole", 89.999, 3.0), 1, "3 degrees of longitude near the pole"),
+    ],
+    ids=["cell-boundary", "close", "apart", "other-name", "antimeridian", "pole"]
+)
+def test_load_deduplicates_by_distance(tmp_path, first, second, expected_count, description):
+    # Arrange
+    path = tmp_path / "cities.txt"
+    path.write_text(
+        geonames_line(1, *first, "Etc/UTC") + geonames_line(2, *second, "Etc/UTC"),
+        encoding="utf-8",
+    )
+
+    # Act
+    cities = load_cities_file(path)
+
+    # Assert
+    assert len(cities) == expected_count, f"Failed: {description}"
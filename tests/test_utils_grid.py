@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from utils.geo import in_bbox
+from utils.grid import SpatialGrid
+
+
+def make_grid(rng, count, cell_degrees):
+    latitudes = [rng.uniform(-90, 90) for _ in range(count)]
+    longitudes = [rng.uniform(-180, 180) for _ in range(count)]
+    # Points exactly on cell edges, poles and the antimeridian
+    latitudes += [-90.0, 90.0, 0.0, 10.0, -45.0]
+    longitudes += [-180.0, 180.0, 180.0, -180.0, 5.0]
+    return SpatialGrid(latitudes, longitudes, cell_degrees=cell_degrees)
+
+
+def brute_force(grid, bbox):
+    return [
+        i for i, (lat, lon) in enumerate(zip(grid.latitudes, grid.longitudes))
+        if in_bbox(lat, lon, bbox)
+    ]
+
+
+@pytest.mark.parametrize(
+    "cell_degrees",
+    [1.0, 5.0, 7.0, 45.0],
+    ids=["1-degree", "5-degrees", "7-degrees", "45-degrees"]
+)
+def test_query_matches_brute_force(cell_degrees):
+    # Arrange
+    rng = random.Random(3)
+    grid = make_grid(rng, 3000, cell_degrees)
+    boxes = [
+        {"min_latitude": -90, "max_latitude": 90, "min_longitude": -180, "max_longitude": 180},
+        {"min_latitude": -10, "max_latitude": 10, "min_longitude": 170, "max_longitude": -170},
+        {"min_latitude": 0, "max_latitude": 10, "min_longitude": 0, "max_longitude": 10},
+        {"min_latitude": 5, "max_latitude": 5, "min_longitude": 6, "max_longitude": 5},
+    ]
+    for _ in range(300):
+        south = rng.uniform(-90, 90)
+        boxes.append({
+            "min_latitude": south,
+            "max_latitude": rng.uniform(south, 90),
+            "min_longitude": rng.uniform(-180, 180),
+            "max_longitude": rng.uniform(-180, 180),
+        })
+
+    for bbox in boxes:
+        # Act
+        result = grid.query(bbox)
+
+        # Assert
+        assert result == brute_force(grid, bbox), bbox
+        assert len(result) <= grid.count(bbox) <= len(grid.latitudes), bbox
+    assert grid.count(boxes[0]) == len(grid.latitudes)
+
+
+def test_query_empty_grid():
+    # Arrange
+    grid = SpatialGrid([], [])
+
+    # Act & Assert
+    assert grid.query({"min_latitude": -90, "max_latitude": 90, "min_longitude": -180, "max_longitude": 180}) == []
+    assert grid.count({"min_latitude": -90, "max_latitude": 90, "min_longitude": -180, "max_longitude": 180}) == 0
@@ -0,0 +1,243 @@
+import random
+
+import pytest
+
+from utils.geo import haversine, chord_squared_from_km
+from utils import indexes
+from utils.indexes import CityIndex, get_city_index, radius_bbox
+from utils.geo import in_bbox
+from utils.timezones import load_all_timezones
+
+
+def brute_force_nearest(timezones, latitude, longitude, count):
+    distances = [
+        (haversine(latitude, longitude, tz["latitude"], tz["longitude"]), i)
+        for i, tz in enumerate(timezones)
+    ]
+    distances.sort(key=lambda x: x[0])
+    return distances[:count]
+
+
+def brute_force_within(timezones, latitude, longitude, radius_km):
+    return [
+        (dist, i)
+        for i, tz in enumerate(timezones)
+        if (dist := haversine(latitude, longitude, tz["latitude"], tz["longitude"])) <= radius_km
+    ]
+
+
+def random_cities(rng, count):
+    return [
+        {
+            "name": f"city-{i}",
+            "latitude": rng.uniform(-90, 90),
+            "longitude": rng.uniform(-180, 180),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(scope="module")
+def real_timezones():
+    return load_all_timezones()
+
+
+@pytest.mark.parametrize(
+    "seed, count",
+    [(1, 1), (2, 4), (3, 10)],
+    ids=["k1", "k4", "k10"]
+)
+def test_nearest_matches_brute_force_on_dataset(seed, count, real_timezones):
+    # Arrange
+    rng = random.Random(seed)
+    index = CityIndex(real_timezones)
+
+    for _ in range(300):
+        latitude = rng.uniform(-90, 90)
+        longitude = rng.uniform(-180, 180)
+
+        # Act
+        result = index.nearest(latitude, longitude, count)
+
+        # Assert
+        assert result == brute_force_nearest(real_timezones, latitude, longitude, count)
+
+
+@pytest.mark.parametrize(
+    "seed, radius_km",
+    [(4, 0), (5, 250), (6, 2500), (7, 25000)],
+    ids=["radius-0", "radius-250", "radius-2500", "radius-beyond-antipode"]
+)
+def test_within_matches_brute_force_on_dataset(seed, radius_km, real_timezones):
+    # Arrange
+    rng = random.Random(seed)
+    index = CityIndex(real_timezones)
+    chord_limit = chord_squared_from_km(radius_km)
+
+    for _ in range(200):
+        latitude = rng.uniform(-90, 90)
+        longitude = rng.uniform(-180, 180)
+
+        # Act
+        result = index.within(latitude, longitude, radius_km, chord_limit)
+
+        # Assert
+        assert result == brute_force_within(real_timezones, latitude, longitude, radius_km)
+
+
+def test_nearest_matches_brute_force_with_duplicates_and_ties():
+    # Arrange
+    rng = random.Random(8)
+    cities = random_cities(rng, 200)
+    # Duplicated coordinates force exact ties that must keep index order
+    cities += [dict(c, name=c["name"] + "-dup") for c in cities[:50]]
+    index = CityIndex(cities)
+
+    for _ in range(200):
+        # Query exactly at some cities to exercise zero distances
+        if rng.random() < 0.3:
+            city = rng.choice(cities)
+            latitude, longitude = city["latitude"], city["longitude"]
+        else:
+            latitude, longitude = rng.uniform(-90, 90), rng.uniform(-180, 180)
+
+        # Act
+        result = index.nearest(latitude, longitude, 4)
+
+        # Assert
+        assert result == brute_force_nearest(cities, latitude, longitude, 4)
+
+
+@pytest.mark.parametrize(
+    "cities, count, expected",
+    [
+        ([], 4, []),
+        ([{"latitude": 0.0, "longitude": 0.0}], 0, []),
+        ([{"latitude": 0.0, "longitude": 0.0}], 4, [(0.0, 0)]),
+    ],
+    ids=["empty-dataset", "zero-count", "fewer-cities-than-count"]
+)
+def test_nearest_edge_cases(cities, count, expected):
+    # Act
+    result = CityIndex(cities).nearest(0.0, 0.0, count)
+
+    # Assert
+    assert result == expected
+
+
+def test_get_city_index_is_cached_per_list():
+    # Arrange
+    first = [{"name": "A", "latitude": 0.0, "longitude": 0.0}]
+    second = [{"name": "B", "latitude": 1.0, "longitude": 1.0}]
+
+    # Act & Assert
+    assert get_city_index(first) is get_city_index(first)
+    assert get_city_index(second) is not get_city_index(first)
+    assert get_city_index(second).timezones is second
+
+def test_get_city_index_rebuilds_when_list_grows():
+    # Arrange
+    cities = [{"name": "A", "latitude": 0.0, "longitude": 0.0}]
+    before = get_city_index(cities)
+
+    # Act
+    cities.append({"name": "B", "latitude": 1.0, "longitude": 1.0})
+    after = get_city_index(cities)
+
+    # Assert
+    assert after is not before
+    assert after.nearest(1.0, 1.0, 1)[0][1] == 1
+
+
+def clustered_cities(rng, count):
+    # Dense clusters plus scattered cities, poles and the antimeridian
+    centers = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(20)]
+    cities = []
+    for i in range(count):
+        lat, lon = rng.choice(centers)
+        cities.append({
+            "name": f"city-{i}",
+            "latitude": max(-90.0, min(90.0, lat + rng.gauss(0, 2))),
+            "longitude": (lon + rng.gauss(0, 2) + 180) % 360 - 180,
+        })
+    cities += random_cities(rng, 50)
+    cities += [
+        {"name": "north", "latitude": 90.0, "longitude": 0.0},
+        {"name": "south", "latitude": -90.0, "longitude": 45.0},
+        {"name": "east", "latitude": 10.0, "longitude": 180.0},
+        {"name": "west", "latitude": 10.0, "longitude": -180.0},
+    ]
+    return cities
+
+
+@pytest.mark.parametrize(
+    "dataset, count",
+    [("real", 1), ("real", 4), ("clustered", 1), ("clustered", 10)],
+    ids=["real-k1", "real-k4", "clustered-k1", "clustered-k10"]
+)
+def test_grid_nearest_matches_brute_force(monkeypatch, real_timezones, dataset, count):
+    # Arrange
+    monkeypatch.setattr(indexes, "GRID_SEARCH_MIN_CITIES", 0)
+    rng = random.Random(count)
+    cities = real_timezones if dataset == "real" else clustered_cities(rng, 3000)
+    index = CityIndex(cities)
+
+    for _ in range(100):
+        if rng.random() < 0.2:
+            city = rng.choice(cities)
+            latitude, longitude = city["latitude"], city["longitude"]
+        else:
+            latitude, longitude = rng.uniform(-90, 90), rng.uniform(-180, 180)
+
+        # Act
+        result = index.nearest(latitude, longitude, count)
+
+        # Assert
+        assert result == brute_force_nearest(cities, latitude, longitude, count)
+
+
+@pytest.mark.parametrize(
+    "radius_km",
+    [0, 50, 800, 6000],
+    ids=["radius-0", "radius-50", "radius-800", "radius-6000"]
+)
+def test_grid_within_matches_brute_force(monkeypatch, radius_km):
+    # Arrange
+    monkeypatch.setattr(indexes, "GRID_SEARCH_MIN_CITIES", 0)
+    rng = random.Random(radius_km)
+    cities = clustered_cities(rng, 3000)
+    index = CityIndex(cities)
+    chord_limit = chord_squared_from_km(radius_km)
+
+    for _ in range(50):
+        city = rng.choice(cities)
+        latitude = city["latitude"] if rng.random() < 0.5 else rng.uniform(-90, 90)
+        longitude = city["longitude"] if rng.random() < 0.5 else rng.uniform(-180, 180)
+
+        # Act
+        result = index.within(latitude, longitude, radius_km, chord_limit)
+
+        # Assert
+        assert result == brute_force_within(cities, latitude, longitude, radius_km)
+
+
+def test_radius_bbox_contains_circle():
+    # Arrange
+    rng = random.Random(9)
+
+    for _ in range(300):
+        latitude, longitude = rng.uniform(-89, 89), rng.uniform(-180, 180)
+        radius_km = rng.uniform(0, 3000)
+        box = radius_bbox(latitude, longitude, radius_km)
+        spread = radius_km / 111.0 * 1.2
+        for _ in range(50):
+            # Points around the circle, many of them close to its boundary
+            lat2 = max(-90.0, min(90.0, latitude + rng.uniform(-spread, spread)))
+            lon2 = (longitude + rng.uniform(-3 * spread, 3 * spread) + 180) % 360 - 180
+
+            # Act
+            distance = haversine(latitude, longitude, lat2, lon2)
+
+            # Assert
+            if distance <= radius_km:
+                assert in_bbox(lat2, lon2, box)
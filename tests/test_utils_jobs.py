@@ -0,0 +1,205 @@
+import sqlite3
+import time
+
+import pytest
+
+from utils.jobs import DONE, FAILED, QUEUED, RUNNING, JobStore, JobWorkerPool
+
+def wait_for(store, job_id, status, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not reach {status}: {store.get(job_id)}")
+
+def double(rows, options):
+    return [{**row, "value": row["value"] * options["factor"]} for row in rows]
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(tmp_path / "jobs" / "jobs.db")
+
+@pytest.mark.parametrize(
+    "chunks, expected_status, expected_chunks, expected_rows, description",
+    [
+        ([[{"value": 1}, {"value": 2}], [{"value": 3}]], QUEUED, 2, 3, "queued with chunk and row counts"),
+        ([], DONE, 0, 0, "empty input is done right away"),
+    ],
+    ids=["chunks", "empty"]
+)
+def test_add_chunks_queues_job(store, chunks, expected_status, expected_chunks, expected_rows, description):
+    # Arrange
+    job_id = store.create({"factor": 2})
+
+    # Act
+    job = store.add_chunks(job_id, iter(chunks))
+
+    # Assert
+    assert (job["status"], job["chunks"], job["rows"]) == (expected_status, expected_chunks, expected_rows), f"Failed: {description}"
+
+def test_claim_complete_and_results_in_order(store):
+    # Arrange
+    job_id = store.create({"factor": 2})
+    store.add_chunks(job_id, iter([[{"value": 1}], [{"value": 2}]]))
+
+    # Act
+    claimed = [store.claim(), store.claim()]
+    nothing_left = store.claim()
+    for job, seq, rows, options in reversed(claimed):
+        store.complete(job, seq, double(rows, options))
+
+    # Assert
+    assert [seq for _, seq, _, _ in claimed] == [0, 1]
+    assert nothing_left is None
+    assert store.get(job_id)["status"] == DONE
+    assert list(store.results(job_id)) == [[{"value": 2}], [{"value": 4}]]
+
+def test_recover_requeues_interrupted_chunks(store):
+    # Arrange
+    job_id = store.create({"factor": 2})
+    store.add_chunks(job_id, iter([[{"value": 1}], [{"value": 2}]]))
+    job, seq, rows, options = store.claim()
+    store.complete(job, seq, double(rows, options))
+    store.claim()  # interrupted: never completed
+    interrupted = store.create({"factor": 2})  # input never fully stored
+
+    # Act
+    restarted = JobStore(store.path)
+    requeued = restarted.recover()
+    resumed = restarted.claim()
+
+    # Assert
+    assert requeued == 1
+    assert resumed[:2] == (job_id, 1)
+    assert restarted.get(job_id)["chunks_done"] == 1
+    assert restarted.get(interrupted)["status"] == FAILED
+
+def test_failed_job_is_not_claimed(store):
+    # Arrange
+    job_id = store.create({})
+    store.add_chunks(job_id, iter([[{"value": 1}], [{"value": 2}]]))
+    store.claim()
+
+    # Act
+    store.fail(job_id, "boom")
+
+    # Assert
+    assert store.claim() is None
+    assert store.get(job_id)["error"] == "boom"
+
+def test_purge_deletes_only_old_finished_jobs(store):
+    # Arrange
+    done = store.create({})
+    store.add_chunks(done, iter([]))
+    failed = store.create({})
+    store.fail(failed, "boom")
+    queued = store.create({})
+    store.add_chunks(queued, iter([[{"value": 1}]]))
+
+    # Act
+    kept = store.purge(3600)
+    deleted = store.purge(-1)
+
+    # Assert
+    assert (kept, deleted) == (0, 2)
+    assert store.get(done) is None and store.get(failed) is None
+    assert store.get(queued)["status"] == QUEUED
+    assert list(store.results(done)) == []
+
+@pytest.mark.parametrize(
+    "process, expected_status, description",
+    [
+        (double, DONE, "all chunks processed"),
+        (lambda rows, options: 1 / 0, FAILED, "an exception fails the job"),
+    ],
+    ids=["done", "failed"]
+)
+def test_worker_pool_processes_jobs(store, process, expected_status, description):
+    # Arrange
+    pool = JobWorkerPool(store, process, workers=2, poll_interval=0.01)
+    job_id = store.create({"factor": 3})
+    store.add_chunks(job_id, iter([[{"value": i}] for i in range(10)]))
+
+    # Act
+    pool.start()
+    try:
+        job = wait_for(store, job_id, expected_status)
+    finally:
+        pool.stop()
+
+    # Assert
+    if expected_status == DONE:
+        assert job["chunks_done"] == 10, f"Failed: {description}"
+        assert [rows[0]["value"] for rows in store.results(job_id)] == [3 * i for i in range(10)], f"Failed: {description}"
+    else:
+        assert job["error"] == "division by zero", f"Failed: {description}"
+
+def test_worker_pool_resumes_after_restart(store):
+    # Arrange
+    job_id = store.create({"factor": 2})
+    store.add_chunks(job_id, iter([[{"value": i}] for i in range(4)]))
+    store.claim()  # left running by a previous process
+    assert store.get(job_id)["status"] == RUNNING
+
+    # Act
+    pool = JobWorkerPool(JobStore(store.path), double, poll_interval=0.01)
+    pool.start()
+    try:
+        wait_for(store, job_id, DONE)
+    finally:
+        pool.stop()
+
+    # Assert
+    assert [rows[0]["value"] for rows in store.results(job_id)] == [0, 2, 4, 6]
+
+def test_worker_pool_survives_store_errors(store, monkeypatch):
+    # Arrange
+    first = store.create({"factor": 2})
+    store.add_chunks(first, iter([[{"value": 1}]]))
+    complete = store.complete
+    failures = []
+
+    def locked_once(job_id, seq, rows):
+        if not failures:
+            failures.append(job_id)
+            raise sqlite3.OperationalError("database is locked")
+        complete(job_id, seq, rows)
+
+    monkeypatch.setattr(store, "complete", locked_once)
+    pool = JobWorkerPool(store, double, poll_interval=0.01)
+
+    # Act
+    pool.start()
+    try:
+        wait_for(store, first, DONE)
+        second = store.create({"factor": 3})
+        store.add_chunks(second, iter([[{"value": 1}]]))
+        pool.notify()
+        wait_for(store, second, DONE)
+    finally:
+        pool.stop()
+
+    # Assert
+    assert failures == [first]
+    assert [rows[0]["value"] for rows in store.results(second)] == [3]
+
+def test_worker_pool_purges_periodically(store):
+    # Arrange
+    pool = JobWorkerPool(store, double, poll_interval=0.01, max_age=0.05, purge_interval=0.01)
+    pool.start()
+    try:
+        job_id = store.create({"factor": 2})
+        store.add_chunks(job_id, iter([[{"value": 1}]]))
+        wait_for(store, job_id, DONE)
+
+        # Act
+        deadline = time.monotonic() + 10
+        while store.get(job_id) is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.stop()
+
+    # Assert
+    assert store.get(job_id) is None
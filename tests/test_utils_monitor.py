@@ -0,0 +1,132 @@
+import asyncio
+import gc
+import logging
+import threading
+import time
+
+import anyio.to_thread
+import pytest
+
+from utils.monitor import RuntimeMonitor
+
+@pytest.mark.parametrize(
+    "lag_ms, threshold, expected_warning, description",
+    [
+        (5.0, 100.0, False, "below threshold"),
+        (150.0, 100.0, True, "above threshold"),
+        (150.0, None, False, "warning disabled"),
+    ],
+    ids=["below", "above", "disabled"]
+)
+def test_record_lag_warning(caplog, lag_ms, threshold, expected_warning, description):
+    # Arrange
+    monitor = RuntimeMonitor(lag_warning_ms=threshold)
+
+    # Act
+    with caplog.at_level(logging.WARNING, logger="utils.monitor"):
+        monitor.record_lag(lag_ms)
+
+    # Assert
+    assert ("Event loop lag" in caplog.text) is expected_warning, f"Failed: {description}"
+    assert monitor.snapshot()["event_loop_lag_ms"]["last"] == lag_ms
+
+def test_warnings_are_rate_limited(caplog, monkeypatch):
+    # Arrange
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    monitor = RuntimeMonitor(lag_warning_ms=100.0, warning_interval=60.0)
+
+    # Act
+    with caplog.at_level(logging.WARNING, logger="utils.monitor"):
+        for _ in range(3):
+            monitor.record_lag(150.0)
+            now[0] += 1
+        now[0] += 60
+        monitor.record_lag(150.0)
+
+    # Assert
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages == [
+        "Event loop lag of 150.0 ms",
+        "Event loop lag of 150.0 ms (2 similar warnings suppressed)",
+    ]
+
+def test_snapshot_before_sampling():
+    # Act
+    result = RuntimeMonitor().snapshot()
+
+    # Assert
+    assert result["running"] is False
+    assert result["event_loop_lag_ms"] == {"last": None, "p99": None, "max": None}
+    assert result["threadpool"]["active"] is None
+    assert result["gc"]["collections"] == 0
+
+def test_monitor_detects_blocked_event_loop(caplog):
+    # Arrange
+    monitor = RuntimeMonitor(interval=0.01, lag_warning_ms=50)
+
+    async def run():
+        monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # Block the event loop
+        await asyncio.sleep(0.05)
+        snapshot = monitor.snapshot()
+        await monitor.stop()
+        return snapshot
+
+    # Act
+    with caplog.at_level(logging.WARNING, logger="utils.monitor"):
+        snapshot = asyncio.run(run())
+
+    # Assert
+    assert snapshot["running"] is True
+    assert snapshot["event_loop_lag_ms"]["max"] >= 50
+    assert "Event loop lag" in caplog.text
+    assert monitor.snapshot()["running"] is False
+
+def test_monitor_samples_threadpool_saturation(caplog):
+    # Arrange
+    monitor = RuntimeMonitor(queue_warning=1)
+    release = threading.Event()
+
+    async def run():
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        limiter.total_tokens = 2
+        workers = [
+            asyncio.ensure_future(anyio.to_thread.run_sync(release.wait, 5))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        monitor.sample_threadpool()
+        release.set()
+        await asyncio.gather(*workers)
+        return monitor.snapshot()["threadpool"]
+
+    # Act
+    with caplog.at_level(logging.WARNING, logger="utils.monitor"):
+        threadpool = asyncio.run(run())
+
+    # Assert
+    assert threadpool["active"] == 2
+    assert threadpool["limit"] == 2
+    assert threadpool["queued"] == 1
+    assert threadpool["max_queued"] == 1
+    assert "Threadpool saturated" in caplog.text
+
+def test_monitor_measures_gc_pauses():
+    # Arrange
+    monitor = RuntimeMonitor(gc_warning_ms=None)
+
+    async def run():
+        monitor.start()
+        gc.collect()
+        await monitor.stop()
+
+    # Act
+    asyncio.run(run())
+
+    # Assert
+    result = monitor.snapshot()["gc"]
+    assert result["collections"] >= 1
+    assert result["last_pause_ms"] is not None
+    assert monitor._on_gc not in gc.callbacks
@@ -0,0 +1,143 @@
+import random
+
+import pytest
+
+from utils.geo import haversine, in_bbox
+from utils.indexes import CityIndex
+from utils.planner import CityQuery
+
+
+def make_cities(rng, count):
+    return [
+        {
+            "name": f"city-{i}",
+            "latitude": rng.uniform(-90, 90),
+            "longitude": rng.uniform(-180, 180),
+            "utc_offset": rng.choice([-5, 0, 1, 5.5, 9]),
+            "dst": rng.random() < 0.3,
+            "region": rng.choice(["america", "europe", "asia"]),
+        }
+        for i in range(count)
+    ]
+
+
+def brute_force(cities, offset=None, dst=None, region=None, bbox=None, circle=None):
+    result = []
+    for i, tz in enumerate(cities):
+        if offset is not None and float(tz["utc_offset"]) != offset:
+            continue
+        if dst is not None and tz["dst"] != dst:
+            continue
+        if region is not None and tz["region"] != region:
+            continue
+        if bbox is not None and not in_bbox(tz["latitude"], tz["longitude"], bbox):
+            continue
+        if circle is not None and haversine(circle[0], circle[1], tz["latitude"], tz["longitude"]) > circle[2]:
+            continue
+        result.append(i)
+    return result
+
+
+@pytest.fixture(scope="module")
+def index():
+    return CityIndex(make_cities(random.Random(7), 2000))
+
+
+@pytest.mark.parametrize(
+    "filters, expected_source",
+    [
+        ({"offset": 5.5, "dst": False}, "offset"),
+        ({"dst": True, "region": "europe"}, "dst"),
+        ({"dst": False, "circle": (0.0, 0.0, 300.0)}, "radius"),
+        ({"offset": 0, "circle": (0.0, 0.0, 300.0)}, "radius"),
+        ({"offset": 0, "circle": (0.0, 0.0, 9000.0)}, "offset"),
+        ({"bbox": {"min_latitude": 0, "max_latitude": 10, "min_longitude": 0, "max_longitude": 10}}, "bbox"),
+        ({"dst": True, "bbox": {"min_latitude": -80, "max_latitude": 80, "min_longitude": -180, "max_longitude": 180}}, "dst"),
+        ({"region": "atlantis", "dst": True}, "region"),
+    ],
+    ids=["offset-over-dst", "dst-over-region", "small-radius", "grid-radius-over-offset", "large-radius", "bbox-only", "large-bbox", "empty-posting"]
+)
+def test_plan_picks_most_selective_source(index, filters, expected_source):
+    # Act
+    plan = CityQuery(**filters).plan(index)
+
+    # Assert
+    assert plan["source"] == expected_source
+    assert expected_source not in plan["predicates"]
+    if "circle" in filters and expected_source != "radius":
+        assert plan["predicates"][-1] == "radius"
+
+
+def test_run_matches_brute_force(index):
+    # Arrange
+    rng = random.Random(11)
+    regions = ["america", "europe", "asia", "atlantis"]
+
+    for _ in range(200):
+        filters = {}
+        if rng.random() < 0.5:
+            filters["offset"] = rng.choice([-5, 0, 1, 5.5, 9, 3])
+        if rng.random() < 0.5:
+            filters["dst"] = rng.random() < 0.5
+        if rng.random() < 0.5:
+            filters["region"] = rng.choice(regions)
+        if rng.random() < 0.4:
+            south = rng.uniform(-90, 80)
+            filters["bbox"] = {
+                "min_latitude": south,
+                "max_latitude": rng.uniform(south, 90),
+                "min_longitude": rng.uniform(-180, 180),
+                "max_longitude": rng.uniform(-180, 180),
+            }
+        if rng.random() < 0.5:
+            filters["circle"] = (rng.uniform(-90, 90), rng.uniform(-180, 180), rng.uniform(0, 5000))
+
+        # Act
+        plan, matches = CityQuery(**filters).run(index)
+
+        # Assert
+        assert [i for i, _ in matches] == brute_force(index.timezones, **filters), plan
+        for i, dist in matches:
+            if "circle" in filters:
+                tz = index.timezones[i]
+                assert dist == pytest.approx(haversine(filters["circle"][0], filters["circle"][1], tz["latitude"], tz["longitude"]))
+            else:
+                assert dist is None
+
+
+@pytest.mark.parametrize(
+    "city_count, expected_source",
+    [(1000, "offset"), (2000, "radius")],
+    ids=["scan-below-grid-threshold", "grid-from-threshold"]
+)
+def test_plan_costs_radius_by_search_path(city_count, expected_source):
+    # Arrange
+    index = CityIndex(make_cities(random.Random(7), city_count))
+
+    # Act
+    plan = CityQuery(offset=0, circle=(0.0, 0.0, 300.0)).plan(index)
+
+    # Assert
+    assert plan["source"] == expected_source
+
+
+def test_run_treats_missing_offset_as_zero():
+    # Arrange
+    cities = make_cities(random.Random(5), 50)
+    for tz in cities[::3]:
+        tz["utc_offset"] = None
+    index = CityIndex(cities)
+
+    # Act
+    plan, matches = CityQuery(offset=0, dst=True).run(index)
+
+    # Assert: the offset is checked as a residual predicate, like the postings
+    expected = [
+        i for i, tz in enumerate(cities)
+        if float(tz["utc_offset"] or 0) == 0 and tz["dst"]
+    ]
+    assert plan["predicates"] == ["offset"]
+    assert [i for i, _ in matches] == expected
+    assert index.postings["offset"].get(0.0, []) == [
+        i for i, tz in enumerate(cities) if float(tz["utc_offset"] or 0) == 0
+    ]
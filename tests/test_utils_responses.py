@@ -0,0 +1,320 @@
+import asyncio
+import json
+import time
+
+import httpx
+import msgpack
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from utils import responses
+from utils.responses import (
+    CBOR_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    NegotiatedResponse,
+    NegotiatedRoute,
+    decode,
+    encode,
+    negotiate_media_type,
+    read_body,
+)
+
+PAYLOAD = {"cities": [{"name": "São Paulo", "latitude": -23.55, "dst": False}]}
+
+@pytest.fixture
+def client():
+    # Arrange
+    router = APIRouter(route_class=NegotiatedRoute, default_response_class=NegotiatedResponse)
+
+    @router.get("/payload")
+    def payload():
+        return PAYLOAD
+
+    @router.post("/echo")
+    async def echo(request: Request):
+        return {"body": await read_body(request)}
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+@pytest.mark.parametrize(
+    "accept, expected, description",
+    [
+        (None, JSON_MEDIA_TYPE, "no accept header"),
+        ("*/*", JSON_MEDIA_TYPE, "wildcard"),
+        ("application/json", JSON_MEDIA_TYPE, "explicit json"),
+        ("application/msgpack", MSGPACK_MEDIA_TYPE, "msgpack"),
+        ("application/x-msgpack", MSGPACK_MEDIA_TYPE, "msgpack alias"),
+        ("application/json;q=0.5, application/msgpack", MSGPACK_MEDIA_TYPE, "msgpack preferred by q"),
+        ("application/msgpack;q=0.2, application/json;q=0.9", JSON_MEDIA_TYPE, "json preferred by q"),
+        ("application/msgpack;q=0, text/html", JSON_MEDIA_TYPE, "msgpack refused"),
+        ("text/html", JSON_MEDIA_TYPE, "unsupported falls back to json"),
+    ],
+    ids=[
+        "no-accept",
+        "wildcard",
+        "json",
+        "msgpack",
+        "msgpack-alias",
+        "msgpack-by-q",
+        "json-by-q",
+        "msgpack-refused",
+        "unsupported",
+    ]
+)
+def test_negotiate_media_type(accept, expected, description):
+    # Act
+    result = negotiate_media_type(accept)
+
+    # Assert
+    assert result == expected, f"Failed: {description}"
+
+def test_negotiate_media_type_without_codec(monkeypatch):
+    # Arrange
+    monkeypatch.setitem(responses._codecs, MSGPACK_MEDIA_TYPE, None)
+
+    # Act
+    result = negotiate_media_type("application/msgpack")
+
+    # Assert
+    assert result == JSON_MEDIA_TYPE
+
+@pytest.mark.parametrize(
+    "media_type",
+    [JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, CBOR_MEDIA_TYPE],
+    ids=["json", "msgpack", "cbor"]
+)
+def test_encode_decode_round_trip(media_type):
+    if media_type == CBOR_MEDIA_TYPE:
+        pytest.importorskip("cbor2")
+
+    # Act
+    result = decode(encode(PAYLOAD, media_type), media_type)
+
+    # Assert
+    assert result == PAYLOAD
+
+@pytest.mark.parametrize(
+    "body, content_type, status_code, description",
+    [
+        (b"{not json", "application/json", 400, "malformed json"),
+        (b"\xc1", "application/msgpack", 400, "malformed msgpack"),
+        (b"latitude=1", "application/x-www-form-urlencoded", 415, "unsupported content type"),
+        (b"[]", "text/plain", 415, "text is not parsed as json"),
+    ],
+    ids=["malformed-json", "malformed-msgpack", "form", "text"]
+)
+def test_decode_errors(body, content_type, status_code, description):
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        decode(body, content_type)
+    assert exc_info.value.status_code == status_code, f"Failed: {description}"
+
+def test_decode_without_codec(monkeypatch):
+    # Arrange
+    monkeypatch.setitem(responses._codecs, MSGPACK_MEDIA_TYPE, None)
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        decode(b"\x80", "application/msgpack")
+    assert exc_info.value.status_code == 415
+
+@pytest.mark.parametrize(
+    "accept, expected_media_type, loads",
+    [
+        (None, JSON_MEDIA_TYPE, json.loads),
+        ("application/msgpack", MSGPACK_MEDIA_TYPE, msgpack.unpackb),
+    ],
+    ids=["json", "msgpack"]
+)
+def test_negotiated_route_response(client, accept, expected_media_type, loads):
+    # Act
+    response = client.get("/payload", headers={"accept": accept} if accept else {})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["content-type"] == expected_media_type
+    assert "Accept" in response.headers["vary"]
+    assert loads(response.content) == PAYLOAD
+
+def test_negotiated_routes_openapi_schema(client):
+    # Act
+    response = client.get("/openapi.json")
+
+    # Assert
+    assert response.status_code == 200
+    assert "200" in response.json()["paths"]["/payload"]["get"]["responses"]
+
+def test_negotiated_route_msgpack_request_body(client):
+    # Arrange
+    body = msgpack.packb([{"latitude": 1.5, "longitude": 2.5}])
+
+    # Act
+    response = client.post(
+        "/echo",
+        content=body,
+        headers={"content-type": "application/msgpack", "accept": "application/msgpack"},
+    )
+
+    # Assert
+    assert msgpack.unpackb(response.content) == {"body": [{"latitude": 1.5, "longitude": 2.5}]}
+
+def test_negotiated_route_coalesces_identical_get_requests():
+    # Arrange
+    calls = []
+    router = APIRouter(route_class=NegotiatedRoute, default_response_class=NegotiatedResponse)
+
+    @router.get("/slow")
+    def slow(region: str):
+        calls.append(region)
+        time.sleep(0.05)
+        return {"region": region}
+
+    app = FastAPI()
+    app.include_router(router)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *(client.get("/slow", params={"region": "america"}) for _ in range(5)),
+                client.get("/slow", params={"region": "europe"}),
+                client.get("/slow", params={"region": "america"}, headers={"accept": "application/msgpack"}),
+            )
+
+    # Act
+    responses_ = asyncio.run(run())
+
+    # Assert
+    assert all(r.status_code == 200 for r in responses_)
+    assert sorted(calls) == ["america", "america", "europe"]
+    assert {r.content for r in responses_[:5]} == {b'{"region":"america"}'}
+
+def test_negotiated_route_checks_api_key_per_request(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(responses, "precompressed", responses.PrecompressedCache(minimum_size=10))
+    calls = []
+
+    def require_key(x_api_key: str = Header(..., alias="X-API-KEY")):
+        if x_api_key != "secret":
+            raise HTTPException(status_code=401, detail="Invalid API Key")
+
+    router = APIRouter(
+        route_class=NegotiatedRoute,
+        default_response_class=NegotiatedResponse,
+        dependencies=[Depends(require_key)],
+    )
+
+    @router.get("/slow")
+    def slow():
+        calls.append("slow")
+        time.sleep(0.05)
+        return {"value": 1}
+
+    @router.get("/static", openapi_extra=responses.DATASET_STATIC)
+    def static():
+        calls.append("static")
+        return {"value": 2}
+
+    app = FastAPI()
+    app.include_router(router)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            coalesced = await asyncio.gather(
+                client.get("/slow", headers={"X-API-KEY": "secret"}),
+                client.get("/slow", headers={"X-API-KEY": "wrong"}),
+                client.get("/slow", headers={"X-API-KEY": "secret"}),
+            )
+            cached = [
+                await client.get("/static", headers={"X-API-KEY": key})
+                for key in ("secret", "wrong", "secret")
+            ]
+            return coalesced, cached
+
+    # Act
+    coalesced, cached = asyncio.run(run())
+
+    # Assert
+    assert [r.status_code for r in coalesced] == [200, 401, 200]
+    assert [r.status_code for r in cached] == [200, 401, 200]
+    assert cached[2].json() == {"value": 2}
+    assert calls == ["slow", "static"]
+
+def test_negotiated_route_does_not_share_streaming_responses():
+    # Arrange
+    router = APIRouter(route_class=NegotiatedRoute, default_response_class=NegotiatedResponse)
+
+    @router.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(3):
+                await asyncio.sleep(0.01)
+                yield f"{i}\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    app = FastAPI()
+    app.include_router(router)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get("/stream") for _ in range(3)))
+
+    # Act
+    responses_ = asyncio.run(run())
+
+    # Assert
+    assert [r.text for r in responses_] == ["0\n1\n2\n"] * 3
+
+@pytest.fixture
+def static_client(monkeypatch):
+    # Arrange
+    version = {"value": "v1"}
+    calls = []
+    cache = responses.PrecompressedCache(version=lambda: version["value"], minimum_size=100)
+    monkeypatch.setattr(responses, "precompressed", cache)
+    router = APIRouter(route_class=NegotiatedRoute, default_response_class=NegotiatedResponse)
+
+    @router.get("/cities", openapi_extra=responses.DATASET_STATIC)
+    def cities(region: str):
+        calls.append(region)
+        if region == "missing":
+            raise HTTPException(status_code=404, detail="Region not found")
+        return {"region": region, "cities": [{"name": f"city-{i}"} for i in range(50)]}
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app), calls, version
+
+def test_dataset_static_route_renders_once_per_version(static_client):
+    # Arrange
+    client, calls, version = static_client
+
+    # Act
+    first = client.get("/cities", params={"region": "america"}, headers={"accept-encoding": "gzip"})
+    second = client.get("/cities", params={"region": "america"}, headers={"accept-encoding": "br"})
+    third = client.get("/cities", params={"region": "america"}, headers={"accept-encoding": "identity"})
+    version["value"] = "v2"
+    fourth = client.get("/cities", params={"region": "america"})
+
+    # Assert
+    assert [r.headers.get("content-encoding") for r in (first, second, third)] == ["gzip", "br", None]
+    assert first.json() == second.json() == third.json() == fourth.json()
+    assert calls == ["america", "america"]
+
+def test_dataset_static_route_does_not_cache_errors(static_client):
+    # Arrange
+    client, calls, _ = static_client
+
+    # Act
+    responses_ = [client.get("/cities", params={"region": "missing"}) for _ in range(2)]
+
+    # Assert
+    assert [r.status_code for r in responses_] == [404, 404]
+    assert calls == ["missing", "missing"]
@@ -0,0 +1,152 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from utils.shedding import LoadSheddingMiddleware, RouteClass
+
+@pytest.mark.parametrize(
+    "in_flight, waiting, service_ms, expected, description",
+    [
+        (1, 0, 100.0, 0.0, "below limit"),
+        (2, 0, 100.0, 50.0, "at limit"),
+        (2, 3, 100.0, 200.0, "with waiting requests"),
+    ],
+    ids=["below-limit", "at-limit", "waiting"]
+)
+def test_estimated_delay(in_flight, waiting, service_ms, expected, description):
+    # Arrange
+    route_class = RouteClass("bulk", limit=2, budget_ms=100, initial_service_ms=service_ms)
+    route_class.in_flight = in_flight
+    route_class.waiting = waiting
+
+    # Act & Assert
+    assert route_class.estimated_delay_ms() == expected, f"Failed: {description}"
+
+def test_observe_moves_average_towards_samples():
+    # Arrange
+    route_class = RouteClass("bulk", limit=1, budget_ms=100, initial_service_ms=10, alpha=0.5)
+
+    # Act
+    route_class.observe(30)
+    route_class.observe(30)
+
+    # Assert
+    assert route_class.service_ms == 25
+
+@pytest.mark.parametrize(
+    "path, expected, description",
+    [
+        ("/cities_nearest", "lookup", "exact path"),
+        ("/jobs/3f0c9a", "lookup", "path template"),
+        ("/jobs/3f0c9a/results", "transfer", "longer template"),
+        ("/jobs", "transfer", "exact path sharing a template prefix"),
+        ("/jobs/3f0c9a/other", "bulk", "no match"),
+    ],
+    ids=["exact", "template", "nested-template", "prefix", "default"]
+)
+def test_classify(path, expected, description):
+    # Arrange
+    middleware = LoadSheddingMiddleware(
+        None,
+        classes=[],
+        route_classes={
+            "/cities_nearest": "lookup",
+            "/jobs/{job_id}": "lookup",
+            "/jobs": "transfer",
+            "/jobs/{job_id}/results": "transfer",
+        },
+        default_class="bulk",
+    )
+
+    # Act & Assert
+    assert middleware.classify(path) == expected, f"Failed: {description}"
+
+def test_start_creates_semaphore_per_loop():
+    # Arrange
+    route_class = RouteClass("bulk", limit=1, budget_ms=1000)
+
+    async def contend():
+        route_class.start()
+        await route_class.semaphore.acquire()
+        waiter = asyncio.ensure_future(route_class.semaphore.acquire())
+        await asyncio.sleep(0)
+        route_class.semaphore.release()
+        await waiter
+        route_class.semaphore.release()
+
+    # Act: the semaphore binds to the loop it waits on, a second loop needs
+    # a fresh one
+    asyncio.run(contend())
+    asyncio.run(contend())
+
+    # Assert
+    assert route_class.in_flight == 0 and route_class.waiting == 0
+
+@pytest.fixture
+def app_and_classes():
+    # Arrange
+    app = FastAPI()
+
+    @app.get("/status")
+    async def status():
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    @app.get("/cities_nearest")
+    async def cities_nearest():
+        return {"ok": True}
+
+    @app.get("/tz_region_cities")
+    async def tz_region_cities():
+        await asyncio.sleep(0.1)
+        return {"ok": True}
+
+    classes = [
+        RouteClass("lookup", limit=8, budget_ms=1000),
+        RouteClass("bulk", limit=1, budget_ms=150, initial_service_ms=100),
+    ]
+    app.add_middleware(
+        LoadSheddingMiddleware,
+        classes=classes,
+        route_classes={"/cities_nearest": "lookup"},
+        default_class="bulk",
+        exempt={"/status"},
+    )
+    return app, {c.name: c for c in classes}
+
+async def _burst(app, requests):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.get(path) for path in requests))
+
+def test_bulk_requests_are_shed_beyond_budget(app_and_classes):
+    # Arrange
+    app, classes = app_and_classes
+
+    # Act
+    responses = asyncio.run(_burst(app, ["/tz_region_cities"] * 6))
+
+    # Assert
+    statuses = [r.status_code for r in responses]
+    assert statuses.count(200) >= 1
+    assert statuses.count(503) >= 1
+    shed = [r for r in responses if r.status_code == 503]
+    assert all(int(r.headers["retry-after"]) >= 1 for r in shed)
+    assert shed[0].json() == {"detail": "Server overloaded, retry later."}
+    assert classes["bulk"].shed == statuses.count(503)
+    assert classes["bulk"].in_flight == 0 and classes["bulk"].waiting == 0
+
+def test_lookups_and_status_keep_priority_over_bulk(app_and_classes):
+    # Arrange
+    app, classes = app_and_classes
+
+    # Act
+    responses = asyncio.run(_burst(
+        app, ["/tz_region_cities"] * 6 + ["/cities_nearest"] * 10 + ["/status"] * 10
+    ))
+
+    # Assert
+    assert all(r.status_code == 200 for r in responses[6:])
+    assert classes["lookup"].shed == 0
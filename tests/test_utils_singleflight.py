@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+def test_do_async_does_not_cache_after_completion():
+    # Arrange
+    flight = SingleFlight()
+    calls = []
+
+    async def compute(value):
+        calls.append(value)
+
+    async def run():
+        await flight.do_async("key", compute, 1)
+        await flight.do_async("key", compute, 2)
+
+    # Act
+    asyncio.run(run())
+
+    # Assert
+    assert calls == [1, 2]
+
+@pytest.mark.parametrize(
+    "keys, expected_calls",
+    [(["a", "a"], 1), (["a", "b"], 2)],
+    ids=["same-key", "different-keys"]
+)
+def test_do_async_coalesces_by_key(keys, expected_calls):
+    # Arrange
+    flight = SingleFlight()
+    calls = []
+
+    async def compute(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    async def run():
+        return await asyncio.gather(*(flight.do_async(key, compute, key) for key in keys))
+
+    # Act
+    results = asyncio.run(run())
+
+    # Assert
+    assert results == keys
+    assert len(calls) == expected_calls
+    assert flight.in_flight() == 0
+
+def test_errors_are_shared():
+    # Arrange
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("Region not found")
+
+    async def run():
+        return await asyncio.gather(
+            flight.do_async("key", fail),
+            flight.do_async("key", fail),
+            return_exceptions=True,
+        )
+
+    # Act
+    errors = asyncio.run(run())
+
+    # Assert
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flight.in_flight() == 0
+
+def test_do_async_cancelled_waiter_does_not_cancel_shared_call():
+    # Arrange
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do_async("key", compute))
+        second = asyncio.ensure_future(flight.do_async("key", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+
+    # Act
+    result, first_cancelled = asyncio.run(run())
+
+    # Assert
+    assert result == "done"
+    assert first_cancelled
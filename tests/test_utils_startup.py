@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from utils import startup
+
+# Time-to-first-response budget for a fresh interpreter, in milliseconds.
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "3000"))
+
+@pytest.fixture
+def clean_metrics(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(startup, "_phases", {})
+    monkeypatch.setattr(startup, "_first_response", {"ms": None})
+
+def test_startup_phase_records_duration(clean_metrics):
+    # Act
+    with startup.startup_phase("outer"):
+        with startup.startup_phase("inner"):
+            pass
+
+    # Assert
+    phases = startup.get_startup_metrics()["phases_ms"]
+    assert set(phases) == {"outer", "inner"}
+    assert phases["outer"] >= phases["inner"] >= 0
+
+def test_startup_phase_records_on_error(clean_metrics):
+    # Act & Assert
+    with pytest.raises(RuntimeError):
+        with startup.startup_phase("failing"):
+            raise RuntimeError("boom")
+    assert "failing" in startup.get_startup_metrics()["phases_ms"]
+
+@pytest.mark.parametrize(
+    "scope_type, expected_recorded",
+    [("http", True), ("lifespan", False)],
+    ids=["http", "lifespan"]
+)
+def test_first_response_middleware(clean_metrics, scope_type, expected_recorded):
+    # Arrange
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = startup.FirstResponseMiddleware(app)
+
+    # Act
+    asyncio.run(middleware({"type": scope_type}, None, send))
+    first = startup.get_startup_metrics()["first_response_ms"]
+    asyncio.run(middleware({"type": "http"}, None, send))
+
+    # Assert
+    assert (first is not None) is expected_recorded
+    assert len(sent) == 2
+    if expected_recorded:
+        assert startup.get_startup_metrics()["first_response_ms"] == first
+
+def test_time_to_first_response_within_budget():
+    # Arrange
+    script = (
+        "from fastapi.testclient import TestClient\n"
+        "import json, main\n"
+        "client = TestClient(main.app)\n"
+        "client.get('/status')\n"
+        "print(json.dumps(client.get('/status').json()['startup']))\n"
+    )
+
+    # Act
+    completed = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", script],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+
+    # Assert
+    metrics = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert {"import_framework", "import_utils", "import_routes", "load_dataset", "include_routers"} <= set(metrics["phases_ms"])
+    assert metrics["first_response_ms"] <= STARTUP_BUDGET_MS, (
+        f"Time to first response {metrics['first_response_ms']} ms exceeds the "
+        f"{STARTUP_BUDGET_MS} ms budget: {metrics['phases_ms']}"
+    )
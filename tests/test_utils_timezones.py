@@ -3,7 +3,7 @@ import yaml
 from pathlib import Path
 from unittest import mock
 
-from utils.timezones import load_all_timezones
+from utils.timezones import load_all_timezones, dataset_version
 
 @pytest.fixture
 def mock_tz_dir(tmp_path):
@@ -229,3 +229,25 @@ def test_load_all_timezones_error_cases(files, error_type, description, mock_tz_
         # Act & Assert
         with pytest.raises(error_type):
             load_all_timezones()
+
+
+@pytest.mark.parametrize(
+    "changes, expected_equal, description",
+    [
+        ({}, True, "same content"),
+        ({"latitude": 1.5}, False, "moved city"),
+        ({"utc_offset": 2}, False, "different offset"),
+    ],
+    ids=["same-content", "moved-city", "different-offset"]
+)
+def test_dataset_version(changes, expected_equal, description):
+    # Arrange
+    city = {"name": "A", "latitude": 1.0, "longitude": 2.0, "utc_offset": 1, "dst": False, "region": "test"}
+    other = dict(city, **changes)
+
+    # Act
+    result = dataset_version([city]) == dataset_version([other])
+
+    # Assert
+    assert result is expected_equal, f"Failed: {description}"
+    assert len(dataset_version([city])) == 16
@@ -0,0 +1,155 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("opentelemetry.sdk")
+pytest.importorskip("opentelemetry.exporter.otlp.proto.http")
+
+import main
+from controllers import timezone_controller
+from scripts.trace_collector import StandInCollector
+from utils import tracing
+
+@pytest.fixture
+def collector():
+    collector = StandInCollector().start()
+    yield collector
+    tracing.shutdown_tracing()
+    collector.stop()
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "API_KEY", "test-key")
+    return TestClient(main.app, headers={"X-API-KEY": "test-key"})
+
+def by_name(spans):
+    return {span["name"]: span for span in spans}
+
+def test_disabled_tracing_is_a_no_op():
+    # Arrange
+    calls = []
+
+    @tracing.traced("double")
+    def double(value):
+        calls.append(value)
+        return value * 2
+
+    # Act
+    enabled = tracing.configure_tracing("")
+    with tracing.span("outer", key="value") as current:
+        result = double(21)
+
+    # Assert
+    assert enabled is False
+    assert not tracing.tracing_enabled()
+    assert current is None
+    assert tracing.span("a") is tracing.span("b")
+    assert (result, calls, double.__name__) == (42, [21], "double")
+
+def test_request_spans_exported(collector, client):
+    # Arrange
+    tracing.configure_tracing(collector.endpoint)
+
+    # Act
+    response = client.get("/tz_region", params={"latitude": 12.3456, "longitude": 65.4321})
+    tracing.shutdown_tracing()
+
+    # Assert
+    assert response.status_code == 200
+    spans = by_name(collector.spans)
+    request = spans["GET /tz_region"]
+    assert request["parent_span_id"] is None
+    assert request["service"] == "timestamp-api"
+    assert request["attributes"]["http.route"] == "/tz_region"
+    assert request["attributes"]["http.response.status_code"] == 200
+    for name in ("require_api_key", "timezone_controller.tz_region", "serialize"):
+        assert spans[name]["trace_id"] == request["trace_id"], name
+        assert spans[name]["parent_span_id"] == request["span_id"], name
+    assert spans["serialize"]["attributes"]["media_type"] == "application/json"
+
+def test_index_spans_nest_under_controller(collector, client):
+    # Arrange
+    tracing.configure_tracing(collector.endpoint)
+
+    # Act
+    client.get("/route_timezones", params={
+        "from_latitude": 51.47, "from_longitude": -0.45, "to_latitude": 48.85, "to_longitude": 2.35,
+    })
+    tracing.shutdown_tracing()
+
+    # Assert
+    spans = collector.spans
+    controller = by_name(spans)["timezone_controller.route_timezones"]
+    lookups = [span for span in spans if span["name"] == "index.nearest"]
+    assert lookups
+    assert all(span["parent_span_id"] == controller["span_id"] for span in lookups)
+    assert lookups[0]["attributes"]["points"] > 1
+
+def test_dataset_export_span(collector, client):
+    # Arrange
+    tracing.configure_tracing(collector.endpoint)
+
+    # Act
+    client.get("/dataset_export", params={"table": "regions"})
+    tracing.shutdown_tracing()
+
+    # Assert
+    spans = by_name(collector.spans)
+    request = spans["GET /dataset_export"]
+    export = spans["timezone_controller.dataset_export"]
+    assert export["parent_span_id"] == request["span_id"]
+    # The span must come from the export itself, not from its validation
+    assert hasattr(timezone_controller.dataset_export, "__wrapped__")
+    assert not hasattr(timezone_controller.validate_export, "__wrapped__")
+
+@pytest.mark.parametrize(
+    "sample_rate, traceparent, expected_exported, description",
+    [
+        (0.0, None, False, "new traces dropped at rate 0"),
+        (0.0, "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01", True, "sampled upstream trace kept"),
+        (1.0, "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-00", False, "unsampled upstream trace dropped"),
+    ],
+    ids=["rate-zero", "parent-sampled", "parent-not-sampled"]
+)
+def test_sampling(collector, client, sample_rate, traceparent, expected_exported, description):
+    # Arrange
+    tracing.configure_tracing(collector.endpoint, sample_rate=sample_rate)
+    headers = {"traceparent": traceparent} if traceparent else {}
+
+    # Act
+    client.get("/tz_regions", headers=headers)
+    tracing.shutdown_tracing()
+
+    # Assert
+    requests = [span for span in collector.spans if span["name"] == "GET /tz_regions"]
+    assert bool(requests) is expected_exported, f"Failed: {description}"
+    if traceparent and expected_exported:
+        assert requests[0]["trace_id"] == "0af7651916cd43dd8448eb211c80319c", f"Failed: {description}"
+        assert requests[0]["parent_span_id"] == "b7ad6b7169203331", f"Failed: {description}"
+
+def test_startup_spans_exported(collector):
+    # Arrange
+    env = {**os.environ, "TRACING_ENDPOINT": collector.endpoint}
+
+    # Act
+    subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", "import main"],
+        cwd=Path(__file__).parent.parent,
+        env=env,
+        capture_output=True,
+        timeout=60,
+        check=True,
+    )
+    deadline = time.monotonic() + 5
+    while "startup.load_dataset" not in by_name(collector.spans) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    # Assert
+    spans = by_name(collector.spans)
+    assert spans["startup.load_dataset"]["parent_span_id"] == spans["startup.import_routes"]["span_id"]
+    assert "startup.include_routers" in spans
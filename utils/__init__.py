@@ -1,2 +1,3 @@
-from .timezones import TZ_LOCATIONS, load_all_timezones
+from .timezones import TZ_LOCATIONS, load_all_timezones, dataset_version
 from .geo import haversine
+from .indexes import CityIndex, get_city_index
@@ -0,0 +1,208 @@
+import base64
+import json
+import os
+import queue
+import random
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+# Query parameters whose values must never reach the log
+REDACTED_PARAMS = {"api_key", "x-api-key"}
+REDACTED = "***"
+
+def normalize_params(query_string):
+    """
+    Parse a query string into a dict, converting numeric values to floats so
+    that e.g. offset=1 and offset=1.0 are logged the same way, and redacting
+    secrets. Repeated parameters keep their last value.
+    """
+    params = {}
+    for name, value in parse_qsl(query_string, keep_blank_values=True):
+        if name.lower() in REDACTED_PARAMS:
+            params[name] = REDACTED
+            continue
+        try:
+            number = float(value)
+        except ValueError:
+            params[name] = value
+        else:
+            params[name] = number if number == number and abs(number) != float("inf") else value
+    return params
+
+class AccessLogWriter:
+    """
+    Writes access log records as JSON lines from a background thread.
+
+    Records are handed over through a bounded queue without blocking (they
+    are dropped and counted when it is full) and written in batches. The file
+    is rotated to path.1 ... path.N once it grows beyond `max_bytes`.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5, batch_size=200,
+                 flush_interval=1.0, queue_size=10000):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        # Wakes the writer on close; ignored wherever it appears in a batch
+        self._stop = object()
+
+    def submit(self, record):
+        """
+        Enqueue a record; never blocks the caller.
+        """
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._thread = threading.Thread(
+                    target=self._run, name="access-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{i}")
+            if source.exists():
+                os.replace(source, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+    def _write(self, batch):
+        lines = []
+        for record in batch:
+            try:
+                lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            except (TypeError, ValueError):
+                self.dropped += 1
+        if not lines:
+            return
+        data = "".join(lines).encode("utf-8")
+        if self.path.exists() and self.path.stat().st_size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            batch = [record for record in batch if record is not self._stop]
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError:
+                    self.dropped += len(batch)
+            if self._closing.is_set() and self._queue.empty():
+                return
+
+    def close(self, timeout=5.0):
+        """
+        Flush pending records and stop the writer thread. Never blocks on a
+        full queue: the writer drains it and stops once it is empty.
+        """
+        if self._thread is None:
+            return
+        self._closing.set()
+        try:
+            self._queue.put_nowait(self._stop)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+class AccessLogMiddleware:
+    """
+    ASGI middleware recording method, path, normalized query parameters,
+    status, latency and response size of a sample of HTTP requests.
+
+    Request bodies up to `max_body_bytes` are recorded with their
+    Content-Type so POST requests can be replayed: as `body` when they are
+    UTF-8 text, as base64 `body_b64` otherwise. Larger bodies are marked
+    `body_omitted`. No other header is logged, so the X-API-KEY header
+    cannot leak; an `api_key` query parameter is redacted.
+    """
+
+    def __init__(self, app, writer, sample_rate=1.0, max_body_bytes=64 * 1024):
+        self.app = app
+        self.writer = writer
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (
+            self.sample_rate < 1.0 and random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+        started_at = time.time()
+        started = time.perf_counter()
+        response = {"status": None, "size": 0}
+        body = {"chunks": [], "size": 0}
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body["size"] += len(chunk)
+                if body["size"] <= self.max_body_bytes:
+                    body["chunks"].append(chunk)
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            record = {
+                "ts": round(started_at, 6),
+                "method": scope["method"],
+                "path": scope["path"],
+                "params": normalize_params(scope.get("query_string", b"").decode("latin-1")),
+                "status": response["status"] or 500,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+                "size": response["size"],
+            }
+            if body["size"]:
+                record.update(self._body_fields(scope, body))
+            self.writer.submit(record)
+
+    def _body_fields(self, scope, body):
+        headers = dict(scope.get("headers") or [])
+        fields = {"content_type": headers.get(b"content-type", b"").decode("latin-1") or None}
+        if body["size"] > self.max_body_bytes:
+            fields["body_omitted"] = True
+            return fields
+        data = b"".join(body["chunks"])
+        try:
+            fields["body"] = data.decode("utf-8")
+        except UnicodeDecodeError:
+            fields["body_b64"] = base64.b64encode(data).decode("ascii")
+        return fields
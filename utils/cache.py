@@ -0,0 +1,312 @@
+import hashlib
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urlparse
+
+class CacheBackendError(Exception):
+    """
+    Raised by shared cache backends when the backend cannot be reached or
+    answers with an error.
+    """
+
+class LocalDiskCache:
+    """
+    Shared cache backend storing one file per key in a local directory (e.g.
+    a volume shared by the instances of one host).
+    """
+
+    def __init__(self, directory, ttl=None):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.directory / (hashlib.sha256(key.encode("utf-8")).hexdigest() + ".bin")
+
+    def get(self, key):
+        try:
+            data = self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            raise CacheBackendError(str(exc)) from exc
+        try:
+            expires_at, = struct.unpack_from("<d", data)
+        except struct.error:
+            # Truncated or foreign file: drop it and treat it as a miss
+            self._path(key).unlink(missing_ok=True)
+            return None
+        if expires_at and expires_at < time.time():
+            return None
+        return data[8:]
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        expires_at = time.time() + self.ttl if self.ttl else 0.0
+        try:
+            tmp_path.write_bytes(struct.pack("<d", expires_at) + value)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            raise CacheBackendError(str(exc)) from exc
+
+class RedisCache:
+    """
+    Minimal Redis protocol (RESP) client supporting GET and SET, with one
+    connection per thread and short socket timeouts.
+    """
+
+    def __init__(self, host="localhost", port=6379, db=0, password=None, ttl=None, timeout=0.05):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        if self.password:
+            self._send("AUTH", self.password)
+        if self.db:
+            self._send("SELECT", str(self.db))
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise CacheBackendError("Connection closed by server.")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest
+        if kind == b"-":
+            raise CacheBackendError(rest.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise CacheBackendError("Unexpected reply from server.")
+
+    def _send(self, *parts):
+        encoded = [p if isinstance(p, bytes) else str(p).encode("utf-8") for p in parts]
+        payload = b"*%d\r\n" % len(encoded) + b"".join(
+            b"$%d\r\n%s\r\n" % (len(p), p) for p in encoded
+        )
+        self._local.sock.sendall(payload)
+        return self._read_reply()
+
+    def command(self, *parts):
+        """
+        Send one command and return its reply, reconnecting if needed.
+        """
+        try:
+            if getattr(self._local, "sock", None) is None:
+                self._connect()
+            return self._send(*parts)
+        except CacheBackendError:
+            self._close()
+            raise
+        except (OSError, ValueError) as exc:
+            self._close()
+            raise CacheBackendError(str(exc)) from exc
+
+    def get(self, key):
+        return self.command("GET", key)
+
+    def set(self, key, value):
+        if self.ttl:
+            self.command("SET", key, value, "EX", int(self.ttl))
+        else:
+            self.command("SET", key, value)
+
+def make_shared_backend(url, ttl=None):
+    """
+    Build a shared cache backend from a URL.
+
+    Supported forms: "redis://[:password@]host:port/db" and
+    "file:///absolute/directory". An empty URL disables the shared tier.
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "redis":
+        return RedisCache(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(parsed.path.lstrip("/") or 0),
+            password=parsed.password,
+            ttl=ttl,
+        )
+    if parsed.scheme == "file":
+        return LocalDiskCache(parsed.path, ttl=ttl)
+    raise ValueError(f"Unsupported cache backend URL: {url}")
+
+def normalize_args(args):
+    """
+    JSON representation of call arguments where equal numbers (1 and 1.0)
+    give the same key.
+    """
+    return json.dumps(
+        [float(a) if isinstance(a, (int, float)) and not isinstance(a, bool) else a for a in args],
+        separators=(",", ":"),
+    )
+
+class TieredCache:
+    """
+    Two-tier cache for controller results: an in-process LRU (L1) in front
+    of an optional shared backend (L2) such as Redis or a local directory.
+
+    Keys combine the dataset version, the function name and its normalized
+    arguments. Only `call_shared` uses the shared tier, as its reads add
+    latency to an L1 miss. The tier is best effort: writes happen on a
+    background thread, and after a failure it is skipped for
+    `breaker_seconds`, so an unavailable backend only costs one timeout per
+    window.
+    """
+
+    def __init__(self, version=lambda: "", shared=None, max_entries=256, breaker_seconds=30.0):
+        self.version = version
+        self.shared = shared
+        self.max_entries = max_entries
+        self.breaker_seconds = breaker_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._open_until = 0.0
+        self._writes = queue.Queue(maxsize=1000)
+        self._writer = None
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "l2_errors": 0}
+
+    def key(self, fn, args):
+        return f"{self.version()}:{fn.__name__}:{normalize_args(args)}"
+
+    def _shared_available(self):
+        return self.shared is not None and time.monotonic() >= self._open_until
+
+    def _trip(self):
+        self._open_until = time.monotonic() + self.breaker_seconds
+        self._count("l2_errors")
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _write_loop(self):
+        while True:
+            key, data = self._writes.get()
+            if self._shared_available():
+                try:
+                    self.shared.set(key, data)
+                except CacheBackendError:
+                    self._trip()
+
+    def _write_behind(self, key, value):
+        if not self._shared_available():
+            return
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(
+                        target=self._write_loop, name="cache-writer", daemon=True
+                    )
+                    self._writer.start()
+        try:
+            self._writes.put_nowait((key, json.dumps(value, separators=(",", ":")).encode("utf-8")))
+        except queue.Full:
+            pass
+
+    def _local(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["l1_hits"] += 1
+                return True, self._entries[key]
+        return False, None
+
+    def call(self, fn, *args):
+        """
+        Return `fn(*args)` from L1, computing (and storing) it on a miss. The
+        shared tier is never touched, so a miss costs only the computation.
+        Exceptions raised by `fn` are not cached.
+        """
+        key = self.key(fn, args)
+        found, value = self._local(key)
+        if found:
+            return value
+        self._count("misses")
+        value = fn(*args)
+        self._remember(key, value)
+        return value
+
+    def call_shared(self, fn, *args):
+        """
+        Return `fn(*args)` from L1, then L2, computing (and storing in both)
+        it on a miss. Exceptions raised by `fn` are not cached.
+
+        The L2 read is synchronous: an L1 miss waits for the backend, up to
+        its timeout (50 ms for Redis) until the breaker trips. Use it only
+        for results that cost more to compute than that, such as the dataset
+        static lists; cheap lookups should use `call`.
+        """
+        key = self.key(fn, args)
+        found, value = self._local(key)
+        if found:
+            return value
+        if self._shared_available():
+            try:
+                data = self.shared.get(key)
+            except CacheBackendError:
+                self._trip()
+                data = None
+            if data is not None:
+                try:
+                    value = json.loads(data)
+                except ValueError:
+                    # Corrupt, truncated or foreign value (UnicodeDecodeError
+                    # is a ValueError): compute locally instead
+                    self._trip()
+                else:
+                    self._remember(key, value)
+                    self._count("l2_hits")
+                    return value
+        self._count("misses")
+        value = fn(*args)
+        self._remember(key, value)
+        self._write_behind(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,191 @@
+import gzip
+import importlib
+import threading
+from collections import OrderedDict
+
+GZIP = "gzip"
+BROTLI = "br"
+# Content types worth compressing; binary encodings like MessagePack still
+# shrink well because city payloads repeat the same keys.
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/msgpack",
+    "application/cbor",
+    "text/",
+)
+
+_brotli = {}
+
+def get_brotli():
+    """
+    Import (once) and return the optional brotli module, or None.
+    """
+    if "module" not in _brotli:
+        try:
+            _brotli["module"] = importlib.import_module("brotli")
+        except ImportError:
+            _brotli["module"] = None
+    return _brotli["module"]
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick the response encoding from an Accept-Encoding header value: brotli
+    when accepted and installed, then gzip, otherwise None (identity).
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.lower()] = quality
+    # On equal quality brotli wins over gzip
+    preferred = [GZIP] if get_brotli() is None else [BROTLI, GZIP]
+    best = None
+    for coding in preferred:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (coding, quality)
+    return best[0] if best else None
+
+def compress(body, encoding, level=None):
+    """
+    Compress a body with gzip or brotli. `level` is the gzip level or the
+    brotli quality.
+    """
+    if encoding == BROTLI:
+        return get_brotli().compress(body, quality=4 if level is None else level)
+    return gzip.compress(body, compresslevel=6 if level is None else level, mtime=0)
+
+def is_compressible(content_type):
+    return any(content_type.startswith(t) for t in COMPRESSIBLE_TYPES)
+
+class PrecompressedCache:
+    """
+    In-memory cache of rendered responses that only depend on the dataset,
+    with their gzip/brotli variants compressed once at the highest level.
+
+    Entries are dropped as soon as the dataset version changes.
+    """
+
+    def __init__(self, version=lambda: None, minimum_size=1024, max_entries=512):
+        self.version = version
+        self.minimum_size = minimum_size
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._entries_version = None
+
+    def _check_version(self):
+        version = self.version()
+        if version != self._entries_version:
+            self._entries.clear()
+            self._entries_version = version
+
+    def get(self, key):
+        """
+        Returns the {encoding: body} variants for a key, or None.
+        """
+        with self._lock:
+            self._check_version()
+            variants = self._entries.get(key)
+            if variants is not None:
+                self._entries.move_to_end(key)
+            return variants
+
+    def put(self, key, body):
+        """
+        Store a rendered body and its compressed variants.
+
+        Returns:
+            dict: {encoding: body} with None for the identity body.
+        """
+        variants = {None: body}
+        if len(body) >= self.minimum_size:
+            variants[GZIP] = compress(body, GZIP, level=9)
+            if get_brotli() is not None:
+                variants[BROTLI] = compress(body, BROTLI, level=11)
+        with self._lock:
+            self._check_version()
+            self._entries[key] = variants
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return variants
+
+    def __len__(self):
+        return len(self._entries)
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses of at least `minimum_size` bytes
+    with brotli or gzip, as negotiated via Accept-Encoding.
+
+    Responses that already carry a Content-Encoding (e.g. precompressed
+    variants) and streamed responses are passed through unchanged.
+    """
+
+    def __init__(self, app, minimum_size=1024, gzip_level=6, brotli_quality=4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {GZIP: gzip_level, BROTLI: brotli_quality}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = {}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                return
+            if not start:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            start_message = dict(start)
+            start.clear()
+            body = message.get("body", b"")
+            response_headers = list(start_message.get("headers", []))
+            names = {name.lower(): value for name, value in response_headers}
+            content_type = names.get(b"content-type", b"").decode("latin-1")
+            if (
+                message.get("more_body", False)
+                or b"content-encoding" in names
+                or len(body) < self.minimum_size
+                or not is_compressible(content_type)
+            ):
+                await send(start_message)
+                await send(message)
+                return
+            body = compress(body, encoding, self.levels[encoding])
+            response_headers = [
+                (name, value)
+                for name, value in response_headers
+                if name.lower() not in (b"content-length", b"vary")
+            ]
+            vary = names.get(b"vary")
+            response_headers += [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+            ]
+            start_message["headers"] = response_headers
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,75 @@
+import importlib
+
+# Export formats and their media types
+EXPORT_FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXPORT_TABLES = ("cities", "regions")
+REGION_BOUNDS = ("min_latitude", "max_latitude", "min_longitude", "max_longitude")
+
+def get_pyarrow():
+    """
+    Import pyarrow lazily; it is an optional dependency.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+    """
+    try:
+        pyarrow = importlib.import_module("pyarrow")
+        importlib.import_module("pyarrow.parquet")
+    except ImportError as exc:
+        raise RuntimeError("Dataset export requires the optional 'pyarrow' package.") from exc
+    return pyarrow
+
+def cities_table(pyarrow, timezones):
+    """
+    Arrow table of the cities, one typed column per field. The region column
+    is dictionary encoded (a few distinct values).
+    """
+    return pyarrow.table({
+        "name": pyarrow.array([tz["name"] for tz in timezones], pyarrow.string()),
+        "latitude": pyarrow.array([tz["latitude"] for tz in timezones], pyarrow.float64()),
+        "longitude": pyarrow.array([tz["longitude"] for tz in timezones], pyarrow.float64()),
+        "utc_offset": pyarrow.array(
+            [float(tz.get("utc_offset") or 0) for tz in timezones], pyarrow.float64()
+        ),
+        "dst": pyarrow.array([bool(tz.get("dst", False)) for tz in timezones], pyarrow.bool_()),
+        "region": pyarrow.array(
+            [tz.get("region") for tz in timezones], pyarrow.string()
+        ).dictionary_encode(),
+    })
+
+def regions_table(pyarrow, locations):
+    """
+    Arrow table of the region bounding boxes (the TZ_LOCATIONS shape).
+    """
+    columns = {"region": pyarrow.array(list(locations), pyarrow.string())}
+    for bound in REGION_BOUNDS:
+        columns[bound] = pyarrow.array(
+            [bounds[bound] for bounds in locations.values()], pyarrow.float64()
+        )
+    return pyarrow.table(columns)
+
+def serialize(pyarrow, table, file_format, metadata=None):
+    """
+    Serialize a table to an in-memory Arrow IPC stream or Parquet file.
+
+    Arrow IPC buffers are left uncompressed so readers can use them in place
+    without decoding.
+
+    Args:
+        metadata (dict): Optional string key/values stored in the schema.
+
+    Returns:
+        pyarrow.Buffer: The serialized bytes.
+    """
+    if metadata:
+        table = table.replace_schema_metadata(metadata)
+    sink = pyarrow.BufferOutputStream()
+    if file_format == "parquet":
+        importlib.import_module("pyarrow.parquet").write_table(table, sink)
+    else:
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
@@ -1,4 +1,24 @@
-from math import radians, sin, cos, sqrt, atan2
+import importlib
+from math import radians, degrees, sin, cos, sqrt, atan2, acos, asin, pi
+
+EARTH_RADIUS_KM = 6371.0
+
+# Origins per chunk in distance_rows; bounds the temporary arrays to
+# DISTANCE_CHUNK_ROWS x len(destinations) values
+DISTANCE_CHUNK_ROWS = 256
+
+_numpy = {}
+
+def get_numpy():
+    """
+    Import (once) and return the optional numpy module, or None.
+    """
+    if "module" not in _numpy:
+        try:
+            _numpy["module"] = importlib.import_module("numpy")
+        except ImportError:
+            _numpy["module"] = None
+    return _numpy["module"]
 
 def haversine(lat1, lon1, lat2, lon2):
     """
@@ -12,9 +32,191 @@ def haversine(lat1, lon1, lat2, lon2):
     if any(coord > 180 or coord < -180 for coord in [lon1, lon2]):
         raise ValueError("Longitude must be between -180 and 180 degrees.")
 
-    R = 6371.0  # Earth radius in kilometers
+    R = EARTH_RADIUS_KM  # Earth radius in kilometers
     dlat = radians(lat2 - lat1)
     dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    # Rounding can push `a` just past 1 for antipodal points
+    a = min(sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2, 1.0)
     c = 2 * atan2(sqrt(a), sqrt(1 - a))
     return R * c
+
+def unit_vector(lat, lon):
+    """
+    Convert a latitude/longitude pair (in degrees) to a 3D unit vector.
+    """
+    phi = radians(lat)
+    lam = radians(lon)
+    cos_phi = cos(phi)
+    return (cos_phi * cos(lam), cos_phi * sin(lam), sin(phi))
+
+def chord_squared(v1, v2):
+    """
+    Squared chord length between two unit vectors (unit sphere).
+
+    The chord is strictly monotonic in the great-circle distance
+    (d = 2 * R * asin(chord / 2)), so ranking by chord gives the same order
+    as ranking by haversine without any trigonometry per candidate.
+    """
+    return 2.0 - 2.0 * (v1[0] * v2[0] + v1[1] * v2[1] + v1[2] * v2[2])
+
+def chord_squared_from_km(distance_km):
+    """
+    Squared chord length (unit sphere) matching a great-circle distance in km.
+    Distances beyond half the circumference are clamped to the antipode.
+    """
+    angle = min(max(distance_km, 0.0) / EARTH_RADIUS_KM, pi)
+    return (2.0 * sin(angle / 2)) ** 2
+
+def km_from_chord_squared(chord_squared):
+    """
+    Great-circle distance in km matching a squared chord (unit sphere), the
+    inverse of `chord_squared_from_km`.
+    """
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(max(chord_squared, 0.0)) / 2))
+
+def in_bbox(lat, lon, bbox):
+    """
+    Check whether a point lies inside a bounding box given as a dict with
+    min/max latitude and longitude (the TZ_LOCATIONS shape). A box whose
+    min_longitude is greater than its max_longitude crosses the antimeridian.
+    """
+    if not bbox["min_latitude"] <= lat <= bbox["max_latitude"]:
+        return False
+    if bbox["min_longitude"] <= bbox["max_longitude"]:
+        return bbox["min_longitude"] <= lon <= bbox["max_longitude"]
+    return lon >= bbox["min_longitude"] or lon <= bbox["max_longitude"]
+
+def bbox_area_fraction(bbox):
+    """
+    Fraction of the sphere's surface covered by a bounding box.
+    """
+    width = bbox["max_longitude"] - bbox["min_longitude"]
+    if width < 0:
+        width += 360.0
+    band = sin(radians(bbox["max_latitude"])) - sin(radians(bbox["min_latitude"]))
+    return max(band, 0.0) / 2 * width / 360.0
+
+def cap_area_fraction(radius_km):
+    """
+    Fraction of the sphere's surface within `radius_km` of a point.
+    """
+    angle = min(max(radius_km, 0.0) / EARTH_RADIUS_KM, pi)
+    return (1 - cos(angle)) / 2
+
+def point_in_ring(lat, lon, ring):
+    """
+    Even-odd (ray casting) test of a point against a closed ring of
+    (longitude, latitude) positions, treating coordinates as planar.
+    """
+    inside = False
+    count = len(ring)
+    for k in range(count):
+        lon1, lat1 = ring[k - 1][0], ring[k - 1][1]
+        lon2, lat2 = ring[k][0], ring[k][1]
+        if (lat1 > lat) != (lat2 > lat):
+            crossing = lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1)
+            if lon < crossing:
+                inside = not inside
+    return inside
+
+def point_in_polygon(lat, lon, rings):
+    """
+    Check whether a point lies inside a polygon given as GeoJSON rings: the
+    exterior ring first, then any holes.
+    """
+    if not point_in_ring(lat, lon, rings[0]):
+        return False
+    return not any(point_in_ring(lat, lon, hole) for hole in rings[1:])
+
+def polygon_bbox(rings):
+    """
+    Bounding box (TZ_LOCATIONS shape) of a polygon's exterior ring.
+    """
+    longitudes = [position[0] for position in rings[0]]
+    latitudes = [position[1] for position in rings[0]]
+    return {
+        "min_latitude": min(latitudes),
+        "max_latitude": max(latitudes),
+        "min_longitude": min(longitudes),
+        "max_longitude": max(longitudes),
+    }
+
+def distance_rows(origins, destinations, chunk_rows=DISTANCE_CHUNK_ROWS, decimals=2):
+    """
+    Great-circle distances (km) from every origin to every destination,
+    yielded `chunk_rows` origins at a time as lists of rows.
+
+    With the optional numpy package each chunk is computed in one vectorized
+    haversine pass; otherwise the same formula runs per pair. Coordinates must already
+    be validated.
+
+    Args:
+        origins (list): (latitude, longitude) tuples.
+        destinations (list): (latitude, longitude) tuples.
+        chunk_rows (int): Origins per yielded chunk.
+        decimals (int): Decimals to round the distances to.
+    """
+    np = get_numpy()
+    if np is not None:
+        destination_lats = np.radians([lat for lat, _ in destinations])
+        destination_lons = np.radians([lon for _, lon in destinations])
+        destination_cos = np.cos(destination_lats)
+    else:
+        destination_lats = [radians(lat) for lat, _ in destinations]
+        destination_lons = [radians(lon) for _, lon in destinations]
+        destination_cos = [cos(lat) for lat in destination_lats]
+
+    for start in range(0, len(origins), chunk_rows):
+        chunk = origins[start:start + chunk_rows]
+        if np is not None:
+            lats = np.radians([lat for lat, _ in chunk])[:, None]
+            lons = np.radians([lon for _, lon in chunk])[:, None]
+            # Rounding can push `a` just past 1 for antipodal points
+            a = np.clip(
+                np.sin((destination_lats - lats) / 2) ** 2
+                + np.cos(lats) * destination_cos * np.sin((destination_lons - lons) / 2) ** 2,
+                0.0, 1.0,
+            )
+            c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+            yield np.round(EARTH_RADIUS_KM * c, decimals).tolist()
+            continue
+        rows = []
+        for lat, lon in chunk:
+            phi, lam = radians(lat), radians(lon)
+            cos_phi = cos(phi)
+            row = []
+            for d_phi, d_lam, d_cos in zip(destination_lats, destination_lons, destination_cos):
+                a = min(sin((d_phi - phi) / 2) ** 2 + cos_phi * d_cos * sin((d_lam - lam) / 2) ** 2, 1.0)
+                row.append(round(EARTH_RADIUS_KM * 2 * atan2(sqrt(a), sqrt(1 - a)), decimals))
+            rows.append(row)
+        yield rows
+
+def great_circle_points(lat1, lon1, lat2, lon2, fractions):
+    """
+    Points at the given fractions (0 to 1) of the great-circle path between
+    two points, by spherical linear interpolation of their unit vectors.
+
+    Returns:
+        list: (latitude, longitude) tuples, one per fraction.
+
+    Raises:
+        ValueError: If the points are antipodal, so the path is undefined.
+    """
+    a = unit_vector(lat1, lon1)
+    b = unit_vector(lat2, lon2)
+    dot = min(max(a[0] * b[0] + a[1] * b[1] + a[2] * b[2], -1.0), 1.0)
+    omega = acos(dot)
+    if omega == 0:
+        return [(lat1, lon1) for _ in fractions]
+    sin_omega = sin(omega)
+    if sin_omega < 1e-9:
+        raise ValueError("The great-circle path between antipodal points is undefined.")
+    points = []
+    for fraction in fractions:
+        wa = sin((1 - fraction) * omega) / sin_omega
+        wb = sin(fraction * omega) / sin_omega
+        x = wa * a[0] + wb * b[0]
+        y = wa * a[1] + wb * b[1]
+        z = wa * a[2] + wb * b[2]
+        points.append((degrees(atan2(z, sqrt(x * x + y * y))), degrees(atan2(y, x))))
+    return points
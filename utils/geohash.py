@@ -0,0 +1,247 @@
+import array
+import heapq
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+from .geo import chord_squared_from_km, haversine, km_from_chord_squared, unit_vector
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# File layout (little endian):
+#   header:     magic, format version, precision, count, city count,
+#               dataset version, cell count
+#   offsets:    uint32 * (cell count + 1), start of each cell's candidates
+#   candidates: uint32 city indexes
+# A cell with no candidates overflowed MAX_CANDIDATES and must fall back to
+# the full search.
+MAGIC = b"TZGH"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHBBI16sI")
+MAX_CANDIDATES = 64
+# Below 1 the single cell spans both poles and its farthest point is no longer
+# a corner (see cell_radius_km); above 6 the cell count overflows uint32
+MIN_PRECISION = 1
+MAX_PRECISION = 6
+DEFAULT_TABLE_PATH = Path(__file__).parent.parent / "data" / "geohash" / "nearest.bin"
+
+def geohash_cell(lat, lon, precision):
+    """
+    Integer geohash of a point: 5 * precision interleaved bits, longitude
+    first, exactly as in the base32 string form.
+    """
+    min_lat, max_lat = -90.0, 90.0
+    min_lon, max_lon = -180.0, 180.0
+    cell = 0
+    for bit in range(5 * precision):
+        cell <<= 1
+        if bit % 2 == 0:
+            mid = (min_lon + max_lon) / 2
+            if lon >= mid:
+                cell |= 1
+                min_lon = mid
+            else:
+                max_lon = mid
+        else:
+            mid = (min_lat + max_lat) / 2
+            if lat >= mid:
+                cell |= 1
+                min_lat = mid
+            else:
+                max_lat = mid
+    return cell
+
+def geohash_encode(lat, lon, precision):
+    """
+    Standard base32 geohash string of a point.
+    """
+    cell = geohash_cell(lat, lon, precision)
+    return "".join(
+        BASE32[(cell >> (5 * (precision - i - 1))) & 31]
+        for i in range(precision)
+    )
+
+def cell_bounds(cell, precision):
+    """
+    Bounding box of a geohash cell.
+
+    Returns:
+        tuple: (min_latitude, max_latitude, min_longitude, max_longitude).
+    """
+    bits = 5 * precision
+    min_lat, max_lat = -90.0, 90.0
+    min_lon, max_lon = -180.0, 180.0
+    for bit in range(bits):
+        is_set = (cell >> (bits - bit - 1)) & 1
+        if bit % 2 == 0:
+            mid = (min_lon + max_lon) / 2
+            min_lon, max_lon = (mid, max_lon) if is_set else (min_lon, mid)
+        else:
+            mid = (min_lat + max_lat) / 2
+            min_lat, max_lat = (mid, max_lat) if is_set else (min_lat, mid)
+    return min_lat, max_lat, min_lon, max_lon
+
+def cell_radius_km(bounds):
+    """
+    Largest distance from the centre of a latitude/longitude box to any point
+    inside it.
+
+    For a fixed latitude the distance to the centre grows with the longitude
+    difference, and along a meridian spanning less than 180 degrees of
+    latitude it has no interior maximum, so the farthest point is one of the
+    corners. This holds for every cell from MIN_PRECISION on.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounds
+    center_lat = (min_lat + max_lat) / 2
+    center_lon = (min_lon + max_lon) / 2
+    return max(
+        haversine(center_lat, center_lon, lat, lon)
+        for lat in (min_lat, max_lat)
+        for lon in (min_lon, max_lon)
+    )
+
+def cell_candidates(index, bounds, count):
+    """
+    Cities that can be among the `count` nearest for some point of a cell.
+
+    With c the cell centre and r its radius, every point q of the cell has
+    d(c, city) - r <= d(q, city) <= d(c, city) + r. The count-th nearest
+    distance from q is therefore at most U, the count-th smallest
+    d(c, city) + r, and a city can only qualify if d(c, city) - r <= U.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounds
+    center_lat = (min_lat + max_lat) / 2
+    center_lon = (min_lon + max_lon) / 2
+    # Small slack so floating point rounding can only add candidates
+    radius = cell_radius_km(bounds) * (1 + 1e-9) + 1e-6
+    chords = index.chord_squared_to(center_lat, center_lon)
+    kth = km_from_chord_squared(heapq.nsmallest(count, chords)[-1])
+    limit = chord_squared_from_km(kth + 2 * radius) * (1 + 1e-9) + 1e-12
+    return [i for i, chord in enumerate(chords) if chord <= limit]
+
+def build_table(index, dataset_version, precision=3, count=4, max_candidates=MAX_CANDIDATES):
+    """
+    Compute the candidate lists of every cell at the given precision.
+
+    Returns:
+        bytes: The serialized table, see the file layout above.
+
+    Raises:
+        ValueError: If the precision is outside MIN_PRECISION..MAX_PRECISION.
+    """
+    if not MIN_PRECISION <= precision <= MAX_PRECISION:
+        raise ValueError(
+            f"Precision must be between {MIN_PRECISION} and {MAX_PRECISION}."
+        )
+    cell_count = 1 << (5 * precision)
+    offsets = [0]
+    candidates = []
+    for cell in range(cell_count):
+        if index.timezones:
+            cell_list = cell_candidates(index, cell_bounds(cell, precision), count)
+            if len(cell_list) <= max_candidates:
+                candidates.extend(cell_list)
+        offsets.append(len(candidates))
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        precision,
+        count,
+        len(index.timezones),
+        dataset_version.encode("ascii")[:16].ljust(16, b"\0"),
+        cell_count,
+    )
+    return (
+        header
+        + struct.pack(f"<{len(offsets)}I", *offsets)
+        + struct.pack(f"<{len(candidates)}I", *candidates)
+    )
+
+def _uint32s(view):
+    """
+    Little-endian uint32 values of a buffer: a zero-copy view on
+    little-endian hosts, a byte-swapped copy otherwise.
+    """
+    if sys.byteorder == "little" and struct.calcsize("I") == 4:
+        return view.cast("I")
+    values = array.array("I" if array.array("I").itemsize == 4 else "L")
+    values.frombytes(view)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+def write_table(path, data):
+    """
+    Atomically write a serialized table to disk.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+class GeohashTable:
+    """
+    Memory-mapped first-level lookup table of nearest-city candidates.
+    """
+
+    def __init__(self, buffer):
+        (
+            magic,
+            version,
+            self.precision,
+            self.count,
+            self.city_count,
+            dataset_version,
+            self.cell_count,
+        ) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Not a geohash table file.")
+        if not MIN_PRECISION <= self.precision <= MAX_PRECISION:
+            raise ValueError("Unsupported geohash table precision.")
+        self.dataset_version = dataset_version.rstrip(b"\0").decode("ascii")
+        self._buffer = buffer
+        view = memoryview(buffer)
+        start = HEADER.size
+        end = start + 4 * (self.cell_count + 1)
+        # The file is little endian whatever the host byte order
+        self._offsets = _uint32s(view[start:end])
+        self._candidates = _uint32s(view[end:])
+
+    @classmethod
+    def open(cls, path):
+        """
+        Memory-map a table file read-only.
+        """
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def candidates(self, lat, lon):
+        """
+        Candidate city indexes for a point, or None when the cell overflowed
+        and the caller has to run the full search.
+        """
+        cell = geohash_cell(lat, lon, self.precision)
+        start = self._offsets[cell]
+        end = self._offsets[cell + 1]
+        if start == end:
+            return None
+        return self._candidates[start:end]
+
+def load_table(path, dataset_version, city_count):
+    """
+    Open the table at `path` if it exists and was built for this dataset.
+
+    Returns:
+        GeohashTable or None: None when the file is missing, unreadable, or
+            stale.
+    """
+    try:
+        table = GeohashTable.open(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if table.dataset_version != dataset_version[:16] or table.city_count != city_count:
+        return None
+    return table
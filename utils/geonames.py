@@ -0,0 +1,176 @@
+import csv
+import gzip
+import io
+import logging
+import zipfile
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import product
+from math import floor
+from pathlib import Path
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .geo import EARTH_RADIUS_KM, haversine, unit_vector
+from .timezones import sort_timezones
+
+logger = logging.getLogger(__name__)
+
+# Columns of the GeoNames cities dumps (cities500/1000/5000/15000.txt):
+# tab separated, no header, no quoting
+GEONAMES_NAME = 1
+GEONAMES_LATITUDE = 4
+GEONAMES_LONGITUDE = 5
+GEONAMES_TIMEZONE = 17
+
+# Offsets and DST are derived from a fixed year so the dataset (and its
+# version hash) does not change with the current date
+REFERENCE_YEAR = 2025
+
+# Cities with the same name closer than this are loaded once. Candidates
+# are found on a grid of DUPLICATE_CELL_KM cubes over the cities' unit
+# vectors (no special case at the poles or the antimeridian), then compared
+# with the haversine distance.
+DUPLICATE_DISTANCE_KM = 0.1
+DUPLICATE_CELL_KM = 1.0
+
+@lru_cache(maxsize=None)
+def zone_offsets(zone):
+    """
+    Standard UTC offset (hours) and DST flag of an IANA timezone, from its
+    offsets on the first day of every month of REFERENCE_YEAR.
+
+    Returns:
+        tuple: (utc_offset, dst), utc_offset as an int when it is whole.
+
+    Raises:
+        ZoneInfoNotFoundError: If the timezone is unknown.
+    """
+    tz = ZoneInfo(zone)
+    offsets = {
+        datetime(REFERENCE_YEAR, month, 1, 12, tzinfo=timezone.utc).astimezone(tz).utcoffset()
+        for month in range(1, 13)
+    }
+    hours = min(offsets).total_seconds() / 3600
+    return (int(hours) if hours.is_integer() else hours), len(offsets) > 1
+
+def zone_region(zone):
+    """
+    Region of an IANA timezone: its lowercase prefix ("Europe/Paris" ->
+    "europe"), or "etc" for zones without one.
+    """
+    prefix, _, rest = zone.partition("/")
+    return prefix.lower() if rest else "etc"
+
+def _duplicate_cell(latitude, longitude):
+    scale = EARTH_RADIUS_KM / DUPLICATE_CELL_KM
+    return tuple(floor(axis * scale) for axis in unit_vector(latitude, longitude))
+
+def _is_duplicate(seen, name, latitude, longitude):
+    """
+    Whether a city named `name` (lowercase) was already seen within
+    DUPLICATE_DISTANCE_KM; records the city in `seen` otherwise.
+
+    Most names are unique, so a name seen once maps to its coordinates and
+    only gets a grid of cells on its second occurrence.
+    """
+    cells = seen.get(name)
+    if cells is None:
+        seen[name] = (latitude, longitude)
+        return False
+    if isinstance(cells, tuple):
+        cells = seen[name] = {_duplicate_cell(*cells): [cells]}
+    cell = _duplicate_cell(latitude, longitude)
+    x, y, z = cell
+    for neighbour in product((x - 1, x, x + 1), (y - 1, y, y + 1), (z - 1, z, z + 1)):
+        for other_latitude, other_longitude in cells.get(neighbour, ()):
+            if haversine(latitude, longitude, other_latitude, other_longitude) <= DUPLICATE_DISTANCE_KM:
+                return True
+    cells.setdefault(cell, []).append((latitude, longitude))
+    return False
+
+def _open_text(path):
+    """
+    Open a plain, gzip or zip (first member) text file for streaming.
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    if path.suffix == ".zip":
+        archive = zipfile.ZipFile(path)
+        member = archive.open(archive.namelist()[0])
+        return io.TextIOWrapper(member, encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+def _rows(path):
+    """
+    Yield (name, latitude, longitude, timezone) string tuples, one line at
+    a time. Files ending in .csv (optionally compressed) need a header with
+    name, latitude, longitude and timezone columns; anything else is read as
+    a GeoNames dump.
+    """
+    is_csv = ".csv" in Path(path).suffixes
+    with _open_text(path) as f:
+        if is_csv:
+            for row in csv.DictReader(f):
+                yield row.get("name"), row.get("latitude"), row.get("longitude"), row.get("timezone")
+            return
+        for line in f:
+            fields = line.rstrip("\r\n").split("\t")
+            if len(fields) <= GEONAMES_TIMEZONE:
+                yield None, None, None, None
+                continue
+            yield (
+                fields[GEONAMES_NAME],
+                fields[GEONAMES_LATITUDE],
+                fields[GEONAMES_LONGITUDE],
+                fields[GEONAMES_TIMEZONE],
+            )
+
+def load_cities_file(path):
+    """
+    Stream a GeoNames dump or a CSV file of cities into the same sorted list
+    of city/timezone dictionaries as `load_all_timezones`.
+
+    Rows are parsed one at a time, so memory grows with the kept cities only.
+    UTC offset and DST come from the row's IANA timezone, the region from its
+    prefix. Rows with invalid coordinates or an unknown timezone are skipped,
+    as are duplicates (same name, case insensitive, within
+    DUPLICATE_DISTANCE_KM).
+
+    Args:
+        path (str or Path): .txt/.tsv GeoNames dump or .csv file, optionally
+            .gz or .zip compressed.
+
+    Returns:
+        list: Sorted list of city/timezone dictionaries.
+    """
+    timezones = []
+    seen = {}
+    skipped = duplicates = 0
+    for name, latitude, longitude, zone in _rows(path):
+        try:
+            latitude, longitude = float(latitude), float(longitude)
+            utc_offset, dst = zone_offsets(zone)
+        except (TypeError, ValueError, ZoneInfoNotFoundError):
+            skipped += 1
+            continue
+        if not name or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            skipped += 1
+            continue
+        if _is_duplicate(seen, name.lower(), latitude, longitude):
+            duplicates += 1
+            continue
+        timezones.append({
+            "name": name,
+            "latitude": latitude,
+            "longitude": longitude,
+            "utc_offset": utc_offset,
+            "dst": dst,
+            "region": zone_region(zone),
+        })
+    if skipped or duplicates:
+        logger.warning(
+            "Loaded %d cities from %s (%d invalid rows skipped, %d duplicates dropped)",
+            len(timezones), path, skipped, duplicates,
+        )
+    return sort_timezones(timezones)
@@ -0,0 +1,104 @@
+from math import ceil, sqrt
+
+from .geo import in_bbox
+
+# Grid cells per city aimed for by grid_cell_degrees, and its size bounds
+CITIES_PER_CELL = 4
+MIN_CELL_DEGREES = 0.5
+MAX_CELL_DEGREES = 5.0
+
+def grid_cell_degrees(city_count):
+    """
+    Cell size giving about CITIES_PER_CELL cities per cell if they were
+    spread evenly, so the grid gets finer as the dataset grows.
+    """
+    if city_count <= 0:
+        return MAX_CELL_DEGREES
+    degrees = sqrt(180 * 360 * CITIES_PER_CELL / city_count)
+    return min(max(degrees, MIN_CELL_DEGREES), MAX_CELL_DEGREES)
+
+class SpatialGrid:
+    """
+    Uniform latitude/longitude grid over city positions for bounding box
+    queries. Only the cells overlapping the box are visited, and cells that
+    lie entirely inside it are taken without checking each city.
+
+    Args:
+        latitudes (list): City latitudes, in index order.
+        longitudes (list): City longitudes, in index order.
+        cell_degrees (float): Cell size in degrees, rounded down so that it
+            divides 180.
+    """
+
+    def __init__(self, latitudes, longitudes, cell_degrees=5.0):
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        # Snapped so cells tile the sphere exactly (no cell overhangs a pole
+        # or the antimeridian)
+        self.rows = ceil(180 / cell_degrees)
+        self.cols = 2 * self.rows
+        self.cell_degrees = 180 / self.rows
+        self.cells = {}
+        for i, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+            self.cells.setdefault((self._row(lat), self._col(lon)), []).append(i)
+
+    def _row(self, lat):
+        return min(max(int((lat + 90) // self.cell_degrees), 0), self.rows - 1)
+
+    def _col(self, lon):
+        return min(max(int((lon + 180) // self.cell_degrees), 0), self.cols - 1)
+
+    def _columns(self, bbox):
+        """
+        Column ranges covered by a box, split in two when it crosses the
+        antimeridian, as (first column, last column, west, east) tuples.
+        """
+        west, east = bbox["min_longitude"], bbox["max_longitude"]
+        if west <= east:
+            spans = [(west, east)]
+        else:
+            spans = [(west, 180.0), (-180.0, east)]
+        return [(self._col(w), self._col(e), w, e) for w, e in spans]
+
+    def count(self, bbox):
+        """
+        Number of cities in the cells overlapping a bounding box, i.e. an
+        upper bound on `query` computed without visiting any city.
+        """
+        rows = range(self._row(bbox["min_latitude"]), self._row(bbox["max_latitude"]) + 1)
+        columns = set()
+        for first_col, last_col, _, _ in self._columns(bbox):
+            columns.update(range(first_col, last_col + 1))
+        return sum(
+            len(self.cells.get((row, col), ()))
+            for row in rows
+            for col in columns
+        )
+
+    def query(self, bbox):
+        """
+        Indexes of the cities inside a bounding box (see
+        `utils.geo.in_bbox`), in index order.
+        """
+        size = self.cell_degrees
+        south, north = bbox["min_latitude"], bbox["max_latitude"]
+        found = []
+        for first_col, last_col, west, east in self._columns(bbox):
+            for row in range(self._row(south), self._row(north) + 1):
+                row_south = row * size - 90
+                rows_inside = south <= row_south and row_south + size <= north
+                for col in range(first_col, last_col + 1):
+                    members = self.cells.get((row, col))
+                    if not members:
+                        continue
+                    col_west = col * size - 180
+                    if rows_inside and west <= col_west and col_west + size <= east:
+                        found.extend(members)
+                    else:
+                        found.extend(
+                            i for i in members
+                            if in_bbox(self.latitudes[i], self.longitudes[i], bbox)
+                        )
+        # Both halves of a nearly worldwide antimeridian box can visit the
+        # same column, so duplicates are dropped
+        return sorted(set(found))
@@ -0,0 +1,264 @@
+import heapq
+from math import asin, cos, degrees, radians, sin
+
+from .geo import (
+    EARTH_RADIUS_KM,
+    bbox_area_fraction,
+    chord_squared_from_km,
+    haversine,
+    km_from_chord_squared,
+    unit_vector,
+)
+from .geohash import DEFAULT_TABLE_PATH, load_table
+from .grid import SpatialGrid, grid_cell_degrees
+from .timezones import dataset_version
+from .tracing import span
+
+# Slack applied to squared chord thresholds before the exact refinement.
+# The chord -> distance mapping is exact and monotonic; the slack only has to
+# absorb floating point rounding in both formulas (~1e-15), so anything within
+# it is re-checked with haversine instead of being pruned.
+CHORD_RELATIVE_SLACK = 1e-9
+CHORD_ABSOLUTE_SLACK = 1e-12
+
+# From this many cities on, nearest and radius searches walk the spatial
+# grid instead of computing the chord to every city
+GRID_SEARCH_MIN_CITIES = 2000
+# Radius searches whose bounding box covers more of the sphere than this
+# scan every city instead
+GRID_RADIUS_MAX_FRACTION = 0.25
+
+def _postings(timezones, key):
+    """
+    Map each distinct key value to the indexes of the cities that have it.
+    """
+    postings = {}
+    for i, tz in enumerate(timezones):
+        postings.setdefault(key(tz), []).append(i)
+    return postings
+
+def radius_bbox(latitude, longitude, radius_km):
+    """
+    Bounding box containing every point within `radius_km` of a point,
+    widened slightly for rounding. The box spans all longitudes when the
+    circle reaches a pole.
+    """
+    angle = degrees(radius_km / EARTH_RADIUS_KM) + 1e-6
+    south, north = latitude - angle, latitude + angle
+    if south <= -90 or north >= 90 or angle >= 90:
+        return {
+            "min_latitude": max(south, -90.0),
+            "max_latitude": min(north, 90.0),
+            "min_longitude": -180.0,
+            "max_longitude": 180.0,
+        }
+    ratio = sin(radians(angle)) / cos(radians(latitude))
+    half_width = degrees(asin(ratio)) + 1e-6 if ratio < 1 else 180.0
+    if half_width >= 180:
+        west, east = -180.0, 180.0
+    else:
+        west = (longitude - half_width + 180) % 360 - 180
+        east = (longitude + half_width + 180) % 360 - 180
+    return {"min_latitude": south, "max_latitude": north, "min_longitude": west, "max_longitude": east}
+
+class CityIndex:
+    """
+    Read-only lookup structures built once over a list of city dictionaries.
+    """
+
+    def __init__(self, timezones, table=None):
+        self.timezones = timezones
+        # Optional precomputed GeohashTable used as a first-level lookup
+        self.table = table
+        vectors = [unit_vector(tz["latitude"], tz["longitude"]) for tz in timezones]
+        self.xs = [v[0] for v in vectors]
+        self.ys = [v[1] for v in vectors]
+        self.zs = [v[2] for v in vectors]
+        # Posting lists (city indexes, in order) for the equality filters
+        self.postings = {
+            "offset": _postings(timezones, lambda tz: float(tz.get("utc_offset") or 0)),
+            "dst": _postings(timezones, lambda tz: bool(tz.get("dst", False))),
+            "region": _postings(timezones, lambda tz: tz.get("region")),
+        }
+        # Lowercase city name -> index of its first occurrence
+        self.names = {}
+        for i, tz in enumerate(timezones):
+            if tz.get("name") is not None:
+                self.names.setdefault(tz["name"].lower(), i)
+        self.grid = SpatialGrid(
+            [tz["latitude"] for tz in timezones],
+            [tz["longitude"] for tz in timezones],
+            cell_degrees=grid_cell_degrees(len(timezones)),
+        )
+
+    def chord_squared_to(self, latitude, longitude):
+        """
+        Squared chord (unit sphere) from a point to every city, in index order.
+        """
+        qx, qy, qz = unit_vector(latitude, longitude)
+        return [
+            2.0 - 2.0 * (x * qx + y * qy + z * qz)
+            for x, y, z in zip(self.xs, self.ys, self.zs)
+        ]
+
+    def _refine(self, latitude, longitude, candidates):
+        """
+        Run exact haversine on the surviving candidate indexes.
+        """
+        timezones = self.timezones
+        return [
+            (
+                haversine(latitude, longitude, timezones[i]["latitude"], timezones[i]["longitude"]),
+                i,
+            )
+            for i in candidates
+        ]
+
+    def nearest(self, latitude, longitude, count):
+        """
+        Find the `count` nearest cities to a point.
+
+        Candidates are ranked by squared chord length (a dot product, no
+        trigonometry) and only the ones that can still be among the `count`
+        nearest are refined with haversine. Below GRID_SEARCH_MIN_CITIES,
+        without a geohash table, the chord is still computed for every city:
+        what the ranking saves are haversine calls, not the scan itself.
+
+        Returns:
+            list: (distance_km, index) tuples ordered by distance, then index,
+                matching a stable sort over the full haversine distances.
+        """
+        with span("index.nearest", count=count):
+            return self._nearest(latitude, longitude, count)
+
+    def nearest_many(self, points, count):
+        """
+        `nearest` for each (latitude, longitude) point, in one span.
+        """
+        with span("index.nearest", count=count, points=len(points)):
+            return [self._nearest(latitude, longitude, count) for latitude, longitude in points]
+
+    def _nearest(self, latitude, longitude, count):
+        if count <= 0 or not self.timezones:
+            return []
+        if self.table is not None and count <= self.table.count:
+            candidates = self.table.candidates(latitude, longitude)
+            if candidates is not None:
+                refined = self._refine(latitude, longitude, candidates)
+                refined.sort()
+                return refined[:count]
+        if len(self.timezones) >= GRID_SEARCH_MIN_CITIES:
+            survivors = self._grid_nearest_candidates(latitude, longitude, count)
+        else:
+            chords = self.chord_squared_to(latitude, longitude)
+            kth = heapq.nsmallest(count, chords)[-1]
+            threshold = kth * (1 + CHORD_RELATIVE_SLACK) + CHORD_ABSOLUTE_SLACK
+            survivors = [i for i, chord in enumerate(chords) if chord <= threshold]
+        refined = self._refine(latitude, longitude, survivors)
+        refined.sort()
+        return refined[:count]
+
+    def _grid_nearest_candidates(self, latitude, longitude, count):
+        """
+        Search growing circles on the spatial grid (doubling the radius until
+        one holds `count` cities, then using their k-th distance), and return
+        the cities within the (slack-widened) chord of the `count`-th nearest.
+        Every city within a circle is inside its bounding box, so nothing
+        closer can be missed.
+        """
+        xs, ys, zs = self.xs, self.ys, self.zs
+        qx, qy, qz = unit_vector(latitude, longitude)
+        radius_km = radians(self.grid.cell_degrees) * EARTH_RADIUS_KM
+        while True:
+            box = radius_bbox(latitude, longitude, radius_km)
+            exhaustive = bbox_area_fraction(box) > GRID_RADIUS_MAX_FRACTION
+            candidates = range(len(xs)) if exhaustive else self.grid.query(box)
+            chords = [
+                (2.0 - 2.0 * (xs[i] * qx + ys[i] * qy + zs[i] * qz), i)
+                for i in candidates
+            ]
+            if len(chords) >= count or exhaustive:
+                kth = heapq.nsmallest(count, chords)[-1][0] if chords else 0.0
+                threshold = kth * (1 + CHORD_RELATIVE_SLACK) + CHORD_ABSOLUTE_SLACK
+                if exhaustive or threshold <= chord_squared_from_km(radius_km):
+                    return [i for chord, i in chords if chord <= threshold]
+                # The `count` cities found bound the answer: one more search
+                # with their (slightly widened) k-th distance is final
+                radius_km = km_from_chord_squared(threshold) * (1 + 1e-9) + 1e-6
+            else:
+                radius_km *= 2
+
+    def within(self, latitude, longitude, radius_km, chord_limit):
+        """
+        Find all cities within `radius_km` of a point.
+
+        Args:
+            chord_limit (float): Squared chord matching `radius_km`, see
+                `utils.geo.chord_squared_from_km`.
+
+        Returns:
+            list: (distance_km, index) tuples in index order.
+        """
+        with span("index.within", radius_km=radius_km):
+            return self._within(latitude, longitude, radius_km, chord_limit)
+
+    def _grid_radius(self, box):
+        """
+        Whether a radius search with this bounding box walks the grid
+        rather than scanning every city.
+        """
+        return (
+            len(self.timezones) >= GRID_SEARCH_MIN_CITIES
+            and bbox_area_fraction(box) <= GRID_RADIUS_MAX_FRACTION
+        )
+
+    def within_candidates(self, latitude, longitude, radius_km):
+        """
+        Number of cities whose chord `within` computes for this circle: those
+        in the grid cells covering its bounding box, or every city when it
+        scans.
+        """
+        box = radius_bbox(latitude, longitude, radius_km)
+        if self._grid_radius(box):
+            return self.grid.count(box)
+        return len(self.timezones)
+
+    def _within(self, latitude, longitude, radius_km, chord_limit):
+        threshold = chord_limit * (1 + CHORD_RELATIVE_SLACK) + CHORD_ABSOLUTE_SLACK
+        box = radius_bbox(latitude, longitude, radius_km)
+        if self._grid_radius(box):
+            qx, qy, qz = unit_vector(latitude, longitude)
+            survivors = [
+                i for i in self.grid.query(box)
+                if 2.0 - 2.0 * (self.xs[i] * qx + self.ys[i] * qy + self.zs[i] * qz) <= threshold
+            ]
+        else:
+            chords = self.chord_squared_to(latitude, longitude)
+            survivors = [i for i, chord in enumerate(chords) if chord <= threshold]
+        return [
+            (dist, i)
+            for dist, i in self._refine(latitude, longitude, survivors)
+            if dist <= radius_km
+        ]
+
+_INDEX_CACHE = {"source": None, "size": None, "index": None}
+
+def get_city_index(timezones):
+    """
+    Return the CityIndex for a list of cities, rebuilding it only when a
+    different list object is passed in or the list changed length. The
+    precomputed geohash table is attached when one was built for exactly
+    this dataset.
+
+    Like the controller's dataset_version, the cache treats a dataset as
+    immutable: replace the list to change it. Cities edited in place are not
+    detected, since hashing the whole dataset on every lookup would cost more
+    than the lookup itself.
+    """
+    if _INDEX_CACHE["source"] is not timezones or _INDEX_CACHE["size"] != len(timezones):
+        with span("index.build", cities=len(timezones)):
+            table = load_table(DEFAULT_TABLE_PATH, dataset_version(timezones), len(timezones))
+            _INDEX_CACHE["index"] = CityIndex(timezones, table=table)
+        _INDEX_CACHE["source"] = timezones
+        _INDEX_CACHE["size"] = len(timezones)
+    return _INDEX_CACHE["index"]
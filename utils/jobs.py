@@ -0,0 +1,346 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    options TEXT NOT NULL,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    rows INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    input TEXT,
+    output TEXT,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE INDEX IF NOT EXISTS chunks_pending ON chunks(status, job_id, seq);
+"""
+
+# Job lifecycle: loading (input still being stored) -> queued -> running ->
+# done, or failed at any point
+LOADING, QUEUED, RUNNING, DONE, FAILED = "loading", "queued", "running", "done", "failed"
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+class JobStore:
+    """
+    SQLite store for bulk jobs and their input/output chunks.
+
+    Every chunk is persisted with its status, so work survives a restart:
+    `recover` puts chunks that were being processed back in the queue and
+    finished chunks are never redone. Each call opens its own connection,
+    so the store can be shared by the request threads and the workers.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with closing(sqlite3.connect(self.path)) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(SCHEMA)
+                    self._ready = True
+        # A streamed result generator may resume on another threadpool thread
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def create(self, options):
+        """
+        Register a new job in the loading state.
+
+        Returns:
+            str: The job id.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, options, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, LOADING, _dumps(options), now, now),
+            )
+        return job_id
+
+    def add_chunks(self, job_id, chunks):
+        """
+        Store the input chunks (lists of rows) of a loading job, then queue
+        it. Chunks are written one at a time, so memory stays bounded by the
+        chunk size.
+
+        Returns:
+            dict: The job status, see `get`.
+        """
+        count = rows = 0
+        with closing(self._connect()) as conn:
+            for chunk in chunks:
+                conn.execute(
+                    "INSERT INTO chunks (job_id, seq, status, input) VALUES (?, ?, ?, ?)",
+                    (job_id, count, QUEUED, _dumps(chunk)),
+                )
+                count += 1
+                rows += len(chunk)
+            conn.execute(
+                "UPDATE jobs SET status = ?, chunks = ?, rows = ?, updated_at = ? WHERE id = ?",
+                (DONE if count == 0 else QUEUED, count, rows, time.time(), job_id),
+            )
+        return self.get(job_id)
+
+    def claim(self):
+        """
+        Take the oldest queued chunk of a queued or running job.
+
+        Returns:
+            tuple: (job_id, seq, rows, options), or None if there is no work.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT c.job_id, c.seq, c.input, j.options FROM chunks c "
+                    "JOIN jobs j ON j.id = c.job_id "
+                    "WHERE c.status = ? AND j.status IN (?, ?) "
+                    "ORDER BY j.created_at, c.seq LIMIT 1",
+                    (QUEUED, QUEUED, RUNNING),
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE chunks SET status = ? WHERE job_id = ? AND seq = ?",
+                    (RUNNING, row["job_id"], row["seq"]),
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, time.time(), row["job_id"]),
+                )
+            finally:
+                conn.execute("COMMIT")
+        return row["job_id"], row["seq"], json.loads(row["input"]), json.loads(row["options"])
+
+    def complete(self, job_id, seq, rows):
+        """
+        Store the output of a chunk and finish the job after its last chunk.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            updated = conn.execute(
+                "UPDATE chunks SET status = ?, output = ?, input = NULL "
+                "WHERE job_id = ? AND seq = ? AND status = ?",
+                (DONE, _dumps(rows), job_id, seq, RUNNING),
+            ).rowcount
+            if updated:
+                conn.execute(
+                    "UPDATE jobs SET chunks_done = chunks_done + 1, updated_at = ?, "
+                    "status = CASE WHEN chunks_done + 1 >= chunks THEN ? ELSE status END "
+                    "WHERE id = ? AND status = ?",
+                    (time.time(), DONE, job_id, RUNNING),
+                )
+            conn.execute("COMMIT")
+
+    def fail(self, job_id, error):
+        """
+        Mark a job as failed; its remaining chunks are not processed.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (FAILED, error, time.time(), job_id),
+            )
+
+    def get(self, job_id):
+        """
+        Job status: id, status, chunk and row counts, error and timestamps.
+
+        Returns:
+            dict: The job, or None if it does not exist.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id, status, chunks, chunks_done, rows, error, created_at, updated_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def results(self, job_id):
+        """
+        Yield the output rows of a job chunk by chunk, in input order.
+        """
+        with closing(self._connect()) as conn:
+            for (output,) in conn.execute(
+                "SELECT output FROM chunks WHERE job_id = ? AND status = ? ORDER BY seq",
+                (job_id, DONE),
+            ):
+                yield json.loads(output)
+
+    def recover(self):
+        """
+        Prepare the store after a restart: chunks that were being processed
+        are queued again, and jobs whose input was still being stored fail.
+
+        Returns:
+            int: Number of chunks queued again.
+        """
+        with closing(self._connect()) as conn:
+            requeued = conn.execute(
+                "UPDATE chunks SET status = ? WHERE status = ?", (QUEUED, RUNNING)
+            ).rowcount
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status = ?",
+                (FAILED, "Submission was interrupted.", time.time(), LOADING),
+            )
+        return requeued
+
+    def purge(self, max_age):
+        """
+        Delete finished (done or failed) jobs, and their chunks, last updated
+        more than `max_age` seconds ago. Queued or running jobs are kept.
+
+        Returns:
+            int: Number of jobs deleted.
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (DONE, FAILED, time.time() - max_age),
+            ).rowcount
+
+class JobWorkerPool:
+    """
+    Background threads that claim queued chunks from a JobStore and run
+    `process(rows, options)` on them. An exception fails the whole job.
+
+    Idle workers poll the store every `poll_interval` seconds; `notify`
+    wakes them right away after a submission. With `max_age` set, finished
+    jobs older than that are purged on start and then every
+    `purge_interval` seconds by an idle worker. Store errors (e.g. a locked
+    database) are logged and never stop a worker.
+    """
+
+    def __init__(self, store, process, workers=1, poll_interval=1.0, max_age=None, purge_interval=3600.0):
+        self.store = store
+        self.process = process
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.purge_interval = purge_interval
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._purge_lock = threading.Lock()
+        self._next_purge = 0.0
+
+    def start(self):
+        """
+        Recover interrupted work and start the worker threads.
+        """
+        if self._threads:
+            return
+        self._purge()
+        requeued = self.store.recover()
+        if requeued:
+            logger.info("Resuming %d interrupted job chunks", requeued)
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def notify(self):
+        self._wake.set()
+
+    def _purge(self):
+        """
+        Delete expired finished jobs if a purge is due. Only one worker runs
+        it at a time.
+        """
+        if self.max_age is None or not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() < self._next_purge:
+                return
+            self._next_purge = time.monotonic() + self.purge_interval
+            purged = self.store.purge(self.max_age)
+            if purged:
+                logger.info("Purged %d expired jobs", purged)
+        except sqlite3.Error:
+            logger.exception("Could not purge expired jobs")
+        finally:
+            self._purge_lock.release()
+
+    def _record(self, method, job_id, *args):
+        """
+        Store a chunk outcome, retrying every `poll_interval` seconds while
+        the store is unavailable. If the pool stops first, the chunk stays
+        running and `recover` queues it again on the next start.
+        """
+        while True:
+            try:
+                method(job_id, *args)
+                return
+            except sqlite3.Error:
+                logger.exception("Could not record job %s chunk outcome, retrying", job_id)
+                if self._stop.wait(self.poll_interval):
+                    return
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                work = self.store.claim()
+            except sqlite3.Error:
+                logger.exception("Job store unavailable")
+                work = None
+            if work is None:
+                self._purge()
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            job_id, seq, rows, options = work
+            try:
+                output = self.process(rows, options)
+            except Exception as exc:
+                logger.exception("Job %s failed on chunk %d", job_id, seq)
+                self._record(self.store.fail, job_id, str(exc) or type(exc).__name__)
+                continue
+            try:
+                self._record(self.store.complete, job_id, seq, output)
+            except Exception as exc:
+                # e.g. output rows that cannot be serialized
+                logger.exception("Job %s failed storing chunk %d", job_id, seq)
+                self._record(self.store.fail, job_id, str(exc) or type(exc).__name__)
+
+    def stop(self, timeout=5.0):
+        """
+        Stop the workers after their current chunk. A chunk still running
+        after `timeout` is picked up again by `recover` on the next start.
+        """
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
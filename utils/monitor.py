@@ -0,0 +1,161 @@
+import asyncio
+import gc
+import logging
+import time
+from collections import deque
+
+import anyio.to_thread
+
+logger = logging.getLogger(__name__)
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class RuntimeMonitor:
+    """
+    Background sampler of event-loop lag, threadpool saturation and garbage
+    collector pauses.
+
+    Event-loop lag is how late a sleep of `interval` seconds wakes up. The
+    threadpool figures come from the anyio limiter used to run sync
+    endpoints. GC pauses are measured with gc.callbacks. A warning is logged
+    when a sample crosses its threshold (None disables a warning), at most
+    once per `warning_interval` seconds for each kind; repeats in between are
+    counted and reported with the next warning.
+    """
+
+    def __init__(
+        self,
+        interval=0.5,
+        window=120,
+        lag_warning_ms=100.0,
+        queue_warning=40,
+        gc_warning_ms=50.0,
+        warning_interval=60.0,
+    ):
+        self.interval = interval
+        self.lag_warning_ms = lag_warning_ms
+        self.queue_warning = queue_warning
+        self.gc_warning_ms = gc_warning_ms
+        self.warning_interval = warning_interval
+        self._warnings = {}
+        self._lags = deque(maxlen=window)
+        self._threadpool = {"active": None, "limit": None, "queued": None, "max_queued": 0}
+        self._gc = {"collections": 0, "total_pause_ms": 0.0, "max_pause_ms": 0.0, "last_pause_ms": None}
+        self._gc_started = None
+        self._task = None
+
+    def _warn(self, kind, message, *args):
+        now = time.monotonic()
+        last, suppressed = self._warnings.get(kind, (None, 0))
+        if last is not None and now - last < self.warning_interval:
+            self._warnings[kind] = (last, suppressed + 1)
+            return
+        self._warnings[kind] = (now, 0)
+        if suppressed:
+            message += " (%d similar warnings suppressed)"
+            args += (suppressed,)
+        logger.warning(message, *args)
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+            return
+        if self._gc_started is None:
+            return
+        pause_ms = (time.perf_counter() - self._gc_started) * 1000
+        self._gc_started = None
+        self._gc["collections"] += 1
+        self._gc["total_pause_ms"] += pause_ms
+        self._gc["last_pause_ms"] = pause_ms
+        self._gc["max_pause_ms"] = max(self._gc["max_pause_ms"], pause_ms)
+        if self.gc_warning_ms is not None and pause_ms >= self.gc_warning_ms:
+            self._warn(
+                "gc", "GC pause of %.1f ms (generation %s)", pause_ms, info.get("generation")
+            )
+
+    def sample_threadpool(self):
+        """
+        Record the current threadpool usage. Must run on the event loop.
+        """
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        statistics = limiter.statistics()
+        queued = statistics.tasks_waiting
+        self._threadpool.update(
+            active=statistics.borrowed_tokens,
+            limit=statistics.total_tokens,
+            queued=queued,
+            max_queued=max(self._threadpool["max_queued"], queued),
+        )
+        if self.queue_warning is not None and queued >= self.queue_warning:
+            self._warn(
+                "threadpool", "Threadpool saturated: %d active of %d, %d queued",
+                statistics.borrowed_tokens, statistics.total_tokens, queued,
+            )
+
+    def record_lag(self, lag_ms):
+        self._lags.append(lag_ms)
+        if self.lag_warning_ms is not None and lag_ms >= self.lag_warning_ms:
+            self._warn("lag", "Event loop lag of %.1f ms", lag_ms)
+
+    async def run(self):
+        """
+        Sampling loop, runs until cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record_lag(max(0.0, (loop.time() - started - self.interval) * 1000))
+            self.sample_threadpool()
+
+    def start(self):
+        """
+        Start sampling on the running event loop and hook into the GC.
+        """
+        if self._task is not None:
+            return
+        if self._on_gc not in gc.callbacks:
+            gc.callbacks.append(self._on_gc)
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def snapshot(self):
+        """
+        Returns the latest samples, with lag percentiles over the window.
+        """
+        lags = list(self._lags)
+        return {
+            "running": self._task is not None,
+            "event_loop_lag_ms": {
+                "last": round(lags[-1], 2) if lags else None,
+                "p99": round(_percentile(lags, 0.99), 2) if lags else None,
+                "max": round(max(lags), 2) if lags else None,
+            },
+            "threadpool": dict(self._threadpool),
+            "gc": {
+                "collections": self._gc["collections"],
+                "total_pause_ms": round(self._gc["total_pause_ms"], 2),
+                "max_pause_ms": round(self._gc["max_pause_ms"], 2),
+                "last_pause_ms": (
+                    round(self._gc["last_pause_ms"], 2)
+                    if self._gc["last_pause_ms"] is not None else None
+                ),
+            },
+        }
+
+runtime_monitor = RuntimeMonitor()
@@ -0,0 +1,151 @@
+from .geo import (
+    bbox_area_fraction,
+    cap_area_fraction,
+    chord_squared_from_km,
+    haversine,
+    in_bbox,
+    unit_vector,
+)
+from .indexes import CHORD_ABSOLUTE_SLACK, CHORD_RELATIVE_SLACK
+
+# Cost of computing the chord to one city in a radius search, relative to
+# checking one candidate from a posting list against the remaining predicates
+SCAN_COST = 0.25
+
+POSTING_FILTERS = ("offset", "dst", "region")
+
+class CityQuery:
+    """
+    Conjunction of city filters, evaluated by starting from the most
+    selective index and checking the other filters as predicates.
+
+    Args:
+        offset (float, optional): UTC offset to match.
+        dst (bool, optional): DST flag to match.
+        region (str, optional): City region to match.
+        bbox (dict, optional): Bounding box with min/max latitude and
+            longitude, see `utils.geo.in_bbox`.
+        circle (tuple, optional): (latitude, longitude, radius_km).
+    """
+
+    def __init__(self, offset=None, dst=None, region=None, bbox=None, circle=None):
+        self.offset = float(offset) if offset is not None else None
+        self.dst = dst
+        self.region = region
+        self.bbox = bbox
+        self.circle = circle
+
+    def _posting_keys(self):
+        return {
+            name: value
+            for name, value in (("offset", self.offset), ("dst", self.dst), ("region", self.region))
+            if value is not None
+        }
+
+    def estimates(self, index):
+        """
+        Estimated number of cities matching each active filter on its own.
+        Posting list sizes are exact; spatial filters assume cities are
+        spread evenly over the sphere.
+        """
+        total = len(index.timezones)
+        estimates = {
+            name: len(index.postings[name].get(value, ()))
+            for name, value in self._posting_keys().items()
+        }
+        if self.bbox is not None:
+            estimates["bbox"] = round(bbox_area_fraction(self.bbox) * total)
+        if self.circle is not None:
+            estimates["radius"] = round(cap_area_fraction(self.circle[2]) * total)
+        return estimates
+
+    def plan(self, index):
+        """
+        Choose where to start and in which order to apply the other filters.
+
+        Returns:
+            dict: "source" (a filter name, or "all" for a full scan),
+                "estimated_candidates" and the ordered "predicates".
+        """
+        total = len(index.timezones)
+        estimates = self.estimates(index)
+        costs = {"all": total}
+        for name in POSTING_FILTERS:
+            if name in estimates:
+                costs[name] = estimates[name]
+        if "bbox" in estimates:
+            costs["bbox"] = estimates["bbox"]
+        if "radius" in estimates:
+            # Chords are computed for the cities of the grid cells covering
+            # the circle (or all cities when the index scans), then the
+            # survivors get haversine
+            costs["radius"] = index.within_candidates(*self.circle) * SCAN_COST + estimates["radius"]
+        source = min(costs, key=lambda name: (costs[name], name != "all"))
+        # Cheap equality checks first, most selective first; haversine last
+        predicates = sorted(
+            (name for name in estimates if name != source),
+            key=lambda name: (name == "radius", estimates[name]),
+        )
+        return {
+            "source": source,
+            "estimated_candidates": estimates.get(source, total),
+            "predicates": predicates,
+        }
+
+    def _matches(self, name, tz):
+        if name == "offset":
+            # Same normalization as the index postings
+            return float(tz.get("utc_offset") or 0) == self.offset
+        if name == "dst":
+            return bool(tz.get("dst", False)) == self.dst
+        if name == "region":
+            return tz.get("region") == self.region
+        return in_bbox(tz["latitude"], tz["longitude"], self.bbox)
+
+    def run(self, index):
+        """
+        Execute the plan against a CityIndex.
+
+        Returns:
+            tuple: (plan, matches) where matches is a list of
+                (city index, distance_km or None) in index order.
+        """
+        plan = self.plan(index)
+        timezones = index.timezones
+        source = plan["source"]
+        distances = {}
+        if source == "radius":
+            latitude, longitude, radius_km = self.circle
+            matches = index.within(latitude, longitude, radius_km, chord_squared_from_km(radius_km))
+            distances = {i: dist for dist, i in matches}
+            candidates = [i for _, i in matches]
+        elif source == "bbox":
+            candidates = index.grid.query(self.bbox)
+        elif source == "all":
+            candidates = range(len(timezones))
+        else:
+            candidates = index.postings[source].get(self._posting_keys()[source], [])
+
+        predicates = [name for name in plan["predicates"] if name != "radius"]
+        check_radius = "radius" in plan["predicates"]
+        if check_radius:
+            latitude, longitude, radius_km = self.circle
+            qx, qy, qz = unit_vector(latitude, longitude)
+            chord_limit = chord_squared_from_km(radius_km)
+            threshold = chord_limit * (1 + CHORD_RELATIVE_SLACK) + CHORD_ABSOLUTE_SLACK
+
+        result = []
+        for i in candidates:
+            tz = timezones[i]
+            if not all(self._matches(name, tz) for name in predicates):
+                continue
+            if check_radius:
+                # Chord screen first, exact haversine only for survivors
+                chord = 2.0 - 2.0 * (index.xs[i] * qx + index.ys[i] * qy + index.zs[i] * qz)
+                if chord > threshold:
+                    continue
+                distances[i] = haversine(latitude, longitude, tz["latitude"], tz["longitude"])
+                if distances[i] > radius_km:
+                    continue
+            result.append((i, distances.get(i)))
+        return plan, result
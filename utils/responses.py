@@ -0,0 +1,267 @@
+import functools
+import importlib
+import inspect
+import json
+from contextvars import ContextVar
+
+from fastapi import HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from .compression import PrecompressedCache, negotiate_encoding
+from .singleflight import SingleFlight
+from .tracing import span
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+CBOR_MEDIA_TYPE = "application/cbor"
+
+# Accepted aliases for each supported media type, mapped to the codec module
+MEDIA_TYPE_ALIASES = {
+    "application/json": JSON_MEDIA_TYPE,
+    "application/msgpack": MSGPACK_MEDIA_TYPE,
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    "application/vnd.msgpack": MSGPACK_MEDIA_TYPE,
+    "application/cbor": CBOR_MEDIA_TYPE,
+}
+CODEC_MODULES = {
+    MSGPACK_MEDIA_TYPE: "msgpack",
+    CBOR_MEDIA_TYPE: "cbor2",
+}
+
+_codecs = {}
+_response_media_type = ContextVar("response_media_type", default=JSON_MEDIA_TYPE)
+# Set by NegotiatedRoute for GET requests: (request_key, Accept-Encoding)
+_shared_request = ContextVar("shared_request", default=None)
+
+# Shared by every NegotiatedRoute: identical concurrent GET requests get the
+# same encoded body instead of recomputing and reserializing it.
+coalescer = SingleFlight()
+
+# Rendered (and precompressed) bodies of routes marked with DATASET_STATIC.
+# Its `version` callable is set by the router that owns the dataset.
+precompressed = PrecompressedCache()
+
+# openapi_extra marker for GET routes whose response depends only on the
+# query and the dataset version, so their rendered body can be kept in memory
+DATASET_STATIC = {"x-dataset-static": True}
+
+def get_codec(media_type):
+    """
+    Import (once) and return the codec module for a binary media type, or None
+    if the optional dependency is not installed.
+    """
+    if media_type not in _codecs:
+        try:
+            _codecs[media_type] = importlib.import_module(CODEC_MODULES[media_type])
+        except ImportError:
+            _codecs[media_type] = None
+    return _codecs[media_type]
+
+def negotiate_media_type(accept):
+    """
+    Pick the response media type from an Accept header value.
+
+    Media types are ranked by their q value (then by position); the first one
+    that is supported and whose codec is installed wins. Anything else falls
+    back to JSON.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+    ranked = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        ranked.append((-quality, position, media_type.lower()))
+    ranked.sort()
+    for negative_quality, _, media_type in ranked:
+        if negative_quality == 0:
+            break
+        resolved = MEDIA_TYPE_ALIASES.get(media_type)
+        if resolved == JSON_MEDIA_TYPE or media_type in ("*/*", "application/*"):
+            return JSON_MEDIA_TYPE
+        if resolved and get_codec(resolved) is not None:
+            return resolved
+    return JSON_MEDIA_TYPE
+
+def encode(content, media_type):
+    """
+    Serialize JSON-compatible content to bytes in the given media type.
+    """
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return get_codec(media_type).packb(content, use_bin_type=True)
+    if media_type == CBOR_MEDIA_TYPE:
+        return get_codec(media_type).dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+def decode(body, content_type):
+    """
+    Deserialize a request body according to its Content-Type header. A
+    missing Content-Type is read as JSON.
+
+    Raises:
+        HTTPException: 415 if the content type is not supported or needs a
+            codec that is not installed, 400 if the body cannot be decoded.
+    """
+    media_type = MEDIA_TYPE_ALIASES.get(
+        (content_type or JSON_MEDIA_TYPE).split(";")[0].strip().lower()
+    )
+    if media_type is None:
+        raise HTTPException(status_code=415, detail="Unsupported Media Type.")
+    try:
+        if media_type == JSON_MEDIA_TYPE:
+            return json.loads(body)
+        codec = get_codec(media_type)
+        if codec is None:
+            raise HTTPException(status_code=415, detail="Unsupported Media Type.")
+        if media_type == MSGPACK_MEDIA_TYPE:
+            return codec.unpackb(body, raw=False)
+        return codec.loads(body)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail="Malformed request body.") from exc
+
+async def read_body(request: Request):
+    """
+    Read and decode the request body (JSON, MessagePack or CBOR).
+    """
+    return decode(await request.body(), request.headers.get("content-type"))
+
+class NegotiatedResponse(JSONResponse):
+    """
+    JSON response that switches to MessagePack or CBOR when the request
+    negotiated it (see NegotiatedRoute).
+    """
+
+    # status_code is spelled out because FastAPI reads its default from this
+    # signature when it builds the OpenAPI schema
+    def __init__(self, content, status_code=200, *args, **kwargs):
+        self.media_type = _response_media_type.get()
+        super().__init__(content, status_code, *args, **kwargs)
+
+    def render(self, content):
+        with span("serialize", media_type=self.media_type):
+            return encode(content, self.media_type)
+
+def request_key(request: Request, media_type):
+    """
+    Key identifying requests that must get byte-identical responses: same
+    path, query and negotiated media type.
+
+    The API key is not part of it: every request still runs the route's
+    dependencies (including the API key check) before it shares a result.
+    """
+    return (
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        media_type,
+    )
+
+def shared_endpoint(endpoint, status_code=None, dataset_static=False):
+    """
+    Wrap a route endpoint so identical concurrent GET requests share one
+    call and one encoded body, each getting its own Response built from it.
+
+    With `dataset_static`, the encoded body and its compressed variants are
+    also kept in `precompressed` until the dataset version changes. Other
+    methods, and endpoints returning their own Response (e.g. streams), are
+    called once per request.
+    """
+    is_async = inspect.iscoroutinefunction(endpoint)
+
+    async def call(values):
+        if is_async:
+            return await endpoint(**values)
+        return await run_in_threadpool(endpoint, **values)
+
+    async def render(owner, values, media_type, key):
+        content = await call(values)
+        if isinstance(content, Response):
+            return owner, content
+        with span("serialize", media_type=media_type):
+            body = encode(jsonable_encoder(content), media_type)
+        if not dataset_static:
+            return owner, {None: body}
+        # Compressing at the highest levels is done once, off the loop
+        return owner, await run_in_threadpool(precompressed.put, key, body)
+
+    @functools.wraps(endpoint)
+    async def wrapper(**values):
+        shared = _shared_request.get()
+        if shared is None:
+            return await call(values)
+        key, accept_encoding = shared
+        media_type = key[2]
+        variants = precompressed.get(key) if dataset_static else None
+        if variants is None:
+            owner = object()
+            result_owner, variants = await coalescer.do_async(
+                key, render, owner, values, media_type, key
+            )
+            if isinstance(variants, Response):
+                # Responses built by the endpoint cannot be shared
+                return variants if result_owner is owner else await call(values)
+        encoding = negotiate_encoding(accept_encoding) if dataset_static else None
+        if encoding not in variants:
+            encoding = None
+        response = Response(
+            content=variants[encoding], status_code=status_code or 200, media_type=media_type
+        )
+        if encoding is not None:
+            response.headers["content-encoding"] = encoding
+        if dataset_static:
+            response.headers["vary"] = "Accept, Accept-Encoding"
+        return response
+
+    return wrapper
+
+class NegotiatedRoute(APIRoute):
+    """
+    Route class that resolves the Accept header before the endpoint runs so
+    NegotiatedResponse can render the chosen media type. Concurrent identical
+    GET requests share one endpoint call and encoded body (see
+    shared_endpoint), and routes marked DATASET_STATIC are rendered and
+    compressed once per dataset version. Every request still runs the
+    route's dependencies and parameter validation on its own.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        dataset_static = bool((kwargs.get("openapi_extra") or {}).get("x-dataset-static"))
+        endpoint = shared_endpoint(endpoint, kwargs.get("status_code"), dataset_static)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request):
+            media_type = negotiate_media_type(request.headers.get("accept"))
+            media_token = _response_media_type.set(media_type)
+            shared_token = _shared_request.set(
+                (request_key(request, media_type), request.headers.get("accept-encoding"))
+                if request.method == "GET" else None
+            )
+            try:
+                response = await handler(request)
+            finally:
+                _shared_request.reset(shared_token)
+                _response_media_type.reset(media_token)
+            if "vary" not in response.headers:
+                response.headers["vary"] = "Accept"
+            return response
+
+        return negotiated_handler
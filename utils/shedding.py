@@ -0,0 +1,141 @@
+import asyncio
+import json
+import math
+import re
+import time
+
+class RouteClass:
+    """
+    Concurrency limit and latency budget shared by a group of routes.
+
+    Queueing delay is estimated as the number of requests ahead (in flight
+    beyond the limit plus waiting) times the average service time, divided by
+    the limit. The average is an exponentially weighted moving average of
+    observed service times.
+    """
+
+    def __init__(self, name, limit, budget_ms, initial_service_ms=10.0, alpha=0.2):
+        self.name = name
+        self.limit = limit
+        self.budget_ms = budget_ms
+        self.service_ms = initial_service_ms
+        self.alpha = alpha
+        self.in_flight = 0
+        self.waiting = 0
+        self.shed = 0
+        self._semaphore = None
+
+    def start(self):
+        """
+        Create the semaphore on the running event loop and reset the
+        counters. Called from the app lifespan, so a semaphore never outlives
+        the loop that first waited on it.
+        """
+        self._semaphore = asyncio.Semaphore(self.limit)
+        self.in_flight = 0
+        self.waiting = 0
+
+    @property
+    def semaphore(self):
+        # Apps served without lifespan events (e.g. some test clients) never
+        # call start()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    def estimated_delay_ms(self):
+        if self.in_flight < self.limit:
+            return 0.0
+        return (self.waiting + 1) * self.service_ms / self.limit
+
+    def observe(self, elapsed_ms):
+        self.service_ms += self.alpha * (elapsed_ms - self.service_ms)
+
+    def snapshot(self):
+        return {
+            "limit": self.limit,
+            "budget_ms": self.budget_ms,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "service_ms": round(self.service_ms, 2),
+            "shed": self.shed,
+        }
+
+class LoadSheddingMiddleware:
+    """
+    ASGI middleware that limits in-flight requests per route class and sheds
+    requests with 503 + Retry-After when their estimated queueing delay would
+    exceed the class latency budget.
+
+    Paths in `exempt` (e.g. /status) bypass limiting entirely.
+    `route_classes` maps paths, or path templates such as
+    "/jobs/{job_id}", to class names; other paths use `default_class`.
+    Giving bulk endpoints a small limit and tight budget keeps them from
+    starving cheap lookups.
+    """
+
+    def __init__(self, app, classes, route_classes, default_class, exempt=()):
+        self.app = app
+        self.classes = {c.name: c for c in classes}
+        self.route_classes = {}
+        self.route_templates = []
+        for path, name in route_classes.items():
+            parts = re.split(r"\{[^/{}]+\}", path)
+            if len(parts) == 1:
+                self.route_classes[path] = name
+            else:
+                pattern = "[^/]+".join(re.escape(part) for part in parts)
+                self.route_templates.append((re.compile(pattern + "$"), name))
+        self.default_class = default_class
+        self.exempt = set(exempt)
+
+    def classify(self, path):
+        """
+        Name of the route class limiting `path`.
+        """
+        name = self.route_classes.get(path)
+        if name is not None:
+            return name
+        for pattern, name in self.route_templates:
+            if pattern.match(path):
+                return name
+        return self.default_class
+
+    async def _reject(self, send, delay_ms):
+        retry_after = max(1, math.ceil(delay_ms / 1000))
+        body = json.dumps({"detail": "Server overloaded, retry later."}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path in self.exempt:
+            await self.app(scope, receive, send)
+            return
+        route_class = self.classes[self.classify(path)]
+        delay_ms = route_class.estimated_delay_ms()
+        if delay_ms > route_class.budget_ms:
+            route_class.shed += 1
+            await self._reject(send, delay_ms)
+            return
+        route_class.waiting += 1
+        try:
+            await route_class.semaphore.acquire()
+        finally:
+            route_class.waiting -= 1
+        route_class.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.in_flight -= 1
+            route_class.semaphore.release()
+            route_class.observe((time.perf_counter() - started) * 1000)
@@ -0,0 +1,34 @@
+import asyncio
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into a single execution.
+
+    Coroutines that arrive while a call for their key is in flight await it
+    and receive the same result (or exception) instead of recomputing it.
+    Nothing is cached once the call finishes.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """
+        Await `fn(*args, **kwargs)` unless a call for `key` is already in
+        flight, in which case await that one.
+
+        The shared call runs as its own task, so a waiter being cancelled
+        (e.g. a client disconnecting) does not cancel it for the others.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+    def in_flight(self):
+        """
+        Number of keys currently being computed.
+        """
+        return len(self._tasks)
@@ -0,0 +1,56 @@
+import time
+from contextlib import contextmanager
+
+from .tracing import span
+
+# Reference point for all startup timings: the first import of this module,
+# which main.py does before anything else. Only the `utils` package itself
+# (imported to reach this module) loads before it.
+STARTED_AT = time.perf_counter()
+
+_phases = {}
+_first_response = {"ms": None}
+
+@contextmanager
+def startup_phase(name):
+    """
+    Record how long a startup phase takes, in milliseconds. Phases may nest
+    (e.g. the dataset load happens while importing the routers). Phases
+    after tracing is configured are also recorded as `startup.<name>` spans.
+    """
+    started = time.perf_counter()
+    try:
+        with span(f"startup.{name}"):
+            yield
+    finally:
+        _phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+def get_startup_metrics():
+    """
+    Returns the recorded startup phases and the time to the first response,
+    both in milliseconds since STARTED_AT.
+    """
+    return {
+        "phases_ms": dict(_phases),
+        "first_response_ms": _first_response["ms"],
+    }
+
+class FirstResponseMiddleware:
+    """
+    ASGI middleware that records when the first HTTP response starts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if _first_response["ms"] is not None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and _first_response["ms"] is None:
+                _first_response["ms"] = round((time.perf_counter() - STARTED_AT) * 1000, 2)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
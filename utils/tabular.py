@@ -0,0 +1,42 @@
+import csv
+import json
+
+# File formats readable by `read_chunks`
+FORMATS = ("csv", "jsonl", "parquet")
+
+def import_parquet():
+    """
+    Import pyarrow and its Parquet module; they are optional dependencies.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise RuntimeError("Parquet support requires the optional 'pyarrow' package.") from exc
+    return pyarrow, pyarrow.parquet
+
+def read_chunks(path, file_format, chunk_size):
+    """
+    Yield lists of row dictionaries of at most `chunk_size` rows from a CSV,
+    JSONL or Parquet file.
+    """
+    if file_format == "parquet":
+        _, parquet = import_parquet()
+        for batch in parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+        return
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = csv.DictReader(f) if file_format == "csv" else (
+            json.loads(line) for line in f if line.strip()
+        )
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -1,4 +1,5 @@
-import yaml
+import hashlib
+import json
 from pathlib import Path
 
 def load_all_timezones():
@@ -7,13 +8,16 @@ def load_all_timezones():
     returning a single sorted list of city/timezone dictionaries.
     Each YAML file should represent a region and contain cities as keys.
     """
+    import yaml  # Imported lazily, it is only needed while loading the dataset
+    # The libyaml based loader is ~10x faster when PyYAML was built with it
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
     # Adjust the path to point to the data/timezones directory
     tz_dir = Path(__file__).parent.parent / "data" / "timezones"
     all_timezones = []
     for file in tz_dir.glob("*.yaml"):
         region = file.stem.lower()
         with open(file, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=loader)
             all_timezones.extend(
                 {
                     "name": name,
@@ -25,14 +29,37 @@ def load_all_timezones():
                 }
                 for name, info in data.items()
             )
+    return sort_timezones(all_timezones)
+
+def sort_timezones(timezones):
+    """
+    Sort a list of city/timezone dictionaries in place into the global
+    lookup order and return it.
+    """
     # Global sorted list for efficient lookups
     # Sort by utc_offset, then longitude, then latitude
-    all_timezones.sort(key=lambda x: (
+    timezones.sort(key=lambda x: (
         float(x["utc_offset"]) if x["utc_offset"] is not None else 0.0,
         x["longitude"],
         x["latitude"]
     ))
-    return all_timezones
+    return timezones
+
+def dataset_version(timezones, locations=None):
+    """
+    Short content hash of a list of city/timezone dictionaries (and
+    optionally the region bounds), used to tell whether derived artifacts
+    (lookup tables, caches) match the dataset.
+    """
+    digest = hashlib.sha256()
+    if locations is not None:
+        digest.update(json.dumps(locations, sort_keys=True).encode("utf-8"))
+    for tz in timezones:
+        digest.update(json.dumps(
+            [tz["name"], tz["latitude"], tz["longitude"], tz.get("utc_offset"), tz.get("dst"), tz.get("region")],
+            default=str,
+        ).encode("utf-8"))
+    return digest.hexdigest()[:16]
 
 TZ_LOCATIONS = dict(
     sorted(
@@ -0,0 +1,136 @@
+import functools
+import importlib
+import logging
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "timestamp-api"
+
+# The active tracer, or None while tracing is disabled. Every helper checks
+# it first, so disabled tracing costs one global lookup per span.
+_state = {"tracer": None, "provider": None}
+_NOOP = nullcontext()
+
+def configure_tracing(endpoint, sample_rate=1.0, exporter=None):
+    """
+    Enable OpenTelemetry tracing, exporting spans over OTLP/HTTP.
+
+    Requires the optional `opentelemetry-sdk` and
+    `opentelemetry-exporter-otlp-proto-http` packages; without them tracing
+    stays disabled and a warning is logged.
+
+    Args:
+        endpoint (str): OTLP/HTTP traces URL, e.g.
+            http://collector:4318/v1/traces. Empty disables tracing.
+        sample_rate (float): Fraction of new traces recorded (0 to 1).
+            Requests continuing a sampled upstream trace are always recorded.
+        exporter: Span exporter to use instead of the OTLP one (tests).
+
+    Returns:
+        bool: Whether tracing is enabled.
+    """
+    if not endpoint and exporter is None:
+        return False
+    try:
+        trace = importlib.import_module("opentelemetry.trace")
+        sdk_trace = importlib.import_module("opentelemetry.sdk.trace")
+        export = importlib.import_module("opentelemetry.sdk.trace.export")
+        sampling = importlib.import_module("opentelemetry.sdk.trace.sampling")
+        resources = importlib.import_module("opentelemetry.sdk.resources")
+        if exporter is None:
+            otlp = importlib.import_module("opentelemetry.exporter.otlp.proto.http.trace_exporter")
+            exporter = otlp.OTLPSpanExporter(endpoint=endpoint)
+    except ImportError:
+        logger.warning("Tracing requires the optional 'opentelemetry-sdk' and OTLP exporter packages.")
+        return False
+    provider = sdk_trace.TracerProvider(
+        resource=resources.Resource.create({"service.name": SERVICE_NAME}),
+        sampler=sampling.ParentBased(sampling.TraceIdRatioBased(sample_rate)),
+    )
+    provider.add_span_processor(export.BatchSpanProcessor(exporter))
+    _state["provider"] = provider
+    _state["tracer"] = trace.get_tracer(__name__, tracer_provider=provider)
+    return True
+
+def shutdown_tracing():
+    """
+    Flush pending spans and disable tracing.
+    """
+    provider = _state["provider"]
+    _state["tracer"] = _state["provider"] = None
+    if provider is not None:
+        provider.shutdown()
+
+def tracing_enabled():
+    return _state["tracer"] is not None
+
+def span(name, **attributes):
+    """
+    Context manager timing a block as a child span of the current one; a
+    shared no-op context while tracing is disabled.
+    """
+    tracer = _state["tracer"]
+    if tracer is None:
+        return _NOOP
+    return tracer.start_as_current_span(name, attributes=attributes or None)
+
+def traced(name):
+    """
+    Decorator running a function inside a span named `name`.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _state["tracer"]
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with tracer.start_as_current_span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a server span per HTTP request. The span
+    continues the caller's trace when it sends a W3C `traceparent` header,
+    and is named after the matched route template once routing is done.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        tracer = _state["tracer"]
+        if tracer is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        propagate = importlib.import_module("opentelemetry.propagate")
+        trace = importlib.import_module("opentelemetry.trace")
+        carrier = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope.get("headers") or []
+        }
+        method = scope["method"]
+        with tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=propagate.extract(carrier),
+            kind=trace.SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as request_span:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    request_span.set_attribute("http.response.status_code", status)
+                    if status >= 500:
+                        request_span.set_status(trace.StatusCode.ERROR)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None and getattr(route, "path", None):
+                    request_span.update_name(f"{method} {route.path}")
+                    request_span.set_attribute("http.route", route.path)